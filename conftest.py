@@ -0,0 +1,299 @@
+import os
+
+import pytest
+
+from utils import artifacts, bench, config, durations, perf, replay, resources, storefront
+from utils.config import set_base_url
+from utils.admin_api import AdminApiClient
+from utils.browser import PROFILES, BrowserFactory
+from utils.browser_pool import BrowserPool
+from utils.ledger import ResourceLedger, sweep
+from utils.naming import Namespace, current_run_id, current_worker
+from utils.stub_server import StubEverShop
+from utils.waits import WaitBudget, use_budget
+
+CALL_REPORT = pytest.StashKey()  # Rapport de la phase call, lu par les fixtures au nettoyage
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("evershop")
+    group.addoption("--base-url", default=None,
+                    help=f"Instance EverShop visée (défaut : {config.BASE_URL})")
+    group.addoption("--stub", action="store_true", default=False,
+                    help="Lance les tests contre le serveur de substitution local au lieu d'EverShop")
+    group.addoption("--stub-latency", type=float, default=config.STUB_LATENCY,
+                    help="Latence ajoutée par le serveur de substitution à chaque requête, en secondes")
+    group.addoption("--browser-profile", choices=sorted(PROFILES), default=config.BROWSER_PROFILE,
+                    help="Profil Chrome : fast-headless (défaut, parallélisable) ou debug-headed")
+    group.addoption("--bench-output", default=bench.DEFAULT_OUTPUT,
+                    help="Fichier JSON Lines des durées par étape (comparer avec python -m utils.bench compare)")
+    group.addoption("--artifacts-dir", default=artifacts.DEFAULT_ROOT,
+                    help="Dossier des captures des tests en échec (écran, DOM, console, réseau)")
+    group.addoption("--artifacts-keep", type=int, default=5,
+                    help="Nombre de runs dont les captures sont conservées")
+    group.addoption("--ledger-dir", default="ledger",
+                    help="Dossier des registres des entités créées, balayés au run suivant en cas de plantage")
+    group.addoption("--duration-history", default=durations.DEFAULT_HISTORY,
+                    help="Historique JSON des durées par test, mis à jour à chaque run")
+    group.addoption("--shard-count", type=int, default=1,
+                    help="Nombre de shards (machines) entre lesquels répartir les tests")
+    group.addoption("--shard-index", type=int, default=0,
+                    help="Shard exécuté par cette machine, de 0 à --shard-count - 1")
+    group.addoption("--shard-history", default=None,
+                    help="Historique commun à toutes les machines (python -m utils.durations merge), "
+                         "seul utilisé pour le découpage")
+    group.addoption("--slowest-first", action="store_true", default=False,
+                    help="Lance les tests les plus longs en premier (implicite avec --shard-count)")
+    group.addoption("--perf", action="store_true", default=False,
+                    help="Mesure chaque page ouverte et fait échouer les tests qui dépassent leur budget")
+    group.addoption("--perf-budgets", default=None,
+                    help="Fichier JSON {route: {métrique: limite}} qui complète les budgets par défaut")
+    group.addoption("--perf-output", default=perf.DEFAULT_OUTPUT,
+                    help="Fichier JSON Lines des métriques de performance par route")
+    group.addoption("--resources", action="store_true", default=False,
+                    help="Mesure mémoire et CPU des navigateurs à chaque test (psutil)")
+    group.addoption("--resources-output", default=resources.DEFAULT_OUTPUT,
+                    help="Fichier JSON Lines des ressources consommées par test")
+    group.addoption("--kill-orphans", action="store_true", default=False,
+                    help="Tue au démarrage les navigateurs laissés par un run planté (psutil)")
+    group.addoption("--storefront", action="store_true", default=False,
+                    help="Mesure le délai avant qu'un produit ou une catégorie créé soit visible sur la vitrine")
+    group.addoption("--storefront-timeout", type=float, default=60.0,
+                    help="Attente maximale de la page de vitrine, en secondes")
+    group.addoption("--storefront-output", default=storefront.DEFAULT_OUTPUT,
+                    help="Historique JSON Lines des délais de propagation, complété à chaque run")
+    group.addoption("--record", default=None, metavar="DIR",
+                    help="Enregistre le trafic HTTP de chaque test réussi en cassettes "
+                         "(rejouées sans navigateur par python -m utils.replay DIR)")
+
+
+def pytest_configure(config):
+    for option in ("resources", "kill_orphans"):
+        if config.getoption(option) and not resources.available():
+            raise pytest.UsageError(f"--{option.replace('_', '-')} demande psutil (pip install psutil)")
+    # Fixé avant le lancement des workers xdist pour qu'ils partagent le même run
+    current_run_id()
+    if not 0 <= config.getoption("shard_index") < config.getoption("shard_count"):
+        raise pytest.UsageError("--shard-index doit être compris entre 0 et --shard-count - 1")
+    shard_history = config.getoption("shard_history")
+    if shard_history and not os.path.exists(shard_history):
+        # Sans le fichier, les machines qui l'ont reçu et les autres découperaient différemment
+        raise pytest.UsageError(f"--shard-history introuvable : {shard_history}")
+    if not hasattr(config, "workerinput"):
+        # Le stub tourne dans le contrôleur ; les workers héritent de son URL
+        if config.getoption("stub"):
+            config.evershop_stub = StubEverShop(latency=config.getoption("stub_latency")).start()
+            set_base_url(config.evershop_stub.url)
+        elif config.getoption("base_url"):
+            set_base_url(config.getoption("base_url"))
+        bench.reset(config.getoption("bench_output"))
+        perf.reset(config.getoption("perf_output"))
+        resources.reset(config.getoption("resources_output"))
+        if config.getoption("kill_orphans"):
+            # Navigateurs laissés par un run planté : avant d'en lancer de nouveaux
+            killed = resources.sweep()
+            if killed:
+                print(f"\n=== {len(killed)} processus de navigateur orphelin(s) tué(s) ===")
+    perf.enable(config.getoption("perf"), config.getoption("perf_budgets"))
+    config.evershop_perf_unassigned = []
+    config.evershop_artifacts = artifacts.ArtifactCollector(
+        config.getoption("artifacts_dir"), keep_runs=config.getoption("artifacts_keep"))
+    if not hasattr(config, "workerinput"):
+        config.evershop_artifacts.prune()
+    record = config.getoption("record")
+    config.evershop_recorder = replay.TrafficRecorder(record) if record else None
+    config.evershop_resources = resources.ResourceMonitor() if config.getoption("resources") else None
+
+
+def pytest_collection_modifyitems(config, items):
+    count = config.getoption("shard_count")
+    if count <= 1 and not config.getoption("slowest_first"):
+        return
+    estimated = durations.estimates(durations.load(config.getoption("duration_history")),
+                                    [item.nodeid for item in items])
+    selected = list(estimated)
+    if count > 1:
+        # Découpage indépendant de l'historique local, propre à chaque machine
+        shared = durations.load(config.getoption("shard_history")) if config.getoption("shard_history") else {}
+        selected = durations.partition(selected, shared, count)[config.getoption("shard_index")]
+        deselected = [item for item in items if item.nodeid not in set(selected)]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+    by_nodeid = {item.nodeid: item for item in items}
+    items[:] = [by_nodeid[nodeid] for nodeid in durations.slowest_first(selected, estimated)]
+
+
+def pytest_report_header(config):
+    count = config.getoption("shard_count")
+    if count <= 1:
+        return None
+    path = config.getoption("shard_history")
+    if not path:
+        return f"shard {config.getoption('shard_index')}/{count} : hachage des nodeids, sans historique commun"
+    return (f"shard {config.getoption('shard_index')}/{count} : historique commun {path} "
+            f"(empreinte {durations.fingerprint(durations.load(path))})")
+
+
+def pytest_runtest_logreport(report):
+    durations.record(report.nodeid, report.duration, skipped=report.skipped)
+
+
+def pytest_unconfigure(config):
+    stub = getattr(config, "evershop_stub", None)
+    if stub is not None:
+        stub.stop()
+
+
+def pytest_sessionfinish(session):
+    # Chaque process (contrôleur ou worker xdist) ajoute ses propres mesures
+    bench.flush(session.config.getoption("bench_output"))
+    perf.flush(session.config.getoption("perf_output"))
+    unassigned = session.config.evershop_perf_unassigned + perf.pop_violations()
+    if unassigned:
+        print("\n=== Budget de performance dépassé hors des tests :\n" + "\n".join(unassigned) + " ===")
+    if not hasattr(session.config, "workerinput"):
+        # Le contrôleur xdist reçoit les rapports de tous les workers
+        path = session.config.getoption("duration_history")
+        durations.save(durations.update(durations.load(path), durations.recorded()), path)
+    monitor = session.config.evershop_resources
+    if monitor is not None:
+        monitor.flush(session.config.getoption("resources_output"))
+        print(f"\n=== Ressources des navigateurs : {monitor.report()} ===")
+    for error in session.config.evershop_artifacts.close():
+        print(f"\nCapture des artefacts impossible : {error}")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    # Pas de remise à zéro : les navigations de la préparation (login du pool) comptent pour ce test
+    recorder = item.config.evershop_recorder
+    driver = item.funcargs.get("admin_driver") or item.funcargs.get("driver")
+    monitor = item.config.evershop_resources
+    if recorder is not None:
+        recorder.start(driver)
+    if monitor is not None:
+        monitor.start(driver, item.nodeid)
+    outcome = yield
+    if monitor is not None:
+        monitor.stop()
+    if recorder is not None:
+        # Seuls les parcours réussis deviennent des cassettes
+        recorder.stop(driver, item.nodeid, replay.recorded_literals(),
+                      authenticated="admin_driver" in item.funcargs, save=outcome.excinfo is None)
+    violations = perf.pop_violations()
+    if violations and outcome.excinfo is None:
+        # Le parcours fonctionnel a réussi mais une page a dépassé son budget
+        outcome.force_exception(AssertionError("Budget de performance dépassé :\n" + "\n".join(violations)))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    yield
+    # Navigations du nettoyage (nouveau login du pool) : rapportées en fin de session
+    item.config.evershop_perf_unassigned.extend(perf.pop_violations())
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.when == "call":
+        item.stash[CALL_REPORT] = report
+    if report.when != "call" or not report.failed:
+        return
+    # Le navigateur est lu avant que sa fixture ne le rende au pool
+    driver = item.funcargs.get("admin_driver") or item.funcargs.get("driver")
+    if driver is not None:
+        directory = item.config.evershop_artifacts.capture(driver, item.nodeid)
+        report.sections.append(("Artefacts", directory))
+
+
+@pytest.fixture(scope="session")
+def browser_factory(pytestconfig):
+    """Fabrique de navigateurs isolés : un profil Chrome par navigateur et par worker"""
+    factory = BrowserFactory(pytestconfig.getoption("browser_profile"), worker=current_worker(),
+                             record_traffic=pytestconfig.evershop_recorder is not None)
+    yield factory
+    print(f"\n=== {factory.report()} ===")
+    factory.close()
+
+
+@pytest.fixture(scope="session")
+def browser_pool(browser_factory):
+    """Pool de navigateurs authentifiés partagé par toute la session de tests"""
+    pool = BrowserPool(browser_factory)
+    yield pool
+    print("\n=== Fermeture des navigateurs du pool ===")
+    pool.close()
+
+
+@pytest.fixture
+def admin_driver(browser_pool):
+    """Navigateur déjà connecté à l'admin, rendu au pool après le test"""
+    with browser_pool.borrow() as driver:
+        yield driver
+
+
+@pytest.fixture(scope="session")
+def admin_api(browser_pool, pytestconfig):
+    """Client HTTP de l'API admin pour préparer et nettoyer les données"""
+    # Réutilise la session du pool si un navigateur s'est déjà connecté,
+    # sinon le client ouvre sa propre session au premier appel
+    client = AdminApiClient(cookies=browser_pool.cookies)
+    if pytestconfig.evershop_recorder is not None:
+        # Les données préparées par l'API font partie du trafic enregistré
+        client.session.hooks["response"].append(pytestconfig.evershop_recorder.on_response)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def ledger(admin_api, pytestconfig):
+    """Registre des entités créées par les tests, supprimées en un lot en fin de session"""
+    directory = pytestconfig.getoption("ledger_dir")
+    swept = sweep(admin_api, directory)
+    if swept:
+        print(f"\n=== {swept} entité(s) orpheline(s) d'un run précédent supprimée(s) ===")
+    registry = ResourceLedger(admin_api, directory)
+    yield registry
+    count = len(registry.entries)
+    remaining = registry.teardown()
+    print(f"\n=== Nettoyage : {count - len(remaining)} entité(s) supprimée(s), {len(remaining)} en échec ===")
+    registry.close()
+
+
+@pytest.fixture(scope="session")
+def storefront_probe(pytestconfig):
+    """Sonde de propagation vers la vitrine, ou None sans --storefront"""
+    if not pytestconfig.getoption("storefront"):
+        yield None
+        return
+    path = pytestconfig.getoption("storefront_output")
+    history = storefront.load(path)
+    probe = storefront.PropagationProbe(timeout=pytestconfig.getoption("storefront_timeout"), history=history)
+    yield probe
+    records = list(probe.records)
+    probe.flush(path)
+    if records:
+        print(f"\n=== Propagation vers la vitrine ===\n{storefront.report(records)}")
+
+
+@pytest.fixture(scope="session")
+def namespace():
+    """Générateur de SKU, url keys et noms uniques pour ce run et ce worker"""
+    return Namespace()
+
+
+@pytest.fixture(autouse=True)
+def wait_budget(request):
+    """Budget d'attente unique pour toutes les attentes du test"""
+    bench.set_current_test(request.node.nodeid)
+    with use_budget(WaitBudget()) as budget:
+        yield budget
+    if budget.records:
+        bench.record("waits", budget.blocked)
+    report = request.node.stash.get(CALL_REPORT, None)
+    # Détail des attentes : utile pour un test en échec, ou sur demande (-v)
+    if report is None or report.failed or request.config.get_verbosity() > 0:
+        print(f"\n=== Attentes : {budget.report()} ===")
+    bench.set_current_test(None)
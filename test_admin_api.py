@@ -0,0 +1,83 @@
+import pytest
+
+from utils.admin_api import AdminApiClient, AdminApiError, uuid_from_edit_url
+from utils.stub_server import StubEverShop
+
+
+class TestAdminApiClient:
+    @pytest.fixture
+    def stub(self):
+        with StubEverShop() as server:
+            yield server
+
+    @pytest.fixture
+    def client(self, stub):
+        client = AdminApiClient(base_url=stub.url)
+        yield client
+        client.close()
+
+    def test_logs_in_lazily(self, client):
+        assert not client.authenticated
+        client.create_category("Catégorie Test", "categorie-test")
+        assert client.authenticated
+
+    def test_reuses_browser_session_cookie(self, stub, client):
+        client.login()
+        cookies = [{"name": "asid", "value": client.session.cookies["asid"], "domain": "localhost"}]
+        reused = AdminApiClient(base_url=stub.url, cookies=cookies)
+        assert reused.create_category("Catégorie Test", "categorie-test")["uuid"]
+        assert len(stub.store.sessions) == 1
+
+    def test_logs_in_again_when_the_session_expired(self, stub, client):
+        client.login()
+        expired = client.session.cookies["asid"]
+        stub.store.sessions.clear()
+        assert client.create_category("Catégorie Test", "categorie-test")["uuid"]
+        assert client.upload_image("images/monstera.jpg").endswith(".jpg")
+        assert client.session.cookies["asid"] != expired
+        assert len(stub.store.sessions) == 1
+        # Page admin : la session expirée se traduit par une redirection vers /admin/login
+        stub.store.sessions.clear()
+        assert "<table" in client.page("/admin/products")
+        assert len(stub.store.sessions) == 1
+
+    def test_second_rejection_is_raised(self, stub, client, monkeypatch):
+        monkeypatch.setattr(client, "login", lambda: None)
+        client.session.cookies.set("asid", "expire")
+        with pytest.raises(AdminApiError) as error:
+            client.create_category("Catégorie Test", "categorie-test")
+        assert error.value.status_code == 401
+
+    def test_product_roundtrip(self, stub, client):
+        product = client.create_product("monstera deliciosa", "sku12345", "plante12345")
+        assert client.find_product("sku12345")["uuid"] == product["uuid"]
+        client.delete_product(product["uuid"])
+        assert client.find_product("sku12345") is None
+        assert stub.store.products == {}
+
+    def test_category_roundtrip(self, client):
+        category = client.create_category("Catégorie Test 1", "categorie-test-1")
+        assert client.find_category("Catégorie Test 1")["uuid"] == category["uuid"]
+        client.delete_category(category["uuid"])
+        assert client.find_category("Catégorie Test 1") is None
+
+    def test_upload_and_delete_image(self, stub, client):
+        url = client.upload_image("images/monstera.jpg")
+        assert url.endswith(".jpg") and url in stub.store.media
+        client.delete_image(url)
+        assert stub.store.media == {}
+
+    def test_errors_are_raised(self, client):
+        with pytest.raises(AdminApiError) as error:
+            client.delete_product("inconnu")
+        assert error.value.status_code == 404
+
+    def test_bad_credentials(self, stub):
+        client = AdminApiClient(base_url=stub.url, password="wrongpassword")
+        with pytest.raises(AdminApiError):
+            client.login()
+
+    def test_uuid_from_edit_url(self):
+        uuid = "3f1c2d4e-1111-2222-3333-444455556666"
+        assert uuid_from_edit_url(f"http://localhost:3000/admin/products/edit/{uuid}") == uuid
+        assert uuid_from_edit_url("http://localhost:3000/admin/products/new") is None
@@ -0,0 +1,32 @@
+import pytest
+
+from utils import perf
+from utils.pages import CategoryGridPage, LoginPage, ProductFormPage, ProductGridPage
+
+
+class TestAdminPerformance:
+    """Chaque page de l'admin utilisée par les tests doit tenir son budget"""
+
+    @pytest.fixture(scope="function")
+    def driver(self, browser_factory):
+        # La page de login n'est mesurable que déconnecté
+        driver = browser_factory()
+        yield driver
+        driver.quit()
+
+    def assert_within_budget(self, driver, route):
+        metrics = perf.collect(driver, route)
+        print(f"\n{route} : chargement {metrics['load']} ms, LCP {metrics['lcp']} ms, "
+              f"{metrics['long_tasks']} long tasks, tas JS {metrics['heap_mb']} Mo")
+        violations = perf.check(metrics)
+        assert not violations, "Budget de performance dépassé :\n" + "\n".join(violations)
+
+    def test_login_page(self, driver):
+        LoginPage(driver).open()
+        self.assert_within_budget(driver, LoginPage.PATH)
+
+    @pytest.mark.parametrize("page_class", [ProductFormPage, ProductGridPage, CategoryGridPage],
+                             ids=lambda page_class: page_class.PATH)
+    def test_admin_page(self, admin_driver, page_class):
+        page_class(admin_driver).open()
+        self.assert_within_budget(admin_driver, page_class.PATH)
@@ -0,0 +1,79 @@
+import gzip
+import json
+import os
+
+from selenium.common.exceptions import WebDriverException
+
+from utils.artifacts import ArtifactCollector
+
+
+class FakeDriver:
+    def __init__(self, dom="<html><body><table></table></body></html>", logs=True):
+        self.dom = dom
+        self.logs = logs
+
+    def execute_script(self, script, *args):
+        limit, max_dom = args
+        network = [{"name": f"http://localhost/{i}.js", "duration": i} for i in range(limit)]
+        # Comme le script : le DOM est coupé dans la page
+        return {"url": "http://localhost/admin/products", "dom": self.dom[:max_dom], "dom_length": len(self.dom),
+                "network": network}
+
+    def get_screenshot_as_png(self):
+        return b"\x89PNG fake"
+
+    def get_log(self, log_type):
+        if not self.logs:
+            raise WebDriverException("log type not found")
+        return [{"level": "SEVERE", "message": f"erreur {i}"} for i in range(300)]
+
+
+class TestArtifactCollector:
+    def test_capture_writes_artifacts(self, tmp_path):
+        collector = ArtifactCollector(str(tmp_path), run_id="run1", max_network_entries=10)
+        directory = collector.capture(FakeDriver(), "test_create_product.py::TestProductCreation::test_create_product")
+        assert collector.close() == []
+        assert os.path.dirname(directory) == str(tmp_path / "run1")
+        assert sorted(os.listdir(directory)) == ["console.json", "dom.html.gz", "network.json",
+                                                 "page.json", "screenshot.png"]
+        with gzip.open(os.path.join(directory, "dom.html.gz"), "rt") as dom:
+            assert dom.read() == "<html><body><table></table></body></html>"
+        with open(os.path.join(directory, "console.json")) as console:
+            assert len(json.load(console)) == 200
+        with open(os.path.join(directory, "network.json")) as network:
+            assert len(json.load(network)) == 10
+        with open(os.path.join(directory, "page.json")) as page:
+            assert json.load(page) == {"url": "http://localhost/admin/products"}
+
+    def test_dom_is_truncated(self, tmp_path):
+        collector = ArtifactCollector(str(tmp_path), run_id="run1", max_dom_bytes=100)
+        directory = collector.capture(FakeDriver(dom="x" * 10_000), "test_big_grid")
+        collector.close()
+        with gzip.open(os.path.join(directory, "dom.html.gz"), "rt") as dom:
+            content = dom.read()
+        assert content == "x" * 100 + "\n<!-- tronqué : 10000 caractères -->"
+
+    def test_multibyte_dom_is_truncated_in_bytes(self, tmp_path):
+        collector = ArtifactCollector(str(tmp_path), run_id="run1", max_dom_bytes=100)
+        directory = collector.capture(FakeDriver(dom="é" * 80), "test_accents")
+        collector.close()
+        with gzip.open(os.path.join(directory, "dom.html.gz"), "rb") as dom:
+            content = dom.read()
+        assert content == "é".encode() * 50 + "\n<!-- tronqué : 80 caractères -->".encode()
+
+    def test_missing_console_log(self, tmp_path):
+        collector = ArtifactCollector(str(tmp_path), run_id="run1")
+        directory = collector.capture(FakeDriver(logs=False), "test_login")
+        collector.close()
+        with open(os.path.join(directory, "console.json")) as console:
+            assert json.load(console) == []
+
+    def test_prune_keeps_latest_runs(self, tmp_path):
+        for i, name in enumerate(["run1", "run2", "run3", "run4"]):
+            (tmp_path / name).mkdir()
+            os.utime(tmp_path / name, (i, i))
+        collector = ArtifactCollector(str(tmp_path), run_id="run5", keep_runs=3)
+        removed = collector.prune()
+        collector.close()
+        assert sorted(os.path.basename(path) for path in removed) == ["run1", "run2"]
+        assert sorted(os.listdir(tmp_path)) == ["run3", "run4"]
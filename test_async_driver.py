@@ -0,0 +1,227 @@
+import asyncio
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import aiohttp
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from utils import config
+from utils.async_driver import ELEMENT_KEY, AsyncElement, AsyncWebDriver, admin_scenario, run_sessions
+from utils.browser import PROFILES
+from utils.loadgen import LoadStats
+from utils.waits import WaitTimeout
+
+
+class FakeChromedriverHandler(BaseHTTPRequestHandler):
+    """Sous-ensemble du protocole W3C WebDriver, avec une latence par commande"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # En-têtes et corps partent dans deux écritures
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length)) if length else None
+        match = re.match(r"^/session(?:/([^/]+)(/.*)?)?$", self.path)
+        session, command = (match.group(1), match.group(2) or "") if match else (None, self.path)
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests += 1
+            server.in_flight[session] = server.in_flight.get(session, 0) + 1
+            server.max_in_flight[session] = max(server.max_in_flight.get(session, 0), server.in_flight[session])
+            server.busy += 1
+            server.max_busy = max(server.max_busy, server.busy)
+        try:
+            time.sleep(server.latency)
+            status, value = self._command(session, command, payload)
+        finally:
+            with server.lock:
+                server.in_flight[session] -= 1
+                server.busy -= 1
+        body = json.dumps({"value": value}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _element(self, selector, n=0):
+        # Identifiants sûrs dans une URL, comme ceux de chromedriver
+        return {ELEMENT_KEY: f"{re.sub(r'[^a-z]', '', selector)}-{n}"}
+
+    def _command(self, session, command, payload):
+        server = self.server
+        if session is None and self.command == "POST":
+            session = f"s{next(server.ids)}"
+            server.sessions[session] = {"url": "about:blank", "values": {}}
+            return 200, {"sessionId": session, "capabilities": {"browserName": "chrome"}}
+        state = server.sessions.get(session)
+        if state is None:
+            return 404, {"error": "invalid session id", "message": session}
+        if self.command == "DELETE" and not command:
+            del server.sessions[session]
+            return 200, None
+        if command == "/url":
+            if self.command == "POST":
+                state["url"] = payload["url"]
+                server.visited.append(payload["url"])
+            return 200, None if self.command == "POST" else state["url"]
+        if command in ("/element", "/elements"):
+            found = [self._element(payload["value"], n) for n in range(3)] if payload["value"] in server.present else []
+            if command == "/elements":
+                return 200, found
+            if not found:
+                return 404, {"error": "no such element", "message": payload["value"]}
+            return 200, found[0]
+        if command == "/execute/sync":
+            return 200, payload["args"]
+        if command == "/execute/async":
+            # Script d'attente de utils.waits : kind, by, selector, text, locators, délai
+            kind, by, selector, text, locators, timeout = payload["args"]
+            if selector not in server.present:
+                return 200, {"ok": False}
+            return 200, {"ok": True, "element": self._element(selector),
+                         "elements": {name: self._element(value) for name, (_, value) in locators.items()}}
+        element = re.match(r"^/element/([^/]+)/(\w+)(?:/(.+))?$", command)
+        if element:
+            name, action, argument = element.groups()
+            if action == "value":
+                state["values"][name] = state["values"].get(name, "") + payload["text"]
+            elif action == "attribute":
+                return 200, state["values"].get(name) if argument == "value" else None
+            elif action == "text":
+                return 200, f"texte de {name}"
+            return 200, None
+        return 200, None  # /timeouts, /goog/cdp/execute...
+
+
+@pytest.fixture
+def chromedriver():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeChromedriverHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.ids = itertools.count(1)
+    server.latency = 0.0
+    server.sessions, server.visited = {}, []
+    server.present = {"table", "table tbody tr", "h1.page-heading-title", '[name="email"]', '[name="password"]',
+                      "button[type='submit']", "a.button.primary"}
+    server.connections, server.requests = set(), 0
+    server.in_flight, server.max_in_flight, server.busy, server.max_busy = {}, {}, 0, 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run(coroutine_function, chromedriver):
+    async def main():
+        async with aiohttp.ClientSession() as http:
+            stats = LoadStats(())
+            driver = await AsyncWebDriver.start(http, chromedriver.url, {}, stats)
+            try:
+                return await coroutine_function(driver), stats
+            finally:
+                await driver.quit()
+    return asyncio.run(main())
+
+
+class TestAsyncWebDriver:
+    def test_commands_round_trip(self, chromedriver):
+        async def scenario(driver):
+            await driver.get("http://shop/admin/login")
+            email = await driver.find_element(By.NAME, "email")
+            await email.send_keys("admin@", "admin.com")
+            rows = await driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
+            echoed = await driver.execute_script("return arguments;", email, {"rows": rows}, 3)
+            return (await driver.current_url(), email, await email.get_attribute("value"), rows, echoed)
+
+        (url, email, value, rows, echoed), stats = run(scenario, chromedriver)
+        assert url == "http://shop/admin/login"
+        assert email == AsyncElement(None, "nameemail-0")
+        assert value == "admin@admin.com"
+        assert len(rows) == 3
+        assert echoed == [email, {"rows": rows}, 3]
+        assert chromedriver.sessions == {}
+        summary = stats.summary()
+        assert list(summary) == ["new_session", "timeouts", "get", "find_element", "send_keys", "find_elements",
+                                 "execute_script", "current_url", "get_attribute", "quit"]
+        assert all(item["count"] == 1 and item["errors"] == 0 for item in summary.values())
+
+    def test_missing_element_raises_the_selenium_exception(self, chromedriver):
+        async def scenario(driver):
+            with pytest.raises(NoSuchElementException, match="no such element"):
+                await driver.find_element(By.ID, "absent")
+            assert await driver.find_elements(By.ID, "absent") == []
+            with pytest.raises(WaitTimeout, match="present id=absent"):
+                await driver.wait_for(By.ID, "absent", timeout=0.2)
+
+        _, stats = run(scenario, chromedriver)
+        assert stats.errors == {"find_element": 1}
+
+
+class TestRunSessions:
+    def test_sessions_run_concurrently_over_keep_alive_connections(self, chromedriver):
+        chromedriver.latency = 0.02
+
+        async def scenario(driver, number):
+            for _ in range(10):
+                await driver.get(f"http://shop/{number}")
+
+        start = time.monotonic()
+        stats = asyncio.run(run_sessions(chromedriver.url, scenario, sessions=6, capabilities={}))
+        elapsed = time.monotonic() - start
+        # 6 sessions x 13 commandes x 20ms, soit 1.6s en série
+        assert elapsed < 0.8
+        assert chromedriver.max_busy > 1
+        # Au plus une commande en vol par session (None : les créations de session)
+        assert {count for session, count in chromedriver.max_in_flight.items() if session} == {1}
+        assert len(chromedriver.connections) <= 6 < chromedriver.requests
+        assert stats.summary()["get"]["count"] == 60
+        assert stats.summary()["session"]["count"] == 6 and stats.errors == {}
+        assert stats.report().startswith("Commandes WebDriver")
+
+    def test_failed_session_does_not_stop_the_others(self, chromedriver):
+        async def scenario(driver, number):
+            if number == 1:
+                await driver.find_element(By.ID, "absent")
+
+        stats = asyncio.run(run_sessions(chromedriver.url, scenario, sessions=3, capabilities={}))
+        assert stats.summary()["session"]["count"] == 2
+        assert stats.errors == {"find_element": 1, "session": 1}
+        assert chromedriver.sessions == {}
+
+    def test_admin_scenario(self, chromedriver, monkeypatch):
+        monkeypatch.setattr(config, "BASE_URL", "http://shop")
+        stats = asyncio.run(run_sessions(
+            chromedriver.url, lambda driver, number: admin_scenario(driver, 0.1, PROFILES["fast-headless"]),
+            sessions=2, capabilities={}))
+        assert stats.errors == {}
+        summary = stats.summary()
+        assert summary["send_keys"]["count"] == 4 and summary["click"]["count"] == 2
+        assert summary["cdp"]["count"] == 4
+        assert summary["text"]["count"] == 3 * summary["find_elements"]["count"]
+        assert chromedriver.visited[:2] == ["http://shop/admin/login"] * 2
+        assert "http://shop/admin/products?ob=created_at&od=desc&limit=50" in chromedriver.visited
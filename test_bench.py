@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from utils import bench
+
+
+def item(test, name, seconds, commands=1, ok=True):
+    return {"test": test, "step": name, "seconds": seconds, "commands": commands, "ok": ok}
+
+
+class FakeDriver:
+    def execute(self, driver_command, params=None):
+        return {"value": None}
+
+
+class TestBench:
+    def test_step_counts_commands(self):
+        driver = bench.count_commands(FakeDriver())
+        other = bench.count_commands(FakeDriver())
+        before = len(bench.records())
+        with bench.step("fill", driver):
+            driver.execute("executeScript")
+            other.execute("executeScript")  # Autre navigateur (autre thread) : non compté
+            driver.execute("executeScript")
+        recorded = bench.records()[before:]
+        assert [(r["step"], r["commands"], r["ok"]) for r in recorded] == [("fill", 2, True)]
+
+    def test_decorated_step_counts_the_commands_of_its_driver(self):
+        class Page:
+            def __init__(self, driver):
+                self.driver = driver
+
+            @bench.step("fill")
+            def fill(self, other):
+                self.driver.execute("executeScript")
+                other.execute("executeScript")
+
+        @bench.step("login")
+        def login(driver):
+            driver.execute("get")
+
+        driver, other = bench.count_commands(FakeDriver()), bench.count_commands(FakeDriver())
+        before = len(bench.records())
+        Page(driver).fill(other)
+        login(other)
+        recorded = bench.records()[before:]
+        assert [(r["step"], r["commands"]) for r in recorded] == [("fill", 1), ("login", 1)]
+        assert bench.commands_sent(other) == 2 and bench.commands_sent(None) == 0
+
+    def test_step_as_decorator_records_failures(self):
+        @bench.step("save")
+        def save():
+            raise RuntimeError("boom")
+
+        before = len(bench.records())
+        with pytest.raises(RuntimeError):
+            save()
+        assert bench.records()[before]["ok"] is False
+
+    def test_compare_flags_slower_steps(self):
+        baseline = [item("t", "save", 1.0), item("t", "fill", 0.10)]
+        current = [item("t", "save", 1.5), item("t", "fill", 0.12)]
+        regressions = bench.compare(baseline, current)
+        assert [(test, name) for test, name, *_ in regressions] == [("t", "save")]
+
+    def test_compare_flags_extra_commands(self):
+        regressions = bench.compare([item("t", "fill", 0.1, commands=1)], [item("t", "fill", 0.1, commands=7)])
+        assert len(regressions) == 1
+
+    def test_compare_uses_median_and_ignores_failures(self):
+        baseline = [item("t", "save", 1.0)]
+        current = [item("t", "save", 1.0), item("t", "save", 1.1), item("t", "save", 9.0, ok=False)]
+        assert bench.compare(baseline, current) == []
+
+    def test_percentiles(self):
+        samples = [i / 100 for i in range(1, 101)]
+        assert bench.percentile(samples, 50) == 0.5
+        assert bench.percentile(samples, 95) == 0.95
+        assert bench.percentile(samples, 99) == 0.99
+        assert bench.percentile([], 50) is None
+
+    def test_cli_exit_code(self, tmp_path, capsys):
+        baseline, current = tmp_path / "baseline.txt", tmp_path / "current.txt"
+        baseline.write_text(json.dumps(item("t", "save", 1.0)) + "\n")
+        current.write_text(json.dumps(item("t", "save", 3.0)) + "\n")
+        assert bench.main(["compare", str(baseline), str(current)]) == 1
+        assert "save" in capsys.readouterr().out
+        assert bench.main(["compare", str(baseline), str(baseline)]) == 0
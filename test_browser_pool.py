@@ -0,0 +1,112 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from utils import browser_pool
+from utils.browser_pool import BrowserPool
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_handle = handle
+
+
+class FakeDriver:
+    """Faux WebDriver : enregistre les commandes reçues"""
+
+    def __init__(self):
+        self.commands = []
+        self.cookies = []
+        self.window_handles = ["main"]
+        self.current_handle = "main"
+        self.switch_to = FakeSwitchTo(self)
+        self.current_url = "about:blank"
+        self.crashed = False
+        self.expired = False
+        self.quitted = False
+
+    def get(self, url):
+        if self.crashed:
+            raise WebDriverException("session perdue")
+        self.commands.append(("get", url))
+        # Session expirée : l'admin redirige vers le formulaire de login
+        self.current_url = "http://shop/admin/login" if self.expired and "/admin" in url else url
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def execute_script(self, script, *args):
+        if self.crashed:
+            raise WebDriverException("session perdue")
+        self.commands.append(("script", script))
+
+    def close(self):
+        self.window_handles.remove(self.current_handle)
+
+    def quit(self):
+        self.quitted = True
+
+
+class TestBrowserPool:
+    @pytest.fixture
+    def logins(self, monkeypatch):
+        calls = []
+
+        def fake_login(driver):
+            calls.append(driver)
+            driver.cookies = [{"name": "asid", "value": f"secret{len(calls)}"}]
+            driver.expired = False
+
+        monkeypatch.setattr(browser_pool, "login_to_admin", fake_login)
+        return calls
+
+    def test_login_only_once(self, logins):
+        pool = BrowserPool(FakeDriver, size=2)
+        first = pool.checkout()
+        second = pool.checkout()
+        assert logins == [first]
+        assert second.cookies == [{"name": "asid", "value": "secret1"}]
+        assert pool.cookies == first.cookies
+
+    def test_checkin_reuses_warm_browser(self, logins):
+        pool = BrowserPool(FakeDriver, size=2)
+        with pool.borrow() as driver:
+            driver.window_handles.append("popup")
+        with pool.borrow() as again:
+            pass
+        assert again is driver
+        assert driver.window_handles == ["main"]
+        assert driver.commands[-1] == ("get", "about:blank")
+        assert len(logins) == 1
+
+    def test_expired_session_logs_in_again_on_checkin(self, logins):
+        pool = BrowserPool(FakeDriver, size=2)
+        with pool.borrow() as driver:
+            driver.expired = True
+        assert logins == [driver, driver]
+        assert driver.commands[-1] == ("get", "about:blank")
+        assert pool.cookies == [{"name": "asid", "value": "secret2"}]
+        with pool.borrow() as again, pool.borrow() as fresh:
+            pass
+        assert again is driver and fresh.cookies == pool.cookies
+        assert len(logins) == 2
+
+    def test_crashed_browser_is_replaced(self, logins):
+        pool = BrowserPool(FakeDriver, size=1)
+        with pool.borrow() as driver:
+            driver.crashed = True
+        assert driver.quitted
+        with pool.borrow() as replacement:
+            assert replacement is not driver
+        assert len(logins) == 1
+
+    def test_close_quits_all(self, logins):
+        pool = BrowserPool(FakeDriver, size=2)
+        drivers = [pool.checkout(), pool.checkout()]
+        pool.close()
+        assert all(d.quitted for d in drivers)
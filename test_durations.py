@@ -0,0 +1,95 @@
+import json
+
+from utils import durations
+
+
+class TestDurationHistory:
+    def test_update_keeps_last_samples(self):
+        history = {"test_a": [1.0] * 10}
+        durations.update(history, {"test_a": 3.0, "test_b": 0.5}, size=10)
+        assert history["test_a"] == [1.0] * 9 + [3.0]
+        assert history["test_b"] == [0.5]
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "durations.json")
+        assert durations.load(path) == {}
+        durations.save({"test_a": [1.5]}, path)
+        assert durations.load(path) == {"test_a": [1.5]}
+        assert json.loads((tmp_path / "durations.json").read_text()) == {"test_a": [1.5]}
+
+    def test_estimates_use_median(self):
+        history = {"test_a": [1.0, 9.0, 2.0], "test_b": [4.0], "test_c": [6.0]}
+        estimated = durations.estimates(history, ["test_a", "test_b", "test_new"])
+        assert estimated == {"test_a": 2.0, "test_b": 4.0, "test_new": 4.0}
+
+    def test_empty_history_uses_default(self):
+        assert durations.estimates({}, ["test_a"]) == {"test_a": durations.DEFAULT_ESTIMATE}
+
+
+class TestSharding:
+    def test_longest_first_balances_shards(self):
+        estimated = {"login": 1, "login_ko": 1, "category": 4, "delete_category": 3,
+                     "product": 8, "delete_product": 3}
+        assigned = durations.shards(list(estimated), estimated, 2)
+        assert sorted(nodeid for shard in assigned for nodeid in shard) == sorted(estimated)
+        assert durations.makespan(assigned, estimated) == 10
+        assert assigned[0][0] == "product"  # Chaque shard commence par son test le plus long
+
+    def test_sharding_is_deterministic(self):
+        estimated = {f"test_{n}": 1.0 for n in range(10)}
+        first = durations.shards(list(estimated), estimated, 3)
+        assert durations.shards(list(reversed(list(estimated))), estimated, 3) == first
+        assert [len(shard) for shard in first] == [4, 3, 3]
+
+    def test_more_shards_than_tests(self):
+        assigned = durations.shards(["test_a"], {"test_a": 2.0}, 3)
+        assert assigned == [["test_a"], [], []]
+
+    def test_recorded_sums_phases_and_skips(self, monkeypatch):
+        monkeypatch.setattr(durations, "_durations", {})
+        monkeypatch.setattr(durations, "_skipped", set())
+        durations.record("test_x.py::test_phases", 0.25)
+        durations.record("test_x.py::test_phases", 1.0)
+        durations.record("test_x.py::test_skipped", 0.0, skipped=True)
+        recorded = durations.recorded()
+        assert recorded["test_x.py::test_phases"] == 1.25
+        assert "test_x.py::test_skipped" not in recorded
+
+
+class TestPartition:
+    NODEIDS = [f"test_{n}.py::test_{m}" for n in range(5) for m in range(6)]
+
+    def split(self, shared, count=3):
+        return [durations.partition(self.NODEIDS, shared, count)[index] for index in range(count)]
+
+    def assert_complete_and_disjoint(self, assigned):
+        selected = [nodeid for shard in assigned for nodeid in shard]
+        assert sorted(selected) == sorted(self.NODEIDS)
+
+    def test_nodes_with_different_local_histories_agree(self, tmp_path):
+        # Deux machines ont chacune mesuré leur shard : historiques locaux différents,
+        # mais le découpage ne lit que l'historique commun
+        first_local = {nodeid: [2.0] for nodeid in self.NODEIDS[:15]}
+        second_local = {nodeid: [0.5] for nodeid in self.NODEIDS[15:]}
+        for shared in ({}, durations.merge([first_local, second_local]), {self.NODEIDS[0]: [30.0]}):
+            on_first = durations.partition(self.NODEIDS, shared, 2)
+            on_second = durations.partition(list(reversed(self.NODEIDS)), shared, 2)
+            assert on_first == on_second
+            self.assert_complete_and_disjoint([on_first[0], on_second[1]])
+
+    def test_unknown_tests_are_hashed(self):
+        assigned = durations.partition(self.NODEIDS, {}, 3)
+        self.assert_complete_and_disjoint(assigned)
+        for index, shard in enumerate(assigned):
+            assert all(durations.stable_shard(nodeid, 3) == index for nodeid in shard)
+
+    def test_known_tests_are_balanced(self):
+        shared = {"test_a": [8.0], "test_b": [4.0], "test_c": [3.0], "test_d": [3.0], "test_e": [1.0]}
+        assigned = durations.partition(list(shared), shared, 2)
+        assert durations.makespan(assigned, durations.estimates(shared, shared)) == 10
+
+    def test_merge_and_fingerprint(self):
+        merged = durations.merge([{"test_a": [1.0, 2.0]}, {"test_a": [3.0], "test_b": [4.0]}], size=2)
+        assert merged == {"test_a": [2.0, 3.0], "test_b": [4.0]}
+        assert durations.fingerprint(merged) == durations.fingerprint(dict(reversed(list(merged.items()))))
+        assert durations.fingerprint(merged) != durations.fingerprint({"test_a": [2.0]})
@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from utils.admin_api import AdminApiClient
+from utils.ledger import ResourceLedger, sweep
+from utils.stub_server import StubEverShop
+
+
+class TestResourceLedger:
+    @pytest.fixture
+    def stub(self):
+        with StubEverShop() as server:
+            yield server
+
+    @pytest.fixture
+    def client(self, stub):
+        client = AdminApiClient(base_url=stub.url)
+        yield client
+        client.close()
+
+    def ledger(self, client, tmp_path, run_id="run1"):
+        return ResourceLedger(client, str(tmp_path), run_id=run_id, worker="main")
+
+    def test_register_is_persisted_immediately(self, client, tmp_path):
+        ledger = self.ledger(client, tmp_path)
+        ledger.product(sku="sku1")
+        with open(ledger.path) as source:
+            assert [json.loads(line)["key"] for line in source] == ["sku1"]
+        ledger.close()
+
+    def test_teardown_deletes_in_one_batch(self, stub, client, tmp_path):
+        ledger = self.ledger(client, tmp_path)
+        for n in range(5):
+            ledger.product(client.create_product(f"monstera {n}", f"sku{n}", f"plante{n}")["uuid"])
+        client.create_category("Catégorie Test 1", "categorie-test-1")
+        ledger.category(name="Catégorie Test 1")  # Créée par l'UI : uuid inconnu
+        ledger.category(name="Catégorie jamais créée")
+        already_deleted = client.create_product("monstera", "sku9", "plante9")["uuid"]
+        ledger.product(already_deleted)
+        client.delete_product(already_deleted)
+
+        assert ledger.teardown() == []
+        assert stub.store.products == {} and stub.store.categories == {}
+        ledger.close()
+        assert not os.path.exists(ledger.path)
+
+    def test_failures_stay_on_disk(self, stub, client, tmp_path):
+        ledger = self.ledger(client, tmp_path)
+        ledger.product(client.create_product("monstera", "sku1", "plante1")["uuid"])
+        # Session expirée et nouveau login refusé : suppressions en échec
+        stub.store.sessions.clear()
+        client._password = "wrongpassword"
+        remaining = ledger.teardown()
+        ledger.close()
+        assert len(remaining) == 1
+        with open(ledger.path) as source:
+            assert len(source.readlines()) == 1
+
+    def test_sweep_removes_orphans_but_not_live_ledgers(self, stub, client, tmp_path):
+        crashed = self.ledger(client, tmp_path, run_id="crashed")
+        crashed.product(client.create_product("monstera", "sku1", "plante1")["uuid"])
+        crashed._handle.close()  # Run planté : le verrou est relâché, le fichier reste
+        live = self.ledger(client, tmp_path, run_id="live")
+        live.product(client.create_product("monstera", "sku2", "plante2")["uuid"])
+
+        assert sweep(client, str(tmp_path)) == 1
+        assert [product["sku"] for product in stub.store.products.values()] == ["sku2"]
+        assert not os.path.exists(crashed.path)
+        assert os.path.exists(live.path)
+        live.teardown()
+        live.close()
+
+    def test_unknown_kind(self, client, tmp_path):
+        ledger = self.ledger(client, tmp_path)
+        with pytest.raises(KeyError):
+            ledger.register("customer", "uuid")
+        with pytest.raises(ValueError):
+            ledger.register("product")
+        ledger.close()
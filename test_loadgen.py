@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from utils import loadgen
+from utils.loadgen import OPERATIONS, LoadStats, run_load
+from utils.stub_server import StubEverShop
+
+
+class TestLoadStats:
+    def test_errors_are_counted_apart(self):
+        stats = LoadStats()
+        stats.started, stats.finished = 0.0, 2.0
+        stats.record("login", 0.1)
+        stats.record("login", 0.3, ok=False)
+        summary = stats.summary()["login"]
+        assert summary["count"] == 1
+        assert summary["errors"] == 1
+        assert summary["throughput"] == 0.5
+        assert "login" in stats.report()
+
+
+class TestRunLoad:
+    def test_scenario_against_stub(self):
+        with StubEverShop() as stub:
+            stats = asyncio.run(run_load(stub.url, users=3, duration=0.3, ramp_up=0.1))
+            assert stub.store.products == {}
+            assert stub.store.categories == {}
+        assert stats.errors == {}
+        summary = stats.summary()
+        assert set(summary) == set(OPERATIONS)
+        assert summary["login"]["count"] == 3
+        assert summary["create_product"]["count"] == summary["delete_product"]["count"] > 0
+
+    def test_failed_step_is_cleaned_up_and_the_user_goes_on(self, monkeypatch):
+        # Catégorie toujours refusée (400) : le produit du parcours est supprimé quand même
+        monkeypatch.setattr(loadgen, "category_payload", lambda name, url_key: {})
+        with StubEverShop() as stub:
+            stats = asyncio.run(run_load(stub.url, users=1, duration=0.5))
+            assert stub.store.products == {} and stub.store.categories == {}
+        summary = stats.summary()
+        assert stats.errors["create_category"] > 1 and set(stats.errors) == {"create_category"}
+        assert summary["delete_product"]["count"] == summary["create_product"]["count"]
+        assert "list_products" not in summary and "delete_category" not in summary
+
+    def test_failed_login_stops_user(self):
+        with StubEverShop() as stub:
+            stats = asyncio.run(run_load(stub.url, users=2, duration=0.2, password="wrongpassword"))
+        assert stats.errors == {"login": 2}
+        assert "create_product" not in stats.summary()
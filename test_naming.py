@@ -0,0 +1,21 @@
+from utils.naming import Namespace
+
+
+class TestNamespace:
+    def test_tokens_are_unique_within_a_worker(self):
+        namespace = Namespace(run_id="run1", worker="gw0")
+        tokens = {namespace.token() for _ in range(1000)}
+        assert len(tokens) == 1000
+
+    def test_workers_do_not_collide(self):
+        gw0 = Namespace(run_id="run1", worker="gw0")
+        gw1 = Namespace(run_id="run1", worker="gw1")
+        assert {gw0.sku() for _ in range(50)}.isdisjoint({gw1.sku() for _ in range(50)})
+
+    def test_runs_do_not_collide(self):
+        assert Namespace(run_id="run1", worker="main").sku() != Namespace(run_id="run2", worker="main").sku()
+
+    def test_token_is_url_key_safe(self):
+        token = Namespace(run_id="143015A3F1", worker="gw12").token()
+        assert token == token.lower()
+        assert token.replace("n", "").isalnum()
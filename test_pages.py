@@ -0,0 +1,256 @@
+import re
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from utils import config
+from utils.pages import CategoryFormPage, ProductFormPage, ProductGridPage, SaveFailed, xpath_literal
+from utils.waits import WaitBudget, use_budget
+
+
+class FakeElement:
+    def __init__(self, name):
+        self.name = name
+        self.clicks = 0
+
+    def click(self):
+        self.clicks += 1
+
+
+class ResolvingDriver:
+    """Faux WebDriver : résout chaque localisateur en un FakeElement"""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.commands = []
+
+    def get(self, url):
+        self.commands.append(("get", url))
+
+    def _resolve(self, locators):
+        return {name: None if name in self.missing else FakeElement(name) for name in locators}
+
+    def execute_async_script(self, script, kind, by, selector, text, locators, timeout):
+        self.commands.append(("wait", selector))
+        return {"ok": True, "element": None, "elements": self._resolve(locators)}
+
+    def execute_script(self, script, locators):
+        self.commands.append(("resolve",))
+        return self._resolve(locators)
+
+
+class TestPages:
+    @pytest.fixture(autouse=True)
+    def budget(self):
+        with use_budget(WaitBudget(5)):
+            yield
+
+    def test_open_resolves_every_field_in_one_call(self):
+        driver = ResolvingDriver()
+        page = ProductFormPage(driver).open()
+        for field in ("name", "sku", "price", "urlKey", "qty", "weight", "image"):
+            assert page[field].name == field
+        assert driver.commands == [("get", config.url("/admin/products/new")), ("wait", "input#name")]
+
+    def test_navigation_invalidates_cache(self):
+        driver = ResolvingDriver()
+        page = ProductFormPage(driver).open()
+        page.click("save")
+        page["name"]
+        assert driver.commands[-1] == ("resolve",)
+
+    def test_missing_element_raises(self):
+        page = ProductFormPage(ResolvingDriver(missing={"weight"})).open()
+        with pytest.raises(NoSuchElementException):
+            page["weight"]
+
+
+class FormDriver(ResolvingDriver):
+    """Faux WebDriver qui exécute le remplissage groupé"""
+
+    def execute_script(self, script, locators, values):
+        self.commands.append(("script", sorted(locators)))
+        if isinstance(values, dict):
+            return {"values": {name: str(value) for name, value in values.items()}}
+        return {"values": {name: "" for name in values}}
+
+
+class TestFormFill:
+    @pytest.fixture(autouse=True)
+    def budget(self):
+        with use_budget(WaitBudget(5)):
+            yield
+
+    def test_fill_is_a_single_command(self):
+        driver = FormDriver()
+        page = ProductFormPage(driver).open()
+        filled = page.fill({"name": "monstera deliciosa", "price": 30})
+        assert filled == {"name": "monstera deliciosa", "price": "30"}
+        assert driver.commands[-1] == ("script", ["name", "price"])
+        assert len(driver.commands) == 3
+
+    def test_unknown_field_is_rejected(self):
+        page = ProductFormPage(FormDriver()).open()
+        with pytest.raises(KeyError):
+            page.fill({"colour": "vert"})
+
+    def test_missing_field_raises(self):
+        driver = FormDriver()
+        driver.execute_script = lambda script, locators, values: {"missing": ["sku"]}
+        page = ProductFormPage(driver).open()
+        with pytest.raises(NoSuchElementException):
+            page.fill({"sku": "sku1"})
+
+
+class SaveDriver(ResolvingDriver):
+    """Faux WebDriver dont la page consigne les réponses de l'API"""
+
+    def __init__(self, *responses):
+        super().__init__()
+        self.responses = list(responses)  # (méthode, chemin, statut, corps) dans l'ordre d'arrivée
+        self.seq = 0
+
+    def execute_script(self, script, *args):
+        if args:
+            return super().execute_script(script, *args)
+        self.commands.append(("mark",))
+        return self.seq
+
+    def execute_async_script(self, script, *args):
+        if len(args) == 6:
+            return super().execute_async_script(script, *args)
+        methods, pattern, since, timeout = args
+        self.commands.append(("response", since))
+        for seq, (method, url, status, body) in enumerate(self.responses, 1):
+            if seq > since and method in methods and re.search(pattern, url):
+                return {"ok": True, "response": {"seq": seq, "method": method, "url": url,
+                                                 "status": status, "body": body, "at": 0}}
+        return {"ok": False}
+
+
+class TestSaveConfirmation:
+    @pytest.fixture(autouse=True)
+    def budget(self):
+        with use_budget(WaitBudget(5)):
+            yield
+
+    def test_returns_saved_entity(self):
+        driver = SaveDriver(("POST", "/api/images/catalog", 200, '{"data": {"files": []}}'),
+                            ("POST", "/api/products", 200, '{"data": {"uuid": "u1", "sku": "sku1"}}'))
+        page = ProductFormPage(driver).open()
+        assert page.save().wait_for_saved() == {"uuid": "u1", "sku": "sku1"}
+        assert ("mark",) in driver.commands
+
+    def test_only_responses_after_save_count(self):
+        driver = SaveDriver(("POST", "/api/categories", 200, '{"data": {"uuid": "old"}}'))
+        driver.seq = 1
+        page = CategoryFormPage(driver).open()
+        page.save()
+        driver.responses.append(("PATCH", "/api/categories/old", 200, '{"data": {"uuid": "new"}}'))
+        assert page.wait_for_saved() == {"uuid": "new"}
+        assert driver.commands[-1] == ("response", 1)
+
+    def test_error_status_fails_with_api_message(self):
+        driver = SaveDriver(("POST", "/api/products", 400, '{"error": {"message": "SKU already exists"}}'))
+        page = ProductFormPage(driver).open()
+        with pytest.raises(SaveFailed, match="HTTP 400 \\(SKU already exists\\)"):
+            page.save().wait_for_saved()
+
+    def test_unread_body_still_confirms_status(self):
+        driver = SaveDriver(("POST", "/api/products", 201, None))
+        assert ProductFormPage(driver).open().save().wait_for_saved() is None
+
+    def test_body_without_entity_is_not_mistaken_for_an_unread_body(self):
+        driver = SaveDriver(("POST", "/api/products", 200, '{"success": true}'))
+        assert ProductFormPage(driver).open().save().wait_for_saved() == {}
+
+
+def xpath_value(literal):
+    """Valeur d'un littéral XPath : '...', "..." ou concat(...)"""
+    return "".join(a or b for a, b in re.findall(r"'([^']*)'|\"([^\"]*)\"", literal))
+
+
+class GridDriver(ResolvingDriver):
+    """Faux WebDriver sur une grille de produits : filtre, tri et pagination par l'URL"""
+
+    def __init__(self, skus, filtering=True):
+        super().__init__()
+        self.skus = skus  # Du plus ancien au plus récent
+        self.filtering = filtering
+        self.rows = []
+
+    def get(self, url):
+        super().get(url)
+        query = {name: values[-1] for name, values in parse_qs(urlsplit(url).query).items()}
+        skus = list(self.skus)
+        if self.filtering and "sku" in query:
+            skus = [sku for sku in skus if query["sku"] in sku]
+        if query.get("od") == "desc":
+            skus.reverse()
+        page, limit = int(query.get("page", 1)), int(query.get("limit", 20))
+        self.rows = skus[(page - 1) * limit:page * limit]
+
+    def execute_script(self, script, *args):
+        if isinstance(args[0], dict):
+            return super().execute_script(script, *args)
+        key = xpath_value(re.search(r"text\(\)=(.+?)\]", args[0]).group(1))
+        self.commands.append(("row", key))
+        return {"row": FakeElement(key) if key in self.rows else None, "rows": len(self.rows)}
+
+    def navigations(self):
+        return [command[1] for command in self.commands if command[0] == "get"]
+
+
+class TestGridRowLookup:
+    @pytest.fixture(autouse=True)
+    def budget(self):
+        with use_budget(WaitBudget(5)):
+            yield
+
+    def catalog(self, size):
+        return [f"sku{n}" for n in range(size)]
+
+    def test_filtered_grid_is_one_navigation(self):
+        driver = GridDriver(self.catalog(100_000))
+        row = ProductGridPage(driver).row("sku99999")
+        assert row.name == "sku99999"
+        assert driver.navigations() == [config.url("/admin/products?ob=created_at&od=desc&limit=50&sku=sku99999")]
+
+    def test_row_on_current_page_needs_no_navigation(self):
+        driver = GridDriver(self.catalog(50))
+        grid = ProductGridPage(driver).search("sku7")
+        assert grid.row("sku7").name == "sku7"
+        assert len(driver.navigations()) == 1
+
+    def test_pages_through_broad_filter(self):
+        # "sku1" est contenu dans 1 111 SKU, dont sku1 lui-même, le plus ancien
+        driver = GridDriver(self.catalog(10_000))
+        with pytest.raises(NoSuchElementException, match="3 premières pages \\(recherche incomplète\\)"):
+            ProductGridPage(driver).row("sku1", max_pages=3)
+        assert len(driver.navigations()) == 3
+        assert driver.navigations()[-1].endswith("sku=sku1&page=3")
+
+    def test_scan_is_not_capped_by_default(self):
+        driver = GridDriver(self.catalog(5000), filtering=False)
+        assert ProductGridPage(driver).row("sku0").name == "sku0"
+        assert len(driver.navigations()) == 100
+
+    def test_key_with_quotes_is_an_xpath_literal(self):
+        driver = GridDriver(["l'olivier", "sku1"])
+        assert ProductGridPage(driver).row("l'olivier").name == "l'olivier"
+        assert xpath_literal("sku1") == "'sku1'"
+        assert xpath_literal("l'olivier") == '"l\'olivier"'
+        assert xpath_literal("""l'o"k""") == """concat('l', "'", 'o"k')"""
+        assert xpath_value(xpath_literal("""a'b"c'd""")) == """a'b"c'd"""
+
+    def test_ignored_filter_scans_newest_pages(self):
+        driver = GridDriver(self.catalog(1000), filtering=False)
+        assert ProductGridPage(driver).row("sku940").name == "sku940"
+        assert len(driver.navigations()) == 2
+
+    def test_scan_stops_at_last_page(self):
+        driver = GridDriver(self.catalog(120), filtering=False)
+        with pytest.raises(NoSuchElementException):
+            ProductGridPage(driver).row("inconnu")
+        assert len(driver.navigations()) == 3
@@ -0,0 +1,59 @@
+import json
+
+from selenium.common.exceptions import WebDriverException
+
+from utils import perf
+
+
+def metrics(route="/admin/products", **values):
+    base = {"route": route, "load": 1000, "lcp": 800, "long_tasks": 1, "heap_mb": 20}
+    base.update(values)
+    return base
+
+
+class TestPerfBudgets:
+    def test_within_budget(self):
+        assert perf.check(metrics(), perf.load_budgets()) == []
+
+    def test_over_budget(self):
+        violations = perf.check(metrics(load=9000, long_tasks=40), perf.load_budgets())
+        assert len(violations) == 2
+        assert all(v.startswith("/admin/products :") for v in violations)
+
+    def test_missing_budgeted_metric_is_a_violation(self):
+        assert perf.check(metrics(lcp=None), perf.load_budgets()) == ["/admin/products : lcp non mesuré (budget 3000)"]
+        assert perf.check(metrics(ttfb=None), perf.load_budgets()) == []  # Sans budget
+
+    def test_unknown_route_has_no_budget(self):
+        assert perf.check(metrics(route="/admin/settings", load=99999), perf.load_budgets()) == []
+
+    def test_budget_file_overrides_defaults(self, tmp_path):
+        path = tmp_path / "budgets.json"
+        path.write_text(json.dumps({"/admin/products": {"load": 500}, "/admin": {"load": 2000}}))
+        budgets = perf.load_budgets(str(path))
+        assert budgets["/admin/products"]["load"] == 500
+        assert budgets["/admin/products"]["lcp"] == perf.BUDGETS["/admin/products"]["lcp"]
+        assert budgets["/admin"] == {"load": 2000}
+
+
+class CollectDriver:
+    """Faux WebDriver : la page renvoie ses métriques une fois chargée, sans DevTools"""
+
+    def __init__(self):
+        self.scripts = []
+
+    def execute_async_script(self, script, *args):
+        self.scripts.append((script, args))
+        return {"load": 1000, "lcp": 800}
+
+    def execute_cdp_cmd(self, command, params):
+        raise WebDriverException("DevTools indisponible")
+
+
+def test_collect_waits_for_the_load_event():
+    driver = CollectDriver()
+    collected = perf.collect(driver, "/admin/products", timeout=2)
+    [(script, args)] = driver.scripts
+    assert "document.readyState === 'complete'" in script and "loadEventEnd > 0" in script
+    assert args == (2000,)
+    assert collected == {"load": 1000, "lcp": 800, "devtools": {}, "route": "/admin/products"}
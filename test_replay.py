@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+from utils import config
+from utils.admin_api import AdminApiClient
+from utils.replay import TrafficRecorder, browser_traffic, build_cassette, compare, run_all, shape, substitute
+from utils.stub_server import StubEverShop
+
+UUID = "3f2b8c1e-5a4d-4e6f-9b7a-1c2d3e4f5a6b"
+LITERALS = {"ns": "abc123main", "email": "admin@admin.com", "password": "admin777"}
+
+
+def interaction(at, method, url, status=200, body=None, response=None, request_type=None,
+                response_type="application/json"):
+    return {"at": at, "method": method, "url": url, "status": status, "body": body, "response": response,
+            "request_type": request_type, "response_type": response_type}
+
+
+class TestCassette:
+    def test_dynamic_values_are_parameterized(self):
+        cassette = build_cassette("test", [
+            interaction(3, "GET", f"http://shop/admin/products/edit/{UUID}", response_type="text/html"),
+            interaction(1, "POST", "http://shop/admin/user/login", request_type="application/json",
+                        body='{"email": "admin@admin.com", "password": "admin777"}', response='{"data": {}}'),
+            interaction(2, "POST", "http://shop/api/products", request_type="application/json",
+                        body='{"sku": "skuabc123mainn1"}', response=json.dumps({"data": {"uuid": UUID}})),
+            interaction(4, "GET", "http://shop/admin/products?sku=skuabc123mainn1&email=admin%40admin.com",
+                        response_type="text/html"),
+        ], LITERALS, authenticated=True)
+        login, create, edit, grid = cassette["steps"]
+        assert login["body"] == '{"email": "{{email}}", "password": "{{password}}"}'
+        assert create["body"] == '{"sku": "sku{{ns}}n1"}'
+        assert create["captures"] == {"uuid1": ["data", "uuid"]}
+        assert create["shape"] == {"data": {"uuid": "string"}}
+        assert edit["path"] == "/admin/products/edit/{{uuid1}}"
+        assert grid["path"] == "/admin/products?sku=sku{{ns}}n1&email={{email:url}}"
+
+    def test_multipart_body_is_replaced_by_test_image(self):
+        cassette = build_cassette("test", [interaction(
+            1, "POST", "http://shop/api/images/catalog", request_type="multipart/form-data; boundary=x",
+            body='--x\r\nContent-Disposition: form-data; name="photos"; filename="a.jpg"\r\n\r\n\xff\xd8')], {})
+        assert cassette["steps"][0]["upload"] == "photos"
+        assert "body" not in cassette["steps"][0]
+
+    def test_substitute(self):
+        values = {"ns": "r1", "email": "a@b.c"}
+        assert substitute("sku{{ns}}n1?e={{email:url}}", values) == "skur1n1?e=a%40b.c"
+        with pytest.raises(KeyError):
+            substitute("/api/products/{{uuid1}}", values)
+
+    def test_shape_comparison(self):
+        expected = shape({"data": {"uuid": UUID, "price": 30, "images": ["/a.jpg"], "parent": None}})
+        assert compare(expected, {"data": {"uuid": "x", "price": 12.5, "images": [], "parent": 4, "new": 1}}) == []
+        assert compare(expected, {"data": {"uuid": 1, "images": "/a.jpg", "parent": None}}) == [
+            "$.data.uuid : string attendu, number reçu",
+            "$.data.price : absent",
+            "$.data.images : liste attendue, string reçu",
+        ]
+
+
+class PerformanceLogDriver:
+    """Faux WebDriver : journal de performance et corps des réponses"""
+
+    def __init__(self, events, bodies):
+        self.entries = [{"timestamp": n, "message": json.dumps({"message": {"method": method, "params": params}})}
+                        for n, (method, params) in enumerate(events)]
+        self.bodies = bodies
+
+    def get_log(self, kind):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        return {"body": self.bodies[params["requestId"]], "base64Encoded": False}
+
+
+class TestBrowserTraffic:
+    def test_reads_documents_and_fetches_of_the_instance(self):
+        def sent(request_id, method, url, kind, **extra):
+            return ("Network.requestWillBeSent", dict(
+                requestId=request_id, type=kind, request={"method": method, "url": url, "headers": {}}, **extra))
+
+        def received(request_id, status, mime):
+            return ("Network.responseReceived", {"requestId": request_id,
+                                                 "response": {"status": status, "mimeType": mime}})
+
+        finished = lambda request_id: ("Network.loadingFinished", {"requestId": request_id})
+        driver = PerformanceLogDriver([
+            sent("1", "GET", "http://shop/admin", "Document"),
+            sent("1", "GET", "http://shop/admin/login", "Document",
+                 redirectResponse={"status": 302, "mimeType": "text/html"}),
+            received("1", 200, "text/html"), finished("1"),
+            sent("2", "GET", "http://shop/assets/logo.png", "Image"), received("2", 200, "image/png"), finished("2"),
+            sent("3", "GET", "http://cdn/lib.js", "Fetch"), received("3", 200, "text/javascript"), finished("3"),
+            sent("4", "POST", "http://shop/api/products", "Fetch"), received("4", 200, "application/json"),
+            finished("4"),
+            sent("5", "GET", "http://shop/admin/products", "XHR"), ("Network.loadingFailed", {"requestId": "5"}),
+        ], {"4": '{"data": {"uuid": "u1"}}'})
+        traffic = browser_traffic(driver, "http://shop")
+        assert [(item["method"], item["url"], item["status"]) for item in traffic] == [
+            ("GET", "http://shop/admin", 302),
+            ("GET", "http://shop/admin/login", 200),
+            ("POST", "http://shop/api/products", 200),
+        ]
+        assert traffic[-1]["response"] == '{"data": {"uuid": "u1"}}'
+        assert traffic[0]["response"] is None
+
+
+class TestRecordAndReplay:
+    @pytest.fixture
+    def stub(self):
+        with StubEverShop() as server:
+            yield server
+
+    @pytest.fixture
+    def cassette(self, stub, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "BASE_URL", stub.url)
+        recorder = TrafficRecorder(str(tmp_path))
+        client = AdminApiClient(base_url=stub.url)
+        client.session.hooks["response"].append(recorder.on_response)
+        recorder.start()
+        product = client.create_product("monstera", "skuabc123mainn1", "planteabc123mainn1")
+        client.page("/admin/products", sku="skuabc123mainn1")
+        client.delete_product(product["uuid"])
+        path = recorder.stop(None, "test_replay.py::flow", LITERALS)
+        client.close()
+        with open(path, encoding="utf-8") as source:
+            return json.load(source)
+
+    def test_recorded_flow(self, cassette):
+        assert [(step["method"], step["path"]) for step in cassette["steps"]] == [
+            ("POST", "/admin/user/login"),
+            ("POST", "/api/products"),
+            ("GET", "/admin/products?sku=sku{{ns}}n1"),
+            ("DELETE", "/api/products/{{uuid1}}"),
+        ]
+
+    def test_concurrent_replays_pass_and_clean_up(self, stub, cassette):
+        results = run_all([cassette], stub.url, concurrency=4, repeat=4)
+        assert [result.failures for result in results] == [[]] * 4
+        assert all(result.requests == 4 for result in results)
+        assert stub.store.products == {}
+
+    def test_shape_change_is_reported(self, stub, cassette):
+        cassette["steps"][1]["shape"]["data"]["barcode"] = "string"
+        cassette["steps"][3]["status"] = 204
+        [result] = run_all([cassette], stub.url)
+        assert result.failures == ["2. POST /api/products : $.data.barcode : absent",
+                                   "4. DELETE /api/products/{{uuid1}} : statut 200, 204 enregistré"]
+        assert stub.store.products == {}
+
+    def test_entities_left_by_a_partial_flow_are_removed(self, stub, cassette):
+        cassette["steps"] = cassette["steps"][:2]
+        [result] = run_all([cassette], stub.url)
+        assert result.ok
+        assert stub.store.products == {}
@@ -0,0 +1,134 @@
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import resources
+
+pytestmark = pytest.mark.skipif(not resources.available(), reason="psutil absent")
+
+# Un "navigateur" : un processus racine et un processus enfant qui occupe 50 Mo
+_TREE = """
+import subprocess, sys, time
+subprocess.Popen([sys.executable, "-c", "import time; block = bytearray(50 * 1024 * 1024); time.sleep(30)"])
+time.sleep(30)
+"""
+
+
+def record(browser, n, rss, test="t", cpu=20.0, worker="gw0"):
+    return {"run_id": "r", "worker": worker, "browser": browser, "browser_tests": n, "test": f"{test}{n}",
+            "rss_start_mb": rss, "rss_end_mb": rss, "rss_peak_mb": rss + 10, "cpu_percent": cpu, "processes": 3}
+
+
+class FakeProcess:
+    def __init__(self, name, cmdline=(), parents=(), children=(), pid=0):
+        self.pid = pid
+        self._name, self._cmdline = name, list(cmdline)
+        self._parents, self._children = list(parents), list(children)
+
+    def name(self):
+        return self._name
+
+    def cmdline(self):
+        return self._cmdline
+
+    def parents(self):
+        return self._parents
+
+    def children(self):
+        return self._children
+
+
+class TestResourceMonitor:
+    @pytest.fixture
+    def browser(self):
+        process = subprocess.Popen([sys.executable, "-c", _TREE])
+        time.sleep(1)
+        yield SimpleNamespace(service=SimpleNamespace(process=process))
+        for child in resources.psutil.Process(process.pid).children(recursive=True):
+            child.kill()
+        process.kill()
+        process.wait()
+
+    def test_samples_the_whole_process_tree(self, browser):
+        monitor = resources.ResourceMonitor(interval=0.05)
+        monitor.start(browser, "test_a")
+        time.sleep(0.3)
+        measured = monitor.stop()
+        assert measured["test"] == "test_a" and measured["browser_tests"] == 1
+        assert measured["processes"] == 2
+        assert measured["rss_peak_mb"] >= 50
+        assert measured["cpu_seconds"] >= 0
+        monitor.start(browser, "test_b")
+        assert monitor.stop()["browser_tests"] == 2
+        assert len(monitor.records) == 2
+
+    def test_test_without_browser_is_not_measured(self):
+        monitor = resources.ResourceMonitor()
+        monitor.start(None, "test_api")
+        assert monitor.stop() is None
+        assert monitor.records == []
+
+
+class TestAnalysis:
+    def test_growing_reused_browser_is_flagged(self):
+        records = [record(1, n, 300 + 12 * n) for n in range(1, 9)] + [record(2, n, 300) for n in range(1, 9)]
+        records += [record(3, n, 300 + 50 * n) for n in range(1, 3)]  # Trop peu de tests pour en juger
+        [trend] = resources.growth_trends(records, growth_mb_per_test=5, min_tests=5)
+        assert trend["browser"] == 1
+        assert trend["mb_per_test"] == pytest.approx(12)
+        assert trend["last_test"] == "t8"
+
+    def test_workers_are_bounded_by_memory_and_cpu(self):
+        records = [record(1, n, 490, cpu=50.0) for n in range(1, 5)]
+        # 500 Mo par navigateur, 2 navigateurs par worker : 8000 * 0.8 / 1000 = 6 workers
+        sizing = resources.suggest_workers(records, available_mb=8000, cpus=16, browsers_per_worker=2)
+        assert (sizing["workers"], sizing["by_memory"], sizing["by_cpu"]) == (6, 6, 12)
+        sizing = resources.suggest_workers(records, available_mb=64000, cpus=4, browsers_per_worker=2)
+        assert sizing["workers"] == 3
+
+    def test_report(self):
+        text = resources.report([record(1, n, 300 + 12 * n) for n in range(1, 6)])
+        assert "5 tests mesurés sur 1 navigateur(s)" in text
+        assert "+12.0 Mo par test" in text
+        assert "Workers conseillés" in text
+
+
+class TestOrphans:
+    def test_only_test_browsers_without_python_parent_are_orphans(self):
+        python = FakeProcess("python3")
+        init = FakeProcess("process_api")
+        profile = "--user-data-dir=/tmp/evershop-fast-headless-gw0-x1"
+        orphan_chrome = FakeProcess("chrome", ["chrome", profile], parents=[init])
+        live_chrome = FakeProcess("chrome", ["chrome", profile], parents=[FakeProcess("chromedriver"), python])
+        user_chrome = FakeProcess("chrome", ["chrome", "--user-data-dir=/home/me/.config"], parents=[init])
+        orphan_driver = FakeProcess("chromedriver", parents=[init], children=[orphan_chrome])
+        foreign_driver = FakeProcess("chromedriver", parents=[init], children=[user_chrome])
+        other = FakeProcess("bash", parents=[init])
+        found = resources.find_orphans([orphan_chrome, live_chrome, user_chrome, orphan_driver, foreign_driver,
+                                        other], drivers=set())
+        assert found == [orphan_chrome, orphan_driver]
+
+    def test_idle_unmarked_driver_is_left_alone_unless_registered(self):
+        init = FakeProcess("process_api")
+        # chromedriver inactif et sans parent Python : nœud Grid ou autre job de la machine
+        idle_driver = FakeProcess("chromedriver", ["chromedriver", "--port=4444"], parents=[init], pid=41)
+        our_driver = FakeProcess("chromedriver", ["chromedriver", "--port=9515"], parents=[init], pid=42)
+        assert resources.find_orphans([idle_driver, our_driver], drivers=set()) == []
+        assert resources.find_orphans([idle_driver, our_driver], drivers={42}) == [our_driver]
+
+    def test_registered_drivers(self, tmp_path):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            driver = SimpleNamespace(service=SimpleNamespace(process=process))
+            resources.register_driver(driver, str(tmp_path))
+            (tmp_path / "99999999.json").write_text('{"pid": 99999999, "create_time": 0}')
+            assert resources.registered_drivers(str(tmp_path)) == {process.pid}
+            assert sorted(path.name for path in tmp_path.iterdir()) == [f"{process.pid}.json"]
+        finally:
+            process.kill()
+            process.wait()
+        assert resources.registered_drivers(str(tmp_path)) == set()
+        assert list(tmp_path.iterdir()) == []
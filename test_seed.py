@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from utils.admin_api import AdminApiClient
+from utils.seed import Seeder, curve, measure_listings
+from utils.stub_server import StubEverShop
+
+
+class TestSeeder:
+    @pytest.fixture
+    def stub(self):
+        with StubEverShop() as server:
+            yield server
+
+    @pytest.fixture
+    def seeder(self, stub, tmp_path):
+        client = AdminApiClient(base_url=stub.url, pool_size=4)
+        yield Seeder(client, run_id="123456abcd", workers=4, batch_size=7, directory=str(tmp_path))
+        client.close()
+
+    def test_create_is_tagged_and_recorded(self, stub, seeder):
+        seeder.create(products=20, categories=5)
+        assert seeder.errors == []
+        assert len(stub.store.products) == 20 and len(stub.store.categories) == 5
+        skus = {product["sku"] for product in stub.store.products.values()}
+        assert skus == {f"seed123456abcd-{n}" for n in range(20)}
+        # Une seule image envoyée, partagée par tous les produits
+        assert len({tuple(product["images"]) for product in stub.store.products.values()}) == 1
+        with open(seeder.manifest_path) as manifest:
+            assert len(json.load(manifest)["products"]) == 20
+
+    def test_create_continues_numbering(self, stub, seeder):
+        seeder.create(products=3)
+        seeder.create(products=2)
+        assert seeder.products == 5
+        assert len({product["sku"] for product in stub.store.products.values()}) == 5
+
+    def test_teardown_from_manifest(self, stub, seeder, tmp_path):
+        seeder.create(products=10, categories=3)
+        # Un autre process reprend le run depuis le manifeste
+        resumed = Seeder(seeder.client, run_id="123456abcd", directory=str(tmp_path))
+        stub.store.products.pop(resumed.manifest["products"][0])  # Supprimé entre-temps
+        resumed.teardown()
+        assert stub.store.products == {} and stub.store.categories == {}
+        assert not (tmp_path / "seed-123456abcd.json").exists()
+
+    def test_measure_listings(self, seeder):
+        seeder.create(products=60, categories=2)
+        results = measure_listings(seeder, samples=2)
+        assert sorted(results) == sorted(f"{grid} {operation}" for grid in ("/admin/products", "/admin/categories")
+                                         for operation in ("list", "filter", "last page"))
+        assert all(timing["median"] > 0 for timing in results.values())
+
+    def test_curve(self, stub, seeder, tmp_path, capsys):
+        output = tmp_path / "curve.txt"
+        rows = curve(seeder, [30, 10], category_ratio=0.1, samples=1, output=str(output))
+        assert [row["size"] for row in rows] == [10] * 6 + [30] * 6
+        assert len(stub.store.products) == 30 and len(stub.store.categories) == 3
+        assert len(output.read_text().splitlines()) == 12
@@ -0,0 +1,96 @@
+import pytest
+import requests
+
+from utils import config, storefront
+from utils.admin_api import AdminApiClient
+from utils.naming import Namespace
+from utils.stub_server import StubEverShop
+
+
+def measured(kind, seconds, run_id="r1", visible=True, attempts=3):
+    return {"run_id": run_id, "worker": "main", "test": "t", "kind": kind, "url": "/x", "visible": visible,
+            "time_to_visible": seconds if visible else None, "attempts": attempts, "statuses": {},
+            "cold_ms": 40.0 if visible else None, "warm_ms": [10.0, 12.0] if visible else []}
+
+
+class TestPropagationProbe:
+    @pytest.fixture
+    def stub(self, monkeypatch):
+        with StubEverShop(propagation=0.3) as server:
+            monkeypatch.setattr(config, "BASE_URL", server.url)
+            yield server
+
+    @pytest.fixture
+    def client(self, stub):
+        client = AdminApiClient(base_url=stub.url)
+        yield client
+        client.close()
+
+    def test_product_page_is_polled_until_it_shows_the_product(self, client):
+        client.create_product("monstera deliciosa", "skuvitrine1", "plantevitrine1")
+        probe = storefront.PropagationProbe(warm_samples=3)
+        record = probe.product("plantevitrine1", "monstera deliciosa")
+        assert record["visible"]
+        assert 0.3 <= record["time_to_visible"] < 2
+        assert record["attempts"] > 1 and record["statuses"]["404"] == record["attempts"] - 1
+        assert len(record["warm_ms"]) == 3
+        assert probe.records == [record]
+
+    def test_page_never_shown_is_reported_invisible(self, stub):
+        probe = storefront.PropagationProbe(timeout=0.3)
+        record = probe.category("inconnue", "Inconnue")
+        assert not record["visible"]
+        assert record["time_to_visible"] is None and record["warm_ms"] == []
+        assert record["statuses"] == {"404": record["attempts"]}
+
+    def test_history_delays_the_first_poll(self, client):
+        probe = storefront.PropagationProbe(history=[measured("product", 0.5), measured("product", 0.7),
+                                                     measured("category", 0.1), measured("product", 0, visible=False)])
+        assert probe.expected("product") == pytest.approx(0.6)
+        assert probe.expected("product_in_category") is None
+        client.create_product("monstera deliciosa", "skuvitrine2", "plantevitrine2")
+        record = probe.product("plantevitrine2", "monstera deliciosa")
+        # Premier sondage à la moitié du délai habituel, soit 0.3s : la page est déjà visible
+        assert record["visible"] and record["attempts"] == 1
+
+    def test_probe_once_measures_three_pages_and_cleans_up(self, stub, client):
+        probe = storefront.PropagationProbe()
+        records = storefront.probe_once(client, probe, Namespace("abc123", "main"))
+        assert [record["kind"] for record in records] == list(storefront.KINDS)
+        assert all(record["visible"] for record in records)
+        assert stub.store.products == {} and stub.store.categories == {}
+
+    def test_flush_appends_to_the_history(self, client, tmp_path):
+        path = str(tmp_path / "storefront.txt")
+        for run in range(2):
+            probe = storefront.PropagationProbe(warm_samples=0, history=storefront.load(path))
+            client.create_product("monstera deliciosa", f"skuvitrine{run}", f"plantevitrine{run}")
+            probe.product(f"plantevitrine{run}", "monstera deliciosa")
+            probe.flush(path)
+            assert probe.records == []
+        assert len(storefront.load(path)) == 2
+
+
+class TestStubStorefront:
+    def test_category_page_lists_its_products(self):
+        with StubEverShop() as stub:
+            client = AdminApiClient(base_url=stub.url)
+            category = client.create_category("Plantes d'intérieur", "plantes-interieur")
+            client.create_product("monstera deliciosa", "sku1", "monstera", category_id=category["category_id"])
+            client.create_product("ficus", "sku2", "ficus")
+            page = requests.get(f"{stub.url}/plantes-interieur").text
+            client.close()
+        assert storefront.shows(page, "Plantes d'intérieur")
+        assert "monstera deliciosa" in page and "ficus" not in page
+
+
+def test_report():
+    text = storefront.report([measured("product", 0.2), measured("product", 0.4, run_id="r2"),
+                              measured("product", None, visible=False, attempts=9),
+                              measured("category", 1.0)])
+    assert "product : 2/3 visibles sur 2 run(s)" in text
+    assert "propagation (ms) p50 200 p95 400 max 400" in text
+    assert "sondages         p50 3 p95 9 max 9" in text
+    assert "category : 1/1 visibles sur 1 run(s)" in text
+    assert "product_in_category" not in text
+    assert storefront.report([]) == "Aucune mesure de la vitrine"
@@ -0,0 +1,126 @@
+import re
+import time
+
+import pytest
+import requests
+
+from utils import config
+from utils.admin_api import AdminApiClient
+from utils.pages import CategoryFormPage, CategoryGridPage, LoginPage, ProductFormPage
+from utils.stub_server import StubEverShop
+
+
+def css_to_regex(selector):
+    """Traduit les sélecteurs simples des page objects (tag, tag#id, tag[attr='v'], tag.a.b)"""
+    tag, rest = re.match(r"(\w*)(.*)", selector).groups()
+    if rest.startswith("#"):
+        return rf'<{tag}[^>]*id="{rest[1:]}"'
+    if rest.startswith("["):
+        name, value = re.match(r"\[(\w+)='([^']*)'\]", rest).groups()
+        return rf'<{tag}[^>]*{name}="{value}"'
+    if rest.startswith("."):
+        return rf'<{tag}[^>]*class="{" ".join(rest.strip(".").split("."))}"'
+    return rf"<{tag}[\s>]"
+
+
+class TestStubPages:
+    @pytest.fixture
+    def stub(self):
+        with StubEverShop() as server:
+            yield server
+
+    @pytest.fixture
+    def session(self, stub):
+        session = requests.Session()
+        response = session.post(f"{stub.url}/admin/user/login",
+                                json={"email": config.ADMIN_EMAIL, "password": config.ADMIN_PASSWORD})
+        assert response.status_code == 200
+        yield session
+        session.close()
+
+    def test_admin_redirects_to_login(self, stub):
+        response = requests.get(f"{stub.url}/admin/products", allow_redirects=False)
+        assert response.status_code == 302
+        assert response.headers["Location"] == LoginPage.PATH
+
+    def test_login_page_has_no_heading(self, stub):
+        page = requests.get(stub.url + LoginPage.PATH).text
+        for by, selector in LoginPage.LOCATORS.values():
+            assert re.search(css_to_regex(selector) if by == "css selector" else rf'name="{selector}"', page)
+        assert "page-heading-title" not in page
+
+    def test_dashboard_heading(self, stub, session):
+        page = session.get(f"{stub.url}/admin").text
+        assert '<h1 class="page-heading-title">Dashboard</h1>' in page
+
+    @pytest.mark.parametrize("page_class", [ProductFormPage, CategoryFormPage, CategoryGridPage],
+                             ids=lambda page_class: page_class.__name__)
+    def test_page_selectors(self, stub, session, page_class):
+        page = session.get(stub.url + page_class.PATH).text
+        for name, (by, selector) in page_class.LOCATORS.items():
+            assert re.search(css_to_regex(selector), page), f"{name} ({selector}) absent"
+        assert "page-heading-title" in page
+
+    def test_grid_rows(self, stub, session):
+        client = AdminApiClient(base_url=stub.url)
+        product = client.create_product("monstera deliciosa", "sku12345", "plante12345")
+        client.create_category("Catégorie Test 1", "categorie-test-1")
+        products = session.get(f"{stub.url}/admin/products").text
+        assert f'<input type="checkbox" value="{product["uuid"]}">' in products
+        assert "<td>sku12345</td>" in products
+        assert '<span>Delete</span>' in products and 'class="button critical"' in products
+        categories = session.get(f"{stub.url}/admin/categories").text
+        assert re.search(r'<td><a href="/admin/categories/edit/[^"]+">Catégorie Test 1</a></td>', categories)
+        client.close()
+
+    def test_edit_page_and_patch(self, stub, session):
+        client = AdminApiClient(base_url=stub.url)
+        product = client.create_product("monstera deliciosa", "sku12345", "plante12345",
+                                        images=["/assets/catalog/monstera.jpg"])
+        client.request("PATCH", f"/api/products/{product['uuid']}", json={"price": "42"})
+        page = session.get(f"{stub.url}/admin/products/edit/{product['uuid']}").text
+        assert 'id="price" name="price" data-field="price" value="42"' in page
+        assert 'class="product-image"' in page
+        assert session.get(f"{stub.url}/admin/products/edit/inconnu").status_code == 404
+        client.close()
+
+    def test_latency(self, stub):
+        stub.latency = 0.1
+        start = time.monotonic()
+        requests.get(stub.url + LoginPage.PATH)
+        assert time.monotonic() - start >= 0.1
+
+
+class TestStubListing:
+    @pytest.fixture
+    def stub(self):
+        with StubEverShop() as server:
+            client = AdminApiClient(base_url=server.url)
+            for n in range(1, 46):
+                client.create_product(f"monstera {n}", f"sku{n:03d}", f"plante{n}")
+            client.close()
+            yield server
+
+    @pytest.fixture
+    def session(self, stub):
+        session = requests.Session()
+        session.post(f"{stub.url}/admin/user/login",
+                     json={"email": config.ADMIN_EMAIL, "password": config.ADMIN_PASSWORD})
+        yield session
+        session.close()
+
+    def skus(self, session, stub, **query):
+        page = session.get(f"{stub.url}/admin/products", params=query).text
+        return re.findall(r"<td>(sku\d+)</td>", page)
+
+    def test_default_page(self, stub, session):
+        assert self.skus(session, stub) == [f"sku{n:03d}" for n in range(1, 21)]
+
+    def test_filter(self, stub, session):
+        assert self.skus(session, stub, sku="sku042") == ["sku042"]
+        assert self.skus(session, stub, keyword="MONSTERA 4") == ["sku004"] + [f"sku{n:03d}" for n in range(40, 46)]
+
+    def test_sort_and_pages(self, stub, session):
+        assert self.skus(session, stub, ob="created_at", od="desc", limit=5) == \
+            ["sku045", "sku044", "sku043", "sku042", "sku041"]
+        assert self.skus(session, stub, page=3, limit=20) == [f"sku{n:03d}" for n in range(41, 46)]
@@ -0,0 +1,145 @@
+import struct
+import time
+import zlib
+
+import pytest
+import requests
+
+from utils import upload_bench
+from utils.admin_api import AdminApiClient
+from utils.ledger import ResourceLedger
+from utils.stub_server import StubEverShop
+from utils.waits import WaitTimeout
+
+
+class TestImageGeneration:
+    def test_png_is_valid(self):
+        data = upload_bench.png_bytes(8, 4, fill="noise")
+        assert data.startswith(b"\x89PNG\r\n\x1a\n")
+        width, height = struct.unpack(">II", data[16:24])
+        assert (width, height) == (8, 4)
+        idat_length = struct.unpack(">I", data[33:37])[0]
+        assert data[37:41] == b"IDAT"
+        assert len(zlib.decompress(data[41:41 + idat_length])) == 4 * (1 + 8 * 3)
+
+    def test_noise_is_larger_than_flat(self):
+        assert len(upload_bench.png_bytes(200, 200, "noise")) > 50 * len(upload_bench.png_bytes(200, 200, "flat"))
+
+    def test_matrix_is_sorted_by_size(self, tmp_path):
+        specs = upload_bench.generate_matrix(str(tmp_path), [(64, 64), (256, 128)], ["png"])
+        assert len(specs) == 4
+        assert [spec.bytes for spec in specs] == sorted(spec.bytes for spec in specs)
+        assert all(open(spec.path, "rb").read(4) == b"\x89PNG" for spec in specs)
+
+    def test_other_formats_need_pillow(self, monkeypatch):
+        monkeypatch.setattr(upload_bench, "Image", None)
+        assert upload_bench.available_formats() == ("png",)
+        with pytest.raises(RuntimeError):
+            upload_bench.image_bytes("jpeg", 8, 8)
+
+
+class TestHttpUpload:
+    def test_upload_matrix_against_stub(self, tmp_path):
+        specs = upload_bench.generate_matrix(str(tmp_path / "images"), [(32, 32), (400, 300)], ["png"])
+        with StubEverShop() as stub:
+            client = AdminApiClient(base_url=stub.url, pool_size=2)
+            ledger = ResourceLedger(client, str(tmp_path / "ledger"), run_id="run1", worker="main")
+            results = upload_bench.run_http(client, specs, repeat=2, concurrency=2, ledger=ledger)
+            stored = sorted(len(content) for content in stub.store.media.values())
+            assert ledger.teardown() == []
+            ledger.close()
+            client.close()
+            assert stub.store.media == {}
+        assert stored == sorted(spec.bytes for spec in specs for _ in range(2))
+        assert all(r["visible_seconds"] >= r["upload_seconds"] > 0 for r in results)
+        rows, scaling = upload_bench.summarize(results)
+        assert [row["bytes"] for row in rows] == sorted(spec.bytes for spec in specs)
+        assert set(scaling) == {"http"}
+        assert "http :" in upload_bench.report(results)
+
+    def test_api_error_is_recorded(self, tmp_path):
+        [spec] = upload_bench.generate_matrix(str(tmp_path), [(32, 32)], ["png"], ["flat"])
+        with StubEverShop() as stub:
+            client = AdminApiClient(base_url=stub.url, password="wrongpassword")
+            [result] = upload_bench.run_http(client, [spec], repeat=1)
+            client.close()
+        assert result["error"] and result["upload_seconds"] is None
+        assert upload_bench.report([result]).splitlines()[1].split()[-1] == "1"  # Colonne err
+
+    def test_polling_error_is_recorded(self, tmp_path, monkeypatch):
+        [spec] = upload_bench.generate_matrix(str(tmp_path), [(32, 32)], ["png"], ["flat"])
+        with StubEverShop() as stub:
+            client = AdminApiClient(base_url=stub.url)
+
+            def unreachable(url, **kwargs):
+                raise requests.ConnectionError("connexion refusée")
+
+            monkeypatch.setattr(client.session, "get", unreachable)
+            [result] = upload_bench.run_http(client, [spec], repeat=1)
+            client.close()
+        assert result["error"] == "connexion refusée"
+        assert result["upload_seconds"] > 0 and result["visible_seconds"] is None
+
+    def test_concurrency_is_refused_in_ui_mode(self, capsys):
+        with pytest.raises(SystemExit):
+            upload_bench.main(["ui", "--concurrency", "4"])
+        assert "mode http" in capsys.readouterr().err
+
+
+class FakeFormPage:
+    """Formulaire produit : la vignette s'affiche 50ms après la réponse de l'API"""
+
+    delay = 0.05
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def open(self):
+        return self
+
+    def upload_image(self, path):
+        if self.driver.status is None:
+            raise WaitTimeout("loaded xpath=vignette : condition non remplie")
+        self.driver.response_at = self.driver.execute_script("return Date.now();") + 20
+        time.sleep(self.delay)
+
+
+class FakeDriver:
+    def __init__(self, status=200):
+        self.status = status
+        self.response_at = None
+
+    def execute_script(self, script):
+        return time.time() * 1000
+
+
+class TestUiUpload:
+    @pytest.fixture
+    def spec(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(upload_bench, "ProductFormPage", FakeFormPage)
+        monkeypatch.setattr(upload_bench, "response_mark", lambda driver: 0)
+        monkeypatch.setattr(upload_bench, "wait_for_response", lambda driver, methods, pattern, since: {
+            "method": "POST", "url": "/api/images/catalog", "status": driver.status, "at": driver.response_at,
+            "body": {"data": {"files": [{"url": "/assets/catalog/a.png"}]}}})
+        return upload_bench.generate_matrix(str(tmp_path), [(32, 32)], ["png"], ["flat"])[0]
+
+    def test_api_response_is_timed_apart_from_the_thumbnail(self, spec):
+        result = upload_bench.upload_ui(FakeDriver(), spec)
+        assert result["error"] is None
+        assert result["upload_seconds"] == pytest.approx(0.02, abs=0.01)
+        assert result["visible_seconds"] >= 0.05
+
+    def test_uploaded_image_is_registered_for_cleanup(self, spec):
+        registered = []
+        ledger = type("FakeLedger", (), {"media": lambda self, url: registered.append(url)})()
+        upload_bench.upload_ui(FakeDriver(), spec, ledger)
+        upload_bench.upload_ui(FakeDriver(500), spec, ledger)
+        assert registered == ["/assets/catalog/a.png"]
+
+    def test_failures_are_recorded_without_stopping(self, spec):
+        results = [upload_bench.upload_ui(FakeDriver(status), spec) for status in (None, 500, 200)]
+        assert "condition non remplie" in results[0]["error"]
+        assert results[1]["error"] == "/api/images/catalog : HTTP 500"
+        [row], _ = upload_bench.summarize(results)
+        assert (row["samples"], row["errors"]) == (1, 2)
+        assert row["upload_seconds"] == results[2]["upload_seconds"]
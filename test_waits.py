@@ -0,0 +1,65 @@
+import pytest
+from selenium.common.exceptions import JavascriptException
+from selenium.webdriver.common.by import By
+
+from utils.waits import WaitBudget, WaitTimeout, use_budget, wait_for, wait_until_gone
+
+
+class ScriptedDriver:
+    """Faux WebDriver : renvoie les résultats prévus pour chaque script asynchrone"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def execute_async_script(self, script, *args):
+        self.calls.append(args)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestWaits:
+    def test_returns_element_and_records_wait(self):
+        driver = ScriptedDriver({"ok": True, "element": "el"})
+        with use_budget(WaitBudget(5)) as budget:
+            assert wait_for(driver, By.NAME, "email") == "el"
+        assert driver.calls[0][:3] == ("present", "css", '[name="email"]')
+        assert len(budget.records) == 1
+        assert budget.records[0][2] is True
+
+    def test_timeout_is_capped_by_budget(self):
+        driver = ScriptedDriver({"ok": False})
+        with use_budget(WaitBudget(2)):
+            with pytest.raises(WaitTimeout):
+                wait_for(driver, By.CSS_SELECTOR, "table", timeout=60)
+        assert driver.calls[0][-1] <= 2000
+
+    def test_exhausted_budget_fails_without_browser_call(self):
+        driver = ScriptedDriver()
+        with use_budget(WaitBudget(0)):
+            with pytest.raises(WaitTimeout):
+                wait_until_gone(driver, By.XPATH, "//table")
+        assert driver.calls == []
+
+    def test_only_waiting_time_is_charged(self):
+        budget = WaitBudget(5)
+        budget.record("present css=table", 1.5, True)
+        budget.record("gone css=.spinner", 2.0, False)
+        assert budget.remaining() == pytest.approx(1.5)
+        budget.record("visible css=.toast", 3.0, False)
+        assert budget.remaining() == 0.0
+
+    def test_retries_after_navigation(self):
+        driver = ScriptedDriver(JavascriptException("javascript error: document unloaded while waiting for result"),
+                                {"ok": True, "element": "heading"})
+        with use_budget(WaitBudget(5)):
+            assert wait_for(driver, By.CSS_SELECTOR, "h1.page-heading-title") == "heading"
+        assert len(driver.calls) == 2
+
+    def test_other_script_errors_propagate(self):
+        driver = ScriptedDriver(JavascriptException("javascript error: boom"))
+        with use_budget(WaitBudget(5)):
+            with pytest.raises(JavascriptException):
+                wait_for(driver, By.CSS_SELECTOR, "table")
@@ -0,0 +1 @@
+"""Outils partagés par les tests end-to-end de l'admin EverShop"""
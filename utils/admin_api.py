@@ -0,0 +1,220 @@
+"""Client HTTP de l'API admin EverShop
+
+Sert à préparer et nettoyer les données des tests sans passer par l'UI :
+une suppression coûte une requête au lieu d'une demi-douzaine d'allers-retours
+navigateur sur la grille. Les connexions sont gardées ouvertes (keep-alive) et
+la session admin est réutilisée, soit depuis les cookies du pool de
+navigateurs, soit via un login HTTP.
+"""
+import mimetypes
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import config
+from utils.bench import step
+
+LOGIN_PATH = "/admin/user/login"
+ADMIN_LOGIN_PAGE = "/admin/login"
+PRODUCTS_PATH = "/api/products"
+CATEGORIES_PATH = "/api/categories"
+IMAGES_PATH = "/api/images"
+FILES_PATH = "/api/files"
+MEDIA_PATH = "/assets"  # URL publique des images envoyées
+GRAPHQL_PATH = "/api/admin/graphql"
+
+SESSION_COOKIE = "asid"
+
+_EDIT_URL = re.compile(r"/admin/(?:products|categories)/edit/([0-9a-fA-F-]{8,})")
+
+_FIND_PRODUCT = """
+query FindProduct($filters: [FilterInput]) {
+  products(filters: $filters) { items { uuid sku name } }
+}
+"""
+
+_FIND_CATEGORY = """
+query FindCategory($filters: [FilterInput]) {
+  categories(filters: $filters) { items { uuid name } }
+}
+"""
+
+
+class AdminApiError(Exception):
+    """Réponse inattendue de l'API admin"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.body = response.text[:500]
+        super().__init__(f"{response.request.method} {response.url} -> {response.status_code}: {self.body}")
+
+
+def product_payload(name, sku, url_key, price=30, qty=10, weight=1.5, images=(), **extra):
+    """Corps JSON de création d'un produit simple, visible et en stock"""
+    payload = {
+        "name": name,
+        "sku": sku,
+        "url_key": url_key,
+        "price": price,
+        "qty": qty,
+        "weight": weight,
+        "status": 1,
+        "visibility": 1,
+        "manage_stock": 1,
+        "stock_availability": 1,
+        "group_id": 1,
+        "images": list(images),
+    }
+    payload.update(extra)
+    return payload
+
+
+def category_payload(name, url_key, **extra):
+    """Corps JSON de création d'une catégorie active et visible dans le menu"""
+    payload = {"name": name, "url_key": url_key, "status": 1, "include_in_nav": 1}
+    payload.update(extra)
+    return payload
+
+
+def uuid_from_edit_url(url):
+    """Extrait l'uuid d'une URL /admin/products/edit/<uuid> ou /admin/categories/edit/<uuid>"""
+    match = _EDIT_URL.search(url)
+    return match.group(1) if match else None
+
+
+class AdminApiClient:
+    """Client de l'API admin avec pool de connexions keep-alive"""
+
+    def __init__(self, base_url=None, cookies=None, email=config.ADMIN_EMAIL,
+                 password=config.ADMIN_PASSWORD, pool_size=10, timeout=10):
+        self.base_url = (base_url or config.BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self._email = email
+        self._password = password
+        self._login_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if cookies:
+            self.use_cookies(cookies)
+
+    @property
+    def authenticated(self):
+        return SESSION_COOKIE in self.session.cookies
+
+    def use_cookies(self, cookies):
+        """Réutilise les cookies d'une session admin ouverte dans un navigateur"""
+        # Pas de domaine : cookielib refuse les domaines sans point comme "localhost"
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"], path=cookie.get("path", "/"))
+
+    def login(self):
+        """Ouvre une session admin via l'endpoint de login JSON"""
+        response = self.session.post(self._url(LOGIN_PATH), timeout=self.timeout,
+                                     json={"email": self._email, "password": self._password})
+        if response.status_code != 200 or not self.authenticated:
+            raise AdminApiError(response)
+
+    def request(self, method, path, **kwargs):
+        """Requête authentifiée ; renvoie le champ data de la réponse JSON"""
+        response = self._send(method, path, **kwargs)
+        if not response.content:
+            return None
+        return response.json().get("data")
+
+    def page(self, path, **params):
+        """Page HTML de l'admin (grille de listing par exemple) ; renvoie son contenu"""
+        return self._send("GET", path, params=params, allow_redirects=False).text
+
+    @step("api_create")
+    def create_product(self, name, sku, url_key, **fields):
+        return self.request("POST", PRODUCTS_PATH, json=product_payload(name, sku, url_key, **fields))
+
+    @step("api_delete")
+    def delete_product(self, uuid):
+        return self.request("DELETE", f"{PRODUCTS_PATH}/{uuid}")
+
+    def find_product(self, sku):
+        """Produit correspondant exactement au SKU, ou None"""
+        items = self._query(_FIND_PRODUCT, "products", "sku", sku)
+        return next((item for item in items if item["sku"] == sku), None)
+
+    @step("api_create")
+    def create_category(self, name, url_key, **fields):
+        return self.request("POST", CATEGORIES_PATH, json=category_payload(name, url_key, **fields))
+
+    @step("api_delete")
+    def delete_category(self, uuid):
+        return self.request("DELETE", f"{CATEGORIES_PATH}/{uuid}")
+
+    def find_category(self, name):
+        """Catégorie correspondant exactement au nom, ou None"""
+        items = self._query(_FIND_CATEGORY, "categories", "name", name)
+        return next((item for item in items if item["name"] == name), None)
+
+    def upload_image(self, path, destination="catalog"):
+        """Envoie une image dans le média EverShop ; renvoie son URL"""
+        mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        with open(path, "rb") as image:
+            data = self.request("POST", f"{IMAGES_PATH}/{destination}",
+                                files={"images": (os.path.basename(path), image, mime)})
+        return data["files"][0]["url"]
+
+    @step("api_delete")
+    def delete_image(self, url):
+        """Supprime une image envoyée, désignée par l'URL renvoyée à l'envoi"""
+        path = urlsplit(url).path
+        if path.startswith(MEDIA_PATH + "/"):
+            path = path[len(MEDIA_PATH) + 1:]
+        return self.request("DELETE", f"{FILES_PATH}/{path.lstrip('/')}")
+
+    def close(self):
+        self.session.close()
+
+    def _query(self, query, root, key, value):
+        variables = {"filters": [{"key": key, "operation": "eq", "value": value}]}
+        data = self.request("POST", GRAPHQL_PATH, json={"query": query, "variables": variables})
+        return data[root]["items"]
+
+    def _send(self, method, path, **kwargs):
+        if not self.authenticated:
+            with self._login_lock:
+                if not self.authenticated:
+                    self.login()
+        kwargs.setdefault("timeout", self.timeout)
+        used = self._session_id()
+        response = self.session.request(method, self._url(path), **kwargs)
+        if _session_expired(response):
+            # Session expirée (ou cookies du pool invalidés) : un seul nouveau login, puis on rejoue
+            with self._login_lock:
+                if self._session_id() == used:
+                    self._forget_session()
+                    self.login()
+            for _, image, *_ in (kwargs.get("files") or {}).values():
+                image.seek(0)
+            response = self.session.request(method, self._url(path), **kwargs)
+        if response.status_code >= 300:
+            raise AdminApiError(response)
+        return response
+
+    def _url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _session_id(self):
+        return next((cookie.value for cookie in self.session.cookies if cookie.name == SESSION_COOKIE), None)
+
+    def _forget_session(self):
+        for cookie in [cookie for cookie in self.session.cookies if cookie.name == SESSION_COOKIE]:
+            self.session.cookies.clear(cookie.domain, cookie.path, cookie.name)
+
+
+def _session_expired(response):
+    """401 de l'API, ou redirection d'une page admin vers le formulaire de login"""
+    if response.status_code == 401:
+        return True
+    return response.is_redirect and ADMIN_LOGIN_PAGE in response.headers.get("Location", "")
@@ -0,0 +1,136 @@
+"""Artefacts des tests en échec (capture d'écran, DOM, console, réseau)
+
+Au lieu d'imprimer driver.page_source dans la sortie, un test en échec
+laisse un dossier artifacts/<run>/<test>/ contenant :
+
+* screenshot.png : capture d'écran ;
+* dom.html.gz : DOM compressé, tronqué à max_dom_bytes dans la page même ;
+* console.json : derniers messages de la console du navigateur ;
+* network.json : dernières requêtes vues par la page (Resource Timing).
+
+Seule la lecture dans le navigateur se fait dans le thread du test (un
+navigateur ne se pilote pas depuis deux threads, et la page doit être lue
+avant que le pool ne la nettoie) : deux commandes groupées. La compression
+et l'écriture se font dans un thread d'arrière-plan. Seuls les keep_runs
+derniers runs sont conservés.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import WebDriverException
+
+from utils.naming import current_run_id
+
+DEFAULT_ROOT = "artifacts"
+
+# DOM et entrées réseau lus en une seule commande
+_SNAPSHOT_SCRIPT = """
+const [limit, maxDom] = arguments;
+const entries = performance.getEntriesByType('resource').slice(-limit).map((e) => ({
+  name: e.name, type: e.initiatorType, start: Math.round(e.startTime),
+  duration: Math.round(e.duration), transfer_bytes: e.transferSize,
+  status: e.responseStatus === undefined ? null : e.responseStatus,
+}));
+// Tronqué dans la page : seul le début du DOM traverse chromedriver
+const html = document.documentElement.outerHTML;
+return {url: location.href, dom: html.slice(0, maxDom), dom_length: html.length, network: entries};
+"""
+
+
+class ArtifactCollector:
+    """Capture les artefacts d'un test en échec, avec plafonds de taille"""
+
+    def __init__(self, root=DEFAULT_ROOT, run_id=None, keep_runs=5, max_dom_bytes=2_000_000,
+                 max_screenshot_bytes=5_000_000, max_console_entries=200, max_network_entries=100):
+        self.root = root
+        self.run_dir = os.path.join(root, run_id or current_run_id())
+        self.keep_runs = keep_runs
+        self.max_dom_bytes = max_dom_bytes
+        self.max_screenshot_bytes = max_screenshot_bytes
+        self.max_console_entries = max_console_entries
+        self.max_network_entries = max_network_entries
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifacts")
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def directory(self, nodeid):
+        """Dossier des artefacts d'un test, dérivé de son nodeid"""
+        name = re.sub(r"[^\w.-]+", "_", nodeid).strip("_")[:150]
+        return os.path.join(self.run_dir, name)
+
+    def capture(self, driver, nodeid):
+        """Lit la page et planifie l'écriture ; renvoie le dossier des artefacts"""
+        snapshot = {}
+        try:
+            snapshot = driver.execute_script(_SNAPSHOT_SCRIPT, self.max_network_entries, self.max_dom_bytes) or {}
+        except WebDriverException as error:
+            snapshot["error"] = str(error).splitlines()[0]
+        try:
+            snapshot["screenshot"] = driver.get_screenshot_as_png()
+        except WebDriverException:
+            snapshot["screenshot"] = None
+        try:
+            snapshot["console"] = driver.get_log("browser")[-self.max_console_entries:]
+        except (WebDriverException, ValueError):
+            snapshot["console"] = []  # Journal de la console non activé pour ce navigateur
+        directory = self.directory(nodeid)
+        future = self._executor.submit(self._write, directory, snapshot)
+        with self._lock:
+            self._pending.append(future)
+        return directory
+
+    def wait(self, timeout=None):
+        """Attend la fin des écritures en cours ; renvoie les erreurs rencontrées"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        errors = []
+        for future in pending:
+            error = future.exception(timeout=timeout)
+            if error is not None:
+                errors.append(error)
+        return errors
+
+    def close(self):
+        errors = self.wait()
+        self._executor.shutdown()
+        return errors
+
+    def prune(self):
+        """Supprime les runs les plus anciens au-delà de keep_runs"""
+        if not os.path.isdir(self.root):
+            return []
+        runs = [os.path.join(self.root, name) for name in os.listdir(self.root)]
+        runs = sorted((path for path in runs if os.path.isdir(path) and path != self.run_dir),
+                      key=os.path.getmtime)
+        removed = runs[:max(0, len(runs) - max(0, self.keep_runs - 1))]
+        for path in removed:
+            shutil.rmtree(path, ignore_errors=True)
+        return removed
+
+    def _write(self, directory, snapshot):
+        os.makedirs(directory, exist_ok=True)
+        screenshot = snapshot.pop("screenshot", None)
+        if screenshot and len(screenshot) <= self.max_screenshot_bytes:
+            with open(os.path.join(directory, "screenshot.png"), "wb") as output:
+                output.write(screenshot)
+        dom = snapshot.pop("dom", None)
+        length = snapshot.pop("dom_length", None)
+        if dom is not None:
+            # La page coupe en caractères (une paire de substitution peut être scindée) ;
+            # la limite en octets est appliquée ici
+            data = dom.encode("utf-8", "replace")
+            truncated = len(data) > self.max_dom_bytes or (length or 0) > len(dom)
+            with gzip.open(os.path.join(directory, "dom.html.gz"), "wb", compresslevel=6) as output:
+                output.write(data[:self.max_dom_bytes])
+                if truncated:
+                    output.write(f"\n<!-- tronqué : {length or len(dom)} caractères -->".encode())
+        for name in ("console", "network"):
+            with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as output:
+                json.dump(snapshot.pop(name, []), output, indent=1, ensure_ascii=False)
+        with open(os.path.join(directory, "page.json"), "w", encoding="utf-8") as output:
+            json.dump(snapshot, output, indent=1, ensure_ascii=False)
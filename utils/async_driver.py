@@ -0,0 +1,362 @@
+"""Client WebDriver asyncio : plusieurs navigateurs pilotés depuis un processus
+
+Avec le client Selenium, chaque commande (recherche d'élément, send_keys,
+get_attribute, execute_script...) est un appel HTTP bloquant vers
+chromedriver : piloter plusieurs navigateurs depuis un processus demande un
+thread par navigateur. AsyncWebDriver parle directement le protocole W3C
+WebDriver avec aiohttp : une tâche asyncio par session, toutes les sessions
+partagent un pool de connexions keep-alive vers chromedriver, et chaque
+commande est chronométrée sous son nom (LoadStats de utils.loadgen).
+
+chromedriver exécute les commandes d'une session l'une après l'autre et ne
+gère pas le pipelining HTTP : une session a au plus une commande en vol et
+le parallélisme vient du nombre de sessions. Les capacités sont celles des
+profils de utils.browser, les attentes celles de utils.waits (même script,
+lancé par execute_async_script), les erreurs les exceptions de Selenium.
+
+Les page objects de utils.pages restent synchrones : les parcours de ce
+module en reprennent les définitions (URL, paramètres de la grille, champs et
+ordre de saisie du login, localisateurs) sans en recopier les valeurs.
+
+    python -m utils.async_driver --sessions 8 --duration 30
+    python -m utils.async_driver --sessions 4 --driver-url http://127.0.0.1:9515
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import aiohttp
+from selenium.common.exceptions import (InvalidSessionIdException, JavascriptException, NoSuchElementException,
+                                        StaleElementReferenceException, TimeoutException, WebDriverException)
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.driver_finder import DriverFinder
+
+from utils import config
+from utils.browser import BLOCKED_URLS, PROFILES, chrome_options
+from utils.loadgen import LoadStats
+from utils.pages import HEADING, LoginPage, ProductGridPage
+from utils.waits import WaitTimeout, wait_arguments
+
+ELEMENT_KEY = "element-6066-11e4-a07b-4db6e0d12fd8"
+COMMANDS = ("session", "new_session", "timeouts", "cdp", "get", "wait", "find_element", "find_elements",
+            "send_keys", "click", "clear", "get_attribute", "get_property", "text", "execute_script",
+            "current_url", "title", "quit")
+
+# Erreurs W3C -> exceptions Selenium : les appelants gèrent les mêmes
+# erreurs qu'avec le client synchrone
+_ERRORS = {
+    "no such element": NoSuchElementException,
+    "stale element reference": StaleElementReferenceException,
+    "javascript error": JavascriptException,
+    "script timeout": TimeoutException,
+    "timeout": TimeoutException,
+    "invalid session id": InvalidSessionIdException,
+}
+
+# Stratégies de Selenium absentes du protocole W3C, traduites en CSS comme
+# le fait le client synchrone
+_W3C_LOCATORS = {
+    By.ID: lambda value: (By.CSS_SELECTOR, f'[id="{value}"]'),
+    By.NAME: lambda value: (By.CSS_SELECTOR, f'[name="{value}"]'),
+    By.CLASS_NAME: lambda value: (By.CSS_SELECTOR, f".{value}"),
+}
+
+
+def _locator(by, value):
+    using, value = _W3C_LOCATORS[by](value) if by in _W3C_LOCATORS else (by, value)
+    return {"using": using, "value": value}
+
+
+async def _request(http, stats, command, method, url, payload=None):
+    """Envoie une commande et renvoie son champ value ; la latence est enregistrée sous command"""
+    if payload is None and method == "POST":
+        payload = {}  # Le protocole exige un corps JSON sur tous les POST
+    start = time.monotonic()
+    try:
+        async with http.request(method, url, json=payload) as response:
+            body = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+        stats.record(command, time.monotonic() - start, ok=False)
+        raise WebDriverException(f"{command} : {type(error).__name__} {error}") from error
+    stats.record(command, time.monotonic() - start, ok=response.status < 400)
+    value = body.get("value") if isinstance(body, dict) else None
+    if response.status >= 400:
+        error = value if isinstance(value, dict) else {}
+        exception = _ERRORS.get(error.get("error"), WebDriverException)
+        raise exception(f"{command} : {error.get('error', response.status)} ({error.get('message', '')})")
+    return value
+
+
+class AsyncElement:
+    """Élément d'une page, référencé par son identifiant WebDriver"""
+
+    def __init__(self, driver, element_id):
+        self.driver = driver
+        self.id = element_id
+
+    def __repr__(self):
+        return f"<AsyncElement {self.id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, AsyncElement) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    async def _execute(self, command, method, path="", payload=None):
+        return await self.driver.execute(command, method, f"/element/{self.id}{path}", payload)
+
+    async def click(self):
+        await self._execute("click", "POST", "/click")
+
+    async def clear(self):
+        await self._execute("clear", "POST", "/clear")
+
+    async def send_keys(self, *value):
+        text = "".join(str(part) for part in value)
+        await self._execute("send_keys", "POST", "/value", {"text": text, "value": list(text)})
+
+    async def get_attribute(self, name):
+        """Attribut HTML (et non la propriété DOM, contrairement au client Selenium)"""
+        return await self._execute("get_attribute", "GET", f"/attribute/{name}")
+
+    async def get_property(self, name):
+        return await self._execute("get_property", "GET", f"/property/{name}")
+
+    async def text(self):
+        return await self._execute("text", "GET", "/text")
+
+    async def find_element(self, by, value):
+        return await self._execute("find_element", "POST", "/element", _locator(by, value))
+
+    async def find_elements(self, by, value):
+        return await self._execute("find_elements", "POST", "/elements", _locator(by, value))
+
+
+class AsyncWebDriver:
+    """Session WebDriver pilotée par des coroutines
+
+    Les sessions d'un même run partagent http (et son pool de connexions)
+    ainsi que stats.
+    """
+
+    def __init__(self, http, driver_url, session_id, stats, capabilities=None):
+        self.http = http
+        self.url = f"{driver_url.rstrip('/')}/session/{session_id}"
+        self.session_id = session_id
+        self.stats = stats
+        self.capabilities = capabilities or {}
+        self.commands = 0
+
+    @classmethod
+    async def start(cls, http, driver_url, capabilities, stats, script_timeout=config.WAIT_BUDGET + 5):
+        """Lance un navigateur ; le timeout des scripts asynchrones couvre les attentes"""
+        value = await _request(http, stats, "new_session", "POST", f"{driver_url.rstrip('/')}/session",
+                               {"capabilities": {"alwaysMatch": capabilities, "firstMatch": [{}]}})
+        driver = cls(http, driver_url, value["sessionId"], stats, value.get("capabilities"))
+        try:
+            await driver.execute("timeouts", "POST", "/timeouts", {"script": int(script_timeout * 1000)})
+        except WebDriverException:
+            await driver.quit()
+            raise
+        return driver
+
+    async def execute(self, command, method, path="", payload=None):
+        """Commande de la session ; les références d'éléments deviennent des AsyncElement"""
+        self.commands += 1
+        value = await _request(self.http, self.stats, command, method, f"{self.url}{path}", payload)
+        return self._unwrap(value)
+
+    def _unwrap(self, value):
+        if isinstance(value, list):
+            return [self._unwrap(item) for item in value]
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncElement(self, value[ELEMENT_KEY])
+            return {key: self._unwrap(item) for key, item in value.items()}
+        return value
+
+    @classmethod
+    def _wrap(cls, value):
+        if isinstance(value, AsyncElement):
+            return {ELEMENT_KEY: value.id}
+        if isinstance(value, (list, tuple)):
+            return [cls._wrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: cls._wrap(item) for key, item in value.items()}
+        return value
+
+    async def get(self, url):
+        await self.execute("get", "POST", "/url", {"url": url})
+
+    async def current_url(self):
+        return await self.execute("current_url", "GET", "/url")
+
+    async def title(self):
+        return await self.execute("title", "GET", "/title")
+
+    async def find_element(self, by, value):
+        return await self.execute("find_element", "POST", "/element", _locator(by, value))
+
+    async def find_elements(self, by, value):
+        return await self.execute("find_elements", "POST", "/elements", _locator(by, value))
+
+    async def execute_script(self, script, *args):
+        return await self.execute("execute_script", "POST", "/execute/sync",
+                                  {"script": script, "args": self._wrap(list(args))})
+
+    async def execute_async_script(self, script, *args, command="execute_script"):
+        return await self.execute(command, "POST", "/execute/async", {"script": script, "args": self._wrap(list(args))})
+
+    async def execute_cdp_cmd(self, cmd, params):
+        return await self.execute("cdp", "POST", "/goog/cdp/execute", {"cmd": cmd, "params": params})
+
+    async def wait_for(self, by, value, kind="present", text=None, locators=None, timeout=10.0):
+        """Attend une condition sur un élément avec le script de utils.waits
+
+        Renvoie le résultat du script : element, et elements si des
+        localisateurs sont donnés. Lève WaitTimeout après timeout secondes.
+        """
+        description, arguments = wait_arguments(kind, by, value, text, locators)
+        deadline = time.monotonic() + timeout
+        result = {"ok": False}
+        while time.monotonic() < deadline:
+            try:
+                result = await self.execute_async_script(
+                    *arguments, int((deadline - time.monotonic()) * 1000), command="wait")
+                break
+            except JavascriptException as error:
+                # Navigation pendant l'attente (redirection après un clic) : on
+                # relance l'observation sur le nouveau document
+                if "unloaded" not in str(error) and "navigat" not in str(error):
+                    raise
+            except TimeoutException:
+                break
+        if not result.get("ok"):
+            raise WaitTimeout(f"{description} : condition non remplie après {timeout:.1f}s")
+        return result
+
+    async def quit(self):
+        try:
+            await _request(self.http, self.stats, "quit", "DELETE", self.url)
+        except WebDriverException:
+            pass  # Navigateur déjà parti : rien à fermer
+
+
+async def run_sessions(driver_url, scenario, sessions=4, capabilities=None, pool_size=None, stats=None):
+    """Ouvre sessions navigateurs et exécute scenario(driver, numéro) dans chacun, en parallèle
+
+    Une connexion keep-alive par session suffit (une commande en vol par
+    session) ; pool_size permet d'en limiter le nombre. Chaque scénario est
+    mesuré sous "session" : un scénario en erreur compte une erreur sans
+    arrêter les autres.
+    """
+    stats = stats or LoadStats(COMMANDS, title="Commandes WebDriver")
+    capabilities = capabilities or chrome_options(PROFILES[config.BROWSER_PROFILE]).to_capabilities()
+    connector = aiohttp.TCPConnector(limit=pool_size or sessions, keepalive_timeout=30)
+    # Une commande peut durer tout un budget d'attente (script asynchrone)
+    timeout = aiohttp.ClientTimeout(total=config.WAIT_BUDGET + 30)
+
+    async def session(number):
+        start = time.monotonic()
+        try:
+            driver = await AsyncWebDriver.start(http, driver_url, capabilities, stats)
+            try:
+                await scenario(driver, number)
+            finally:
+                await driver.quit()
+        except WebDriverException as error:
+            stats.record("session", time.monotonic() - start, ok=False)
+            print(f"✗ Session {number} : {error}")
+        else:
+            stats.record("session", time.monotonic() - start)
+
+    stats.started = time.monotonic()
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            await asyncio.gather(*(session(number) for number in range(sessions)))
+    finally:
+        stats.finished = time.monotonic()
+    return stats
+
+
+async def admin_scenario(driver, duration, profile=PROFILES[config.BROWSER_PROFILE],
+                         email=config.ADMIN_EMAIL, password=config.ADMIN_PASSWORD):
+    """Login à l'admin puis consultation de la grille produits pendant duration secondes"""
+    if profile.block_resources:
+        await driver.execute_cdp_cmd("Network.enable", {})
+        await driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    # Même parcours que LoginPage.open().login() puis ProductGridPage.search()
+    await driver.get(LoginPage.url())
+    login = await driver.wait_for(*LoginPage.LOCATORS[LoginPage.READY], locators=LoginPage.LOCATORS)
+    fields = login["elements"]
+    for name, value in LoginPage.credentials(email, password).items():
+        await fields[name].send_keys(value)
+    await driver.wait_for(*LoginPage.LOCATORS["submit"], kind="clickable")
+    await fields["submit"].click()
+    await driver.wait_for(*HEADING)
+
+    grid = ProductGridPage.url(**ProductGridPage.search_query())
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        await driver.get(grid)
+        await driver.wait_for(*ProductGridPage.LOCATORS[ProductGridPage.READY])
+        rows = await driver.find_elements(*ProductGridPage.ROWS)
+        for row in rows[:5]:
+            await row.text()
+        await driver.execute_script("return document.querySelectorAll('table tbody tr').length;")
+
+
+def start_chromedriver(options):
+    """Lance chromedriver, trouvé comme le fait webdriver.Chrome ; il sert toutes les sessions"""
+    service = Service()
+    finder = DriverFinder(service, options)
+    if finder.get_browser_path():
+        options.binary_location = finder.get_browser_path()
+    service.path = service.env_path() or finder.get_driver_path()
+    service.start()
+    return service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.async_driver", description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, default=4, help="Navigateurs pilotés en parallèle")
+    parser.add_argument("--duration", type=float, default=30, help="Durée du parcours après login, en secondes")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=config.BROWSER_PROFILE)
+    parser.add_argument("--driver-url", default=None,
+                        help="chromedriver déjà lancé (défaut : lancé par la commande)")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="Connexions keep-alive maximum (défaut : une par session)")
+    parser.add_argument("--base-url", default=None, help=f"Instance EverShop (défaut : {config.BASE_URL})")
+    parser.add_argument("--output", help="Écrit le résumé JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        config.set_base_url(args.base_url)
+    profile = PROFILES[args.profile]
+    options = chrome_options(profile)
+    service = None
+    driver_url = args.driver_url
+    if driver_url is None:
+        service = start_chromedriver(options)
+        driver_url = service.service_url
+    try:
+        stats = asyncio.run(run_sessions(
+            driver_url, lambda driver, number: admin_scenario(driver, args.duration, profile),
+            args.sessions, options.to_capabilities(), args.pool_size))
+    finally:
+        if service is not None:
+            service.stop()
+
+    print(stats.report())
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(stats.summary(), output, indent=2)
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
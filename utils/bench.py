@@ -0,0 +1,211 @@
+"""Mesure des étapes des tests (login, navigation, saisie, sauvegarde...)
+
+    with step("save", driver):
+        page.save()
+
+    @step("login")
+    def login_to_admin(driver): ...
+
+Chaque étape enregistre sa durée (horloge monotone) et le nombre de
+commandes envoyées à chromedriver pendant son exécution par le navigateur
+mesuré : celui passé au bloc with, ou pour un décorateur le premier argument
+de la fonction (un navigateur, ou un objet qui en porte un dans .driver).
+Les commandes d'autres navigateurs (threads, workers) ne sont pas comptées.
+En fin de session
+les mesures sont écrites en JSON Lines dans bench_output.txt, une ligne par
+étape, puis comparées à une référence avec :
+
+    python -m utils.bench compare bench_baseline.txt bench_output.txt
+    python -m utils.bench save-baseline bench_output.txt bench_baseline.txt
+"""
+import argparse
+import json
+import math
+import shutil
+import statistics
+import sys
+import threading
+import time
+from contextlib import ContextDecorator
+from functools import wraps
+
+from utils.naming import current_run_id, current_worker
+
+DEFAULT_OUTPUT = "bench_output.txt"
+DEFAULT_BASELINE = "bench_baseline.txt"
+
+_lock = threading.Lock()
+_records = []
+_current_test = None
+
+
+def count_commands(driver):
+    """Compte chaque commande WebDriver envoyée par ce navigateur"""
+    execute = driver.execute
+    driver.bench_commands = 0
+
+    def counting_execute(driver_command, params=None):
+        with _lock:
+            driver.bench_commands += 1
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return driver
+
+
+def commands_sent(driver):
+    """Commandes envoyées par ce navigateur ; 0 s'il n'est pas compté (ou absent)"""
+    return getattr(driver, "bench_commands", 0)
+
+
+def current_test():
+    return _current_test
+
+
+def set_current_test(nodeid):
+    global _current_test
+    _current_test = nodeid
+
+
+class step(ContextDecorator):
+    """Étape mesurée, utilisable en bloc with ou en décorateur"""
+
+    def __init__(self, name, driver=None):
+        self.name = name
+        self.driver = driver
+        self._stack = threading.local()
+
+    def __call__(self, function):
+        @wraps(function)
+        def measured(*args, **kwargs):
+            # Navigateur mesuré : le premier argument, ou son attribut driver (page object)
+            target = getattr(args[0], "driver", args[0]) if args else None
+            with step(self.name, target):
+                return function(*args, **kwargs)
+        return measured
+
+    def __enter__(self):
+        starts = self._stack.__dict__.setdefault("starts", [])
+        starts.append((time.monotonic(), commands_sent(self.driver)))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        start, commands = self._stack.starts.pop()
+        record(self.name, time.monotonic() - start, commands_sent(self.driver) - commands, ok=exc_type is None)
+        return False
+
+
+def record(name, seconds, commands=0, ok=True):
+    with _lock:
+        _records.append({
+            "run_id": current_run_id(),
+            "worker": current_worker(),
+            "test": _current_test,
+            "step": name,
+            "seconds": round(seconds, 6),
+            "commands": commands,
+            "ok": ok,
+        })
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def reset(path):
+    """Vide le fichier de mesures au début d'un run"""
+    open(path, "w").close()
+
+
+def flush(path):
+    """Ajoute les mesures du process au fichier (un process par worker xdist)"""
+    with _lock:
+        lines = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in _records)
+        _records.clear()
+    if lines:
+        with open(path, "a", encoding="utf-8") as output:
+            output.write(lines)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def percentile(samples, percent):
+    """Percentile par rang le plus proche sur des échantillons triés"""
+    if not samples:
+        return None
+    rank = math.ceil(percent / 100 * len(samples))
+    return samples[max(0, min(len(samples), rank) - 1)]
+
+
+def summarize(items):
+    """Médiane des durées et des commandes par (test, étape)"""
+    grouped = {}
+    for item in items:
+        if item.get("ok", True):
+            grouped.setdefault((item["test"], item["step"]), []).append(item)
+    return {
+        key: {
+            "seconds": statistics.median(i["seconds"] for i in group),
+            "commands": statistics.median(i["commands"] for i in group),
+            "samples": len(group),
+        }
+        for key, group in grouped.items()
+    }
+
+
+def compare(baseline, current, threshold=0.2, min_delta=0.05):
+    """Étapes plus lentes que la référence de plus de threshold (et de min_delta secondes)
+
+    Renvoie une liste de (test, étape, référence, actuel, message).
+    """
+    regressions = []
+    base, now = summarize(baseline), summarize(current)
+    for key, measure in sorted(now.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+        if key not in base:
+            continue
+        reference = base[key]
+        delta = measure["seconds"] - reference["seconds"]
+        if delta > min_delta and delta > reference["seconds"] * threshold:
+            regressions.append((*key, reference, measure,
+                                f"{reference['seconds']:.3f}s -> {measure['seconds']:.3f}s "
+                                f"(+{delta / max(reference['seconds'], 1e-9):.0%})"))
+        elif measure["commands"] > reference["commands"]:
+            regressions.append((*key, reference, measure,
+                                f"{reference['commands']:.0f} -> {measure['commands']:.0f} commandes"))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.bench", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    cmp_parser = commands.add_parser("compare", help="Signale les étapes en régression")
+    cmp_parser.add_argument("baseline", nargs="?", default=DEFAULT_BASELINE)
+    cmp_parser.add_argument("current", nargs="?", default=DEFAULT_OUTPUT)
+    cmp_parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Ralentissement relatif toléré (0.2 = 20%%)")
+    cmp_parser.add_argument("--min-delta", type=float, default=0.05,
+                            help="Ralentissement absolu ignoré, en secondes")
+    save_parser = commands.add_parser("save-baseline", help="Enregistre un run comme référence")
+    save_parser.add_argument("current", nargs="?", default=DEFAULT_OUTPUT)
+    save_parser.add_argument("baseline", nargs="?", default=DEFAULT_BASELINE)
+    args = parser.parse_args(argv)
+
+    if args.command == "save-baseline":
+        shutil.copyfile(args.current, args.baseline)
+        print(f"Référence enregistrée : {args.baseline}")
+        return 0
+
+    regressions = compare(load(args.baseline), load(args.current), args.threshold, args.min_delta)
+    for test, name, _, _, message in regressions:
+        print(f"✗ {test} [{name}] {message}")
+    if not regressions:
+        print("✓ Aucune régression par rapport à la référence")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
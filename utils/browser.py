@@ -0,0 +1,202 @@
+"""Fabrique des navigateurs Chrome utilisés par les tests
+
+Deux profils nommés :
+
+* fast-headless : sans fenêtre, images/polices/requêtes tierces bloquées via
+  DevTools (Network.setBlockedURLs) sur les pages qui n'en ont pas besoin, et
+  user-data-dir persistant pour que le cache HTTP survive d'une session à
+  l'autre ;
+* debug-headed : fenêtre visible, rien de bloqué, profil jetable.
+
+La fabrique mesure le démarrage à froid de chaque navigateur et le temps de
+chargement de chaque page ouverte avec navigate().
+"""
+import itertools
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import weakref
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from utils import config, perf, resources
+from utils.bench import count_commands, step
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Ressources inutiles à l'admin : images, polices et services tiers
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+]
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    name: str
+    headless: bool
+    block_resources: bool
+    persistent_cache: bool
+
+
+PROFILES = {
+    profile.name: profile for profile in (
+        BrowserProfile("fast-headless", headless=True, block_resources=True, persistent_cache=True),
+        BrowserProfile("debug-headed", headless=False, block_resources=False, persistent_cache=False),
+    )
+}
+
+# Fabrique d'origine de chaque navigateur, pour navigate()
+_factories = weakref.WeakKeyDictionary()
+
+
+def chrome_options(profile, user_data_dir=None, performance_log=False):
+    """Options Chrome communes à tous les tests, selon le profil
+
+    performance_log active le journal des événements DevTools (Network.*)
+    lu par l'enregistrement du trafic (utils.replay).
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-notifications')
+    options.add_argument('--log-level=3')
+    options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    # Console du navigateur lisible par driver.get_log("browser") (artefacts d'échec)
+    logging_prefs = {'browser': 'ALL'}
+    if performance_log:
+        logging_prefs['performance'] = 'ALL'
+    options.set_capability('goog:loggingPrefs', logging_prefs)
+    if profile.headless:
+        options.add_argument('--headless=new')
+    if user_data_dir:
+        options.add_argument(f'--user-data-dir={user_data_dir}')
+    return options
+
+
+class BrowserFactory:
+    """Lance des navigateurs selon un profil et mesure leurs temps de démarrage"""
+
+    def __init__(self, profile="fast-headless", worker="main", cache_root=config.PROFILE_CACHE_DIR,
+                 record_traffic=False):
+        self.profile = PROFILES[profile]
+        self.worker = worker
+        self.cache_root = cache_root
+        self.record_traffic = record_traffic
+        self.cold_starts = []
+        self.page_loads = {}
+        self._slots = itertools.count(1)
+        self._temp_dirs = []
+        self._locks = []
+
+    def __call__(self):
+        user_data_dir = self._user_data_dir()
+        start = time.monotonic()
+        with step("browser_start"):
+            driver = webdriver.Chrome(options=chrome_options(self.profile, user_data_dir, self.record_traffic))
+        self.cold_starts.append(time.monotonic() - start)
+        count_commands(driver)
+        resources.register_driver(driver)
+        _factories[driver] = self
+        # Pas d'attente implicite : elle s'ajouterait aux attentes de utils.waits.
+        # Le timeout des scripts asynchrones couvre le budget d'attente d'un test.
+        driver.set_script_timeout(config.WAIT_BUDGET + 5)
+        if self.profile.persistent_cache:
+            # Le profil réutilisé garde son cache HTTP, mais chaque navigateur
+            # doit démarrer déconnecté
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": config.BASE_URL, "storageTypes": "local_storage,session_storage,indexeddb"})
+        perf.install(driver)
+        driver.resource_blocking = None
+        return driver
+
+    def record_page_load(self, url, seconds):
+        self.page_loads.setdefault(urlsplit(url).path or "/", []).append(seconds)
+
+    def report(self):
+        """Résumé des temps de démarrage et de chargement pour ce profil"""
+        lines = [f"Profil {self.profile.name} ({self.worker})"]
+        if self.cold_starts:
+            lines.append(f"  démarrage à froid : {len(self.cold_starts)} navigateur(s), "
+                         f"moyenne {statistics.mean(self.cold_starts):.2f}s, max {max(self.cold_starts):.2f}s")
+        for path, loads in sorted(self.page_loads.items()):
+            lines.append(f"  {path} : {len(loads)} chargement(s), médiane {statistics.median(loads):.3f}s, "
+                         f"max {max(loads):.3f}s")
+        return "\n".join(lines)
+
+    def close(self):
+        """Libère les profils persistants et supprime les profils jetables"""
+        for lock in self._locks:
+            lock.close()
+        for path in self._temp_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _user_data_dir(self):
+        slot = next(self._slots)
+        if self.profile.persistent_cache:
+            path = os.path.join(self.cache_root, f"{self.profile.name}-{self.worker}-{slot}")
+            os.makedirs(path, exist_ok=True)
+            lock = try_lock(path + ".lock")
+            if lock is not None:
+                self._locks.append(lock)
+                return path
+            # Profil déjà utilisé par un autre run en parallèle : profil jetable
+        path = tempfile.mkdtemp(prefix=f"evershop-{self.profile.name}-{self.worker}-")
+        self._temp_dirs.append(path)
+        return path
+
+
+def try_lock(path):
+    """Verrou exclusif non bloquant, libéré à la fermeture du fichier ou à la fin du process"""
+    handle = open(path, "a+")
+    try:
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def set_resource_blocking(driver, enabled):
+    """Active ou lève le blocage des ressources, sans commande si rien ne change"""
+    factory = _factories.get(driver)
+    if factory is None or not factory.profile.block_resources:
+        return
+    if getattr(driver, "resource_blocking", None) == enabled:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS if enabled else []})
+    except WebDriverException:
+        return
+    driver.resource_blocking = enabled
+
+
+def navigate(driver, url, needs_images=False):
+    """Charge une page en appliquant le blocage du profil et en mesurant le chargement"""
+    set_resource_blocking(driver, not needs_images)
+    start = time.monotonic()
+    driver.get(url)
+    factory = _factories.get(driver)
+    if factory is not None:
+        factory.record_page_load(url, time.monotonic() - start)
+
@@ -0,0 +1,154 @@
+"""Pool de navigateurs déjà connectés à l'admin EverShop
+
+Chaque navigateur ne passe par le formulaire de connexion qu'une seule fois :
+les cookies de session du premier login sont capturés puis réinjectés dans
+les navigateurs suivants. Un test emprunte un navigateur et le rend nettoyé
+(cookies conservés, storage et onglets supplémentaires supprimés) ; si la
+session admin a expiré entre-temps, le navigateur se reconnecte.
+"""
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+from utils import config
+from utils.bench import step
+from utils.pages import LoginPage
+from utils.waits import WaitBudget, use_budget
+
+ADMIN_PATH = "/admin"
+
+_RESET_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+@step("login")
+def login_to_admin(driver, email=config.ADMIN_EMAIL, password=config.ADMIN_PASSWORD):
+    """Connexion à l'admin via le formulaire de login"""
+    page = LoginPage(driver).open()
+    page.login(email, password)
+    page.heading()
+
+
+class BrowserPool:
+    """Pool thread-safe de navigateurs authentifiés sur l'admin"""
+
+    def __init__(self, factory, size=config.POOL_SIZE):
+        self._factory = factory
+        self._size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._drivers = []
+        self._lock = threading.Lock()
+        self._login_lock = threading.Lock()
+        self._cookies = None
+
+    @property
+    def cookies(self):
+        """Cookies de la session admin capturés au premier login"""
+        return list(self._cookies or [])
+
+    def checkout(self, timeout=None):
+        """Emprunte un navigateur, en lance un nouveau si le pool n'est pas plein"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            spawn = len(self._drivers) < self._size
+            if spawn:
+                self._drivers.append(None)  # Réserve la place pendant le lancement
+        if not spawn:
+            return self._idle.get(timeout=timeout)
+        try:
+            driver = self._spawn()
+        except Exception:
+            with self._lock:
+                self._drivers.remove(None)
+            raise
+        with self._lock:
+            self._drivers[self._drivers.index(None)] = driver
+        return driver
+
+    def checkin(self, driver):
+        """Rend un navigateur au pool après l'avoir nettoyé"""
+        try:
+            self._reset(driver)
+        except WebDriverException:
+            # Navigateur planté ou session perdue : on le remplace au prochain emprunt
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        """Emprunte un navigateur le temps d'un bloc with"""
+        driver = self.checkout(timeout=timeout)
+        try:
+            yield driver
+        finally:
+            self.checkin(driver)
+
+    def close(self):
+        """Ferme tous les navigateurs du pool"""
+        with self._lock:
+            drivers, self._drivers = [d for d in self._drivers if d is not None], []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+    def _spawn(self):
+        driver = self._factory()
+        try:
+            with self._login_lock:
+                if self._cookies is None:
+                    # Le login du pool ne doit pas entamer le budget d'attente du test
+                    with use_budget(WaitBudget()):
+                        login_to_admin(driver)
+                    self._cookies = driver.get_cookies()
+                    return driver
+            self._inject_cookies(driver)
+        except Exception:
+            driver.quit()
+            raise
+        return driver
+
+    def _inject_cookies(self, driver):
+        # Selenium n'accepte un cookie que sur une page du même domaine :
+        # on charge une ressource légère plutôt qu'une page de l'admin
+        driver.get(config.url("/favicon.ico"))
+        for cookie in self._cookies:
+            driver.add_cookie(cookie)
+
+    def _reset(self, driver):
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.execute_script(_RESET_SCRIPT)
+        # Session admin expirée côté serveur : l'admin redirige vers le formulaire de login
+        driver.get(config.url(ADMIN_PATH))
+        if LoginPage.PATH in driver.current_url:
+            self._login_again(driver)
+        driver.get("about:blank")
+
+    def _login_again(self, driver):
+        with self._login_lock:
+            with use_budget(WaitBudget()):
+                login_to_admin(driver)
+            # Les navigateurs lancés ensuite reçoivent la nouvelle session
+            self._cookies = driver.get_cookies()
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
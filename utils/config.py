@@ -0,0 +1,50 @@
+"""Configuration commune des tests (URL de l'instance, identifiants admin)"""
+import os
+import tempfile
+
+BASE_URL = os.environ.get("EVERSHOP_BASE_URL", "http://localhost:3000").rstrip("/")
+
+ADMIN_EMAIL = os.environ.get("EVERSHOP_ADMIN_EMAIL", "admin@admin.com")
+ADMIN_PASSWORD = os.environ.get("EVERSHOP_ADMIN_PASSWORD", "admin777")
+
+# Nombre maximal de navigateurs authentifiés gardés au chaud par processus
+POOL_SIZE = int(os.environ.get("EVERSHOP_POOL_SIZE", "1"))
+
+# Profil de navigateur par défaut (voir utils.browser.PROFILES)
+BROWSER_PROFILE = os.environ.get("EVERSHOP_BROWSER_PROFILE", "fast-headless")
+
+# Racine des user-data-dir persistants du profil fast-headless
+PROFILE_CACHE_DIR = os.environ.get(
+    "EVERSHOP_PROFILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "evershop-chrome-profiles"))
+
+# Latence ajoutée à chaque requête par le serveur de substitution (--stub), en secondes
+STUB_LATENCY = float(os.environ.get("EVERSHOP_STUB_LATENCY", "0"))
+
+# Budget total des attentes d'un test, en secondes
+WAIT_BUDGET = float(os.environ.get("EVERSHOP_WAIT_BUDGET", "30"))
+
+# Pages de la vitrine sondées après une création (utils.storefront) : {url_key} et {uuid}
+STOREFRONT_PRODUCT_URL = os.environ.get("EVERSHOP_STOREFRONT_PRODUCT_URL", "/{url_key}")
+STOREFRONT_CATEGORY_URL = os.environ.get("EVERSHOP_STOREFRONT_CATEGORY_URL", "/{url_key}")
+
+# Image envoyée par les outils qui créent des produits (seed, loadgen, replay)
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "monstera.jpg")
+
+# Vérifie aussi le toast après un enregistrement (la réponse de l'API fait foi)
+CHECK_TOAST = os.environ.get("EVERSHOP_CHECK_TOAST", "0") == "1"
+
+
+def set_base_url(base_url):
+    """Change l'instance visée (EverShop réel ou serveur de substitution)
+
+    La variable d'environnement est mise à jour aussi : les workers xdist,
+    lancés après, visent la même instance.
+    """
+    global BASE_URL
+    BASE_URL = base_url.rstrip("/")
+    os.environ["EVERSHOP_BASE_URL"] = BASE_URL
+
+
+def url(path):
+    """Construit une URL absolue vers l'instance EverShop"""
+    return f"{BASE_URL}/{path.lstrip('/')}"
@@ -0,0 +1,173 @@
+"""Historique des durées des tests et découpage en shards équilibrés
+
+Chaque run ajoute la durée de chaque test (setup + appel + teardown) à
+l'historique durations.json : {nodeid: [dernières durées]}. L'estimation
+d'un test est la médiane de ses HISTORY_SIZE dernières durées ; un test
+inconnu reçoit la médiane des tests connus.
+
+Le découpage ne dépend jamais de l'historique local d'une machine : chacune
+n'a mesuré que son shard, et des historiques différents donneraient des
+découpages différents (tests lancés deux fois ou jamais). Les tests connus
+de l'historique commun (--shard-history, fusion des historiques de toutes
+les machines) sont répartis par l'algorithme LPT (longest processing time
+first) : du plus long au plus court, chacun va au shard le moins chargé.
+Les tests absents de l'historique commun, ou tous sans historique commun,
+vont au shard donné par un hachage stable de leur nodeid. L'historique
+local ne sert qu'à lancer les tests les plus longs en premier dans le shard.
+
+    pytest --shard-count 4 --shard-index 0 --shard-history durations-merged.json
+    python -m utils.durations merge durations-merged.json shard-*/durations.json
+    python -m utils.durations plan --shards 4 --history durations-merged.json
+"""
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import statistics
+import sys
+import threading
+
+DEFAULT_HISTORY = "durations.json"
+HISTORY_SIZE = 10
+DEFAULT_ESTIMATE = 1.0  # Secondes, quand l'historique est vide
+
+_lock = threading.Lock()
+_durations = {}
+_skipped = set()
+
+
+def record(nodeid, seconds, skipped=False):
+    """Ajoute la durée d'une phase (setup, appel, teardown) au test"""
+    with _lock:
+        _durations[nodeid] = _durations.get(nodeid, 0.0) + seconds
+        if skipped:
+            _skipped.add(nodeid)
+
+
+def recorded():
+    """Durées des tests du run, sans les tests ignorés"""
+    with _lock:
+        return {nodeid: seconds for nodeid, seconds in _durations.items() if nodeid not in _skipped}
+
+
+def load(path=DEFAULT_HISTORY):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+
+def update(history, durations, size=HISTORY_SIZE):
+    """Ajoute les durées d'un run à l'historique, en gardant les size dernières par test"""
+    for nodeid, seconds in durations.items():
+        history[nodeid] = (history.get(nodeid, []) + [round(seconds, 4)])[-size:]
+    return history
+
+
+def save(history, path=DEFAULT_HISTORY):
+    # Écriture atomique : un run interrompu ne corrompt pas l'historique
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as output:
+        json.dump(history, output, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def estimates(history, nodeids):
+    """Durée estimée de chaque test : médiane de son historique"""
+    known = {nodeid: statistics.median(samples) for nodeid, samples in history.items() if samples}
+    default = statistics.median(known.values()) if known else DEFAULT_ESTIMATE
+    return {nodeid: known.get(nodeid, default) for nodeid in nodeids}
+
+
+def slowest_first(nodeids, durations):
+    """Tests du plus long au plus court (nodeid pour départager)"""
+    return sorted(nodeids, key=lambda nodeid: (-durations[nodeid], nodeid))
+
+
+def shards(nodeids, durations, count):
+    """Répartition LPT en count shards ; chaque shard est trié du plus long au plus court"""
+    loads = [(0.0, index) for index in range(count)]
+    assigned = [[] for _ in range(count)]
+    for nodeid in slowest_first(nodeids, durations):
+        load, index = heapq.heappop(loads)
+        assigned[index].append(nodeid)
+        heapq.heappush(loads, (load + durations[nodeid], index))
+    return assigned
+
+
+def stable_shard(nodeid, count):
+    """Shard d'un test sans historique commun, identique sur toutes les machines
+
+    hash() de Python est salé par process : on hache le nodeid avec sha1.
+    """
+    return int(hashlib.sha1(nodeid.encode("utf-8")).hexdigest(), 16) % count
+
+
+def partition(nodeids, history, count):
+    """Découpage en count shards, fonction des seuls nodeids et de l'historique commun
+
+    Les tests connus de history sont répartis par LPT, les autres par
+    stable_shard(). Pour les mêmes entrées, toutes les machines obtiennent
+    le même découpage : complet et sans doublon.
+    """
+    known = [nodeid for nodeid in nodeids if history.get(nodeid)]
+    assigned = shards(known, estimates(history, known), count)
+    for nodeid in sorted(nodeid for nodeid in nodeids if not history.get(nodeid)):
+        assigned[stable_shard(nodeid, count)].append(nodeid)
+    return assigned
+
+
+def merge(histories, size=HISTORY_SIZE):
+    """Fusionne les historiques des machines en un historique commun"""
+    merged = {}
+    for history in histories:
+        for nodeid, samples in history.items():
+            merged[nodeid] = (merged.get(nodeid, []) + list(samples))[-size:]
+    return merged
+
+
+def fingerprint(history):
+    """Empreinte courte de l'historique, affichée par chaque machine pour comparer"""
+    return hashlib.sha1(json.dumps(history, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+
+
+def makespan(assigned, durations):
+    """Durée estimée du shard le plus long : le chemin critique du run"""
+    return max((sum(durations[nodeid] for nodeid in shard) for shard in assigned), default=0.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.durations", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan_parser = commands.add_parser("plan", help="Découpage estimé des tests connus")
+    plan_parser.add_argument("--shards", type=int, default=2)
+    plan_parser.add_argument("--history", default=DEFAULT_HISTORY)
+    merge_parser = commands.add_parser("merge", help="Fusionne les historiques des machines")
+    merge_parser.add_argument("output", help="Historique commun à passer à --shard-history")
+    merge_parser.add_argument("histories", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        merged = merge(load(path) for path in args.histories)
+        save(merged, args.output)
+        print(f"{len(merged)} tests, empreinte {fingerprint(merged)} : {args.output}")
+        return 0
+    history = load(args.history)
+    if not history:
+        print(f"Historique vide : {args.history}")
+        return 1
+    durations = estimates(history, history)
+    assigned = partition(list(history), history, args.shards)
+    for index, shard in enumerate(assigned):
+        total = sum(durations[nodeid] for nodeid in shard)
+        print(f"Shard {index} : {len(shard)} tests, {total:.1f}s")
+        for nodeid in shard:
+            print(f"  {durations[nodeid]:>7.2f}s  {nodeid}")
+    print(f"Chemin critique estimé : {makespan(assigned, durations):.1f}s "
+          f"(séquentiel : {sum(durations.values()):.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
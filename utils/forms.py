@@ -0,0 +1,91 @@
+"""Remplissage groupé des formulaires React de l'admin
+
+EverShop utilise des champs contrôlés par React : affecter element.value ne
+suffit pas, React garde sa propre copie de la valeur. Le script passe donc par
+le setter natif du prototype puis déclenche input et change, comme le ferait
+une saisie réelle. Tous les champs sont remplis et relus en un seul
+execute_script au lieu d'un send_keys et d'un get_attribute par champ.
+"""
+from selenium.common.exceptions import NoSuchElementException
+
+from utils.waits import RESOLVE_FUNCTION, locators_for_script
+
+_READ_FUNCTION = """
+function readAll(elements, names) {
+  const read = {};
+  for (const name of names) {
+    const el = elements[name];
+    read[name] = el.type === 'checkbox' || el.type === 'radio' ? el.checked : el.value;
+  }
+  return read;
+}
+"""
+
+_FILL_SCRIPT = RESOLVE_FUNCTION + _READ_FUNCTION + """
+const [locators, values] = arguments;
+const elements = resolveAll(locators);
+const missing = Object.keys(values).filter((name) => !elements[name]);
+if (missing.length) return {missing};
+for (const [name, value] of Object.entries(values)) {
+  const el = elements[name];
+  el.focus();
+  if (el.type === 'checkbox' || el.type === 'radio') {
+    if (el.checked !== Boolean(value)) el.click();
+  } else {
+    // Setter natif : contourne la copie de la valeur gardée par React
+    const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+    setter.call(el, String(value));
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+  }
+  el.blur();
+}
+return {values: readAll(elements, Object.keys(values))};
+"""
+
+_READ_SCRIPT = RESOLVE_FUNCTION + _READ_FUNCTION + """
+const [locators, names] = arguments;
+const elements = resolveAll(locators);
+const missing = names.filter((name) => !elements[name]);
+if (missing.length) return {missing};
+return {values: readAll(elements, names)};
+"""
+
+
+def _locators(locators, names):
+    unknown = set(names) - set(locators)
+    if unknown:
+        raise KeyError(f"Champs sans localisateur : {', '.join(sorted(unknown))}")
+    return locators_for_script({name: locators[name] for name in names})
+
+
+def _unpack(result):
+    if result.get("missing"):
+        raise NoSuchElementException(f"Champs introuvables : {', '.join(result['missing'])}")
+    return result["values"]
+
+
+def fill_form(driver, locators, values):
+    """Remplit tous les champs en une commande et renvoie les valeurs relues
+
+    locators : {nom: (By, valeur)} ; values : {nom: valeur à saisir}
+    """
+    return _unpack(driver.execute_script(_FILL_SCRIPT, _locators(locators, values), values))
+
+
+def read_form(driver, locators, names):
+    """Valeurs actuelles des champs donnés, en une commande"""
+    names = list(names)
+    return _unpack(driver.execute_script(_READ_SCRIPT, _locators(locators, names), names))
+
+
+def type_form(driver, elements, locators, values):
+    """Saisie touche par touche, pour les tests qui vérifient la frappe elle-même
+
+    elements donne accès aux champs déjà résolus (une page, par exemple) ;
+    les valeurs obtenues sont relues en une seule commande.
+    """
+    for name, value in values.items():
+        elements[name].clear()
+        elements[name].send_keys(str(value))
+    return read_form(driver, locators, values)
@@ -0,0 +1,140 @@
+"""Registre des entités créées par les tests, supprimées en fin de session
+
+Un test enregistre chaque produit, catégorie ou image qu'il crée (par uuid ou
+URL, ou par SKU / nom quand l'uuid n'est pas encore connu) au lieu de le supprimer
+lui-même : toutes les suppressions partent en un lot parallèle à la fin de
+la session, et un test en échec ne laisse plus rien derrière lui.
+
+Le registre est écrit au fil de l'eau dans ledger/<run>-<worker>.jsonl,
+verrouillé tant que la session tourne. Au démarrage, les registres non
+verrouillés d'autres runs (run planté, machine éteinte) sont balayés :
+leurs entités orphelines sont supprimées.
+"""
+import glob
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.admin_api import AdminApiError
+from utils.bench import current_test
+from utils.browser import try_lock
+from utils.naming import current_run_id, current_worker
+
+DEFAULT_DIRECTORY = "ledger"
+
+# Par type d'entité : méthodes du client pour la supprimer et la retrouver par sa clé
+KINDS = {
+    "product": ("delete_product", "find_product"),
+    "category": ("delete_category", "find_category"),
+    "media": ("delete_image", None),  # Enregistrée par son URL, dans le champ uuid
+}
+
+
+class ResourceLedger:
+    """Entités d'une session (un worker xdist), persistées jusqu'à leur suppression"""
+
+    def __init__(self, client, directory=DEFAULT_DIRECTORY, run_id=None, worker=None, workers=8):
+        self.client = client
+        self.directory = directory
+        self.workers = workers
+        self.entries = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{run_id or current_run_id()}-{worker or current_worker()}.jsonl")
+        self._handle = try_lock(self.path)
+        if self._handle is None:
+            raise RuntimeError(f"Registre déjà utilisé par une autre session : {self.path}")
+
+    def register(self, kind, uuid=None, key=None):
+        """Enregistre une entité à supprimer en fin de session"""
+        if kind not in KINDS:
+            raise KeyError(f"Type d'entité inconnu : {kind}")
+        if uuid is None and key is None:
+            raise ValueError("uuid ou clé (SKU, nom) obligatoire")
+        entry = {"kind": kind, "uuid": uuid, "key": key, "test": current_test()}
+        with self._lock:
+            self.entries.append(entry)
+            # Écrit tout de suite : le registre doit survivre à un plantage du run
+            self._handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._handle.flush()
+        return entry
+
+    def product(self, uuid=None, sku=None):
+        return self.register("product", uuid, sku)
+
+    def category(self, uuid=None, name=None):
+        return self.register("category", uuid, name)
+
+    def media(self, url):
+        return self.register("media", url)
+
+    def teardown(self):
+        """Supprime toutes les entités enregistrées ; renvoie celles qui restent"""
+        with self._lock:
+            entries, self.entries = self.entries, []
+        remaining = purge(self.client, entries, self.workers)
+        with self._lock:
+            self.entries = remaining + self.entries
+            _rewrite(self._handle, self.entries)
+        return remaining
+
+    def close(self):
+        """Libère le registre ; le fichier ne reste que s'il reste des entités"""
+        with self._lock:
+            self._handle.close()
+            if not self.entries:
+                os.remove(self.path)
+
+
+def purge(client, entries, workers=8):
+    """Supprime les entités en parallèle ; renvoie celles dont la suppression a échoué"""
+    if not entries:
+        return []
+    with ThreadPoolExecutor(workers) as executor:
+        deleted = list(executor.map(lambda entry: _delete(client, entry), entries))
+    return [entry for entry, ok in zip(entries, deleted) if not ok]
+
+
+def _delete(client, entry):
+    delete, find = (getattr(client, name) if name else None for name in KINDS[entry["kind"]])
+    try:
+        uuid = entry["uuid"]
+        if uuid is None:
+            found = find(entry["key"])
+            if found is None:
+                return True  # Jamais créée (test arrêté avant la sauvegarde) ou déjà supprimée
+            uuid = found["uuid"]
+        delete(uuid)
+    except AdminApiError as error:
+        return error.status_code == 404  # Déjà supprimée, par le test lui-même par exemple
+    except OSError:
+        return False
+    return True
+
+
+def sweep(client, directory=DEFAULT_DIRECTORY, workers=8):
+    """Supprime les entités des registres abandonnés ; renvoie le nombre d'entités supprimées"""
+    removed = 0
+    for path in glob.glob(os.path.join(directory, "*.jsonl")):
+        handle = try_lock(path)
+        if handle is None:
+            continue  # Session encore en cours
+        try:
+            handle.seek(0)
+            entries = [json.loads(line) for line in handle if line.strip()]
+            remaining = purge(client, entries, workers)
+            removed += len(entries) - len(remaining)
+            _rewrite(handle, remaining)
+        finally:
+            handle.close()
+        if not remaining:
+            os.remove(path)
+    return removed
+
+
+def _rewrite(handle, entries):
+    handle.seek(0)
+    handle.truncate()
+    handle.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+    handle.flush()
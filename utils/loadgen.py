@@ -0,0 +1,255 @@
+"""Générateur de charge HTTP sur l'admin EverShop, sans navigateur
+
+Rejoue au niveau HTTP les parcours de test_create_product et
+test_create_category : login, envoi de l'image, création du produit, création
+de la catégorie, listing, suppressions. Chaque utilisateur virtuel est une
+tâche asyncio avec sa propre session admin (ses cookies) ; toutes partagent
+le même pool de connexions keep-alive.
+
+    python -m utils.loadgen --users 20 --duration 60 --ramp-up 10
+    python -m utils.loadgen --stub --users 50 --duration 10
+
+Le rapport donne, par opération, le débit et les latences p50/p95/p99.
+"""
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+
+from utils import config
+from utils.admin_api import (CATEGORIES_PATH, IMAGES_PATH, LOGIN_PATH, PRODUCTS_PATH,
+                             category_payload, product_payload)
+from utils.bench import percentile
+from utils.naming import Namespace
+
+ERROR_PAUSE = 0.1  # Pause après un parcours en échec, pour ne pas boucler sur un serveur en erreur
+
+OPERATIONS = ("login", "upload_image", "create_product", "create_category", "list_products",
+              "delete_product", "delete_category")
+
+
+class LoadStats:
+    """Latences et erreurs par opération pour un run de charge
+
+    operations fixe l'ordre du rapport ; les opérations non listées suivent
+    dans l'ordre de leur première mesure.
+    """
+
+    def __init__(self, operations=OPERATIONS, title="Charge"):
+        self.operations = tuple(operations)
+        self.title = title
+        self.latencies = {}
+        self.errors = {}
+        self.started = None
+        self.finished = None
+
+    def record(self, operation, seconds, ok=True):
+        if ok:
+            self.latencies.setdefault(operation, []).append(seconds)
+        else:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (time.monotonic() if self.finished is None else self.finished) - self.started
+
+    def summary(self):
+        """Par opération : nombre de requêtes, erreurs, débit et percentiles en secondes"""
+        elapsed = max(self.elapsed, 1e-9)
+        result = {}
+        measured = [operation for operation in {**self.latencies, **self.errors} if operation not in self.operations]
+        for operation in self.operations + tuple(measured):
+            samples = sorted(self.latencies.get(operation, []))
+            errors = self.errors.get(operation, 0)
+            if not samples and not errors:
+                continue
+            result[operation] = {
+                "count": len(samples),
+                "errors": errors,
+                "throughput": len(samples) / elapsed,
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "mean": statistics.mean(samples) if samples else None,
+            }
+        return result
+
+    def report(self):
+        lines = [f"{self.title} : {self.elapsed:.1f}s"]
+        lines.append(f"  {'opération':<16} {'ok':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for operation, s in self.summary().items():
+            latencies = "".join(f" {_ms(s[p]):>8}" for p in ("p50", "p95", "p99"))
+            lines.append(f"  {operation:<16} {s['count']:>7} {s['errors']:>5} {s['throughput']:>8.1f}{latencies}")
+        return "\n".join(lines)
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+class LoadRequestError(Exception):
+    """Réponse HTTP en erreur pendant un parcours"""
+
+
+class VirtualUser:
+    """Utilisateur de l'admin qui enchaîne les parcours de création/suppression"""
+
+    def __init__(self, number, base_url, connector, stats, namespace, image=config.DEFAULT_IMAGE,
+                 email=config.ADMIN_EMAIL, password=config.ADMIN_PASSWORD, timeout=10, content=None):
+        self.number = number
+        self.email = email
+        self.password = password
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.namespace = namespace
+        self.image = image
+        # Contenu de l'image lu une fois (par run_load, partagé entre utilisateurs) et non à chaque parcours
+        self.content = content if content is not None else read_image(image)
+        # Une session (et un cookie jar) par utilisateur, un seul pool de connexions.
+        # unsafe=True : le jar d'aiohttp ignore sinon les cookies posés par une IP
+        self.session = aiohttp.ClientSession(
+            connector=connector, connector_owner=False,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+
+    async def run(self, deadline):
+        """Parcours en boucle jusqu'à l'échéance ; le login n'est fait qu'une fois
+
+        Un parcours en échec est compté puis le suivant démarre ; seul un
+        login refusé arrête l'utilisateur.
+        """
+        try:
+            try:
+                await self._call("login", "POST", LOGIN_PATH,
+                                 json={"email": self.email, "password": self.password})
+            except LoadRequestError:
+                return  # Déjà compté ; sans session, aucun parcours possible
+            while time.monotonic() < deadline:
+                try:
+                    await self.iteration()
+                except LoadRequestError:
+                    await asyncio.sleep(min(ERROR_PAUSE, max(0.0, deadline - time.monotonic())))
+        finally:
+            await self.session.close()
+
+    async def iteration(self):
+        """Un parcours complet : produit avec image, catégorie, listing, suppressions
+
+        Les entités créées sont supprimées même si une étape suivante échoue.
+        """
+        token = self.namespace.token()
+        created = []  # (opération, chemin) des suppressions, dans l'ordre de création
+        try:
+            form = aiohttp.FormData()
+            form.add_field("images", self.content, filename=os.path.basename(self.image),
+                           content_type=mimetypes.guess_type(self.image)[0] or "application/octet-stream")
+            upload = await self._call("upload_image", "POST", f"{IMAGES_PATH}/catalog", data=form)
+            image_url = upload["data"]["files"][0]["url"]
+
+            product = await self._call("create_product", "POST", PRODUCTS_PATH, json=product_payload(
+                f"monstera {token}", self.namespace.sku(), f"plante-{token}", images=[image_url]))
+            created.append(("delete_product", f"{PRODUCTS_PATH}/{product['data']['uuid']}"))
+            category = await self._call("create_category", "POST", CATEGORIES_PATH, json=category_payload(
+                f"Catégorie {token}", f"categorie-{token}"))
+            created.append(("delete_category", f"{CATEGORIES_PATH}/{category['data']['uuid']}"))
+            await self._call("list_products", "GET", "/admin/products")
+        finally:
+            for operation, path in created:
+                try:
+                    await self._call(operation, "DELETE", path)
+                except LoadRequestError:
+                    pass  # Déjà compté dans les statistiques ; les autres suppressions continuent
+
+    async def _call(self, operation, method, path, **kwargs):
+        start = time.monotonic()
+        try:
+            async with self.session.request(method, f"{self.base_url}{path}",
+                                            allow_redirects=False, **kwargs) as response:
+                body = await response.read()
+                if response.status >= 400 or (response.status >= 300 and method == "GET"):
+                    raise LoadRequestError(f"{method} {path} -> {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, LoadRequestError) as error:
+            self.stats.record(operation, time.monotonic() - start, ok=False)
+            raise LoadRequestError(str(error)) from error
+        self.stats.record(operation, time.monotonic() - start)
+        if response.content_type == "application/json":
+            return json.loads(body)
+        return None
+
+
+def read_image(path):
+    with open(path, "rb") as source:
+        return source.read()
+
+
+async def run_load(base_url=None, users=10, duration=30.0, ramp_up=0.0, image=config.DEFAULT_IMAGE,
+                   pool_size=100, namespace=None, email=config.ADMIN_EMAIL, password=config.ADMIN_PASSWORD):
+    """Lance users utilisateurs virtuels, démarrés régulièrement pendant ramp_up secondes"""
+    base_url = base_url or config.BASE_URL
+    namespace = namespace or Namespace()
+    content = read_image(image)  # Avant la boucle d'événements : une seule lecture bloquante
+    stats = LoadStats()
+    connector = aiohttp.TCPConnector(limit=pool_size, keepalive_timeout=30)
+    stats.started = time.monotonic()
+    deadline = stats.started + ramp_up + duration
+    try:
+        tasks = []
+        for number in range(users):
+            if ramp_up and number:
+                await asyncio.sleep(ramp_up / users)
+            user = VirtualUser(number, base_url, connector, stats, namespace, image=image,
+                               email=email, password=password, content=content)
+            tasks.append(asyncio.create_task(user.run(deadline)))
+        await asyncio.gather(*tasks)
+    finally:
+        stats.finished = time.monotonic()
+        await connector.close()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.loadgen", description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=10, help="Utilisateurs virtuels simultanés")
+    parser.add_argument("--duration", type=float, default=30, help="Durée à pleine charge, en secondes")
+    parser.add_argument("--ramp-up", type=float, default=0, help="Montée en charge, en secondes")
+    parser.add_argument("--pool-size", type=int, default=100, help="Connexions keep-alive maximum")
+    parser.add_argument("--image", default=config.DEFAULT_IMAGE)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None, help=f"Instance EverShop (défaut : {config.BASE_URL})")
+    target.add_argument("--stub", action="store_true", help="Serveur de substitution local")
+    parser.add_argument("--stub-latency", type=float, default=config.STUB_LATENCY,
+                        help="Latence ajoutée par le stub à chaque requête, en secondes")
+    parser.add_argument("--output", help="Écrit le résumé JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    stub = None
+    base_url = args.base_url
+    if args.stub:
+        from utils.stub_server import StubEverShop
+        stub = StubEverShop(latency=args.stub_latency).start()
+        base_url = stub.url
+    try:
+        stats = asyncio.run(run_load(base_url, args.users, args.duration, args.ramp_up,
+                                     image=args.image, pool_size=args.pool_size))
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    print(stats.report())
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(stats.summary(), output, indent=2)
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Espaces de noms des données créées par les tests
+
+Les SKU, url keys et noms de catégorie sont préfixés par l'identifiant du
+run et du worker pytest-xdist : deux runs ou deux workers qui tournent en
+même temps contre la même instance EverShop ne peuvent pas entrer en
+collision, contrairement à random.randint(10000, 99999).
+"""
+import itertools
+import os
+import secrets
+import threading
+import time
+
+RUN_ID_ENV = "EVERSHOP_RUN_ID"
+
+
+def current_run_id():
+    """Identifiant du run, partagé par le contrôleur xdist et tous ses workers"""
+    run_id = os.environ.get(RUN_ID_ENV)
+    if not run_id:
+        run_id = time.strftime("%H%M%S") + secrets.token_hex(2)
+        # Les workers xdist héritent de l'environnement du contrôleur
+        os.environ[RUN_ID_ENV] = run_id
+    return run_id
+
+
+def current_worker():
+    """Nom du worker xdist courant ("gw0", "gw1"...) ou "main" hors parallélisme"""
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+class Namespace:
+    """Générateur de valeurs uniques pour un run et un worker donnés"""
+
+    def __init__(self, run_id=None, worker=None):
+        self.run_id = run_id or current_run_id()
+        self.worker = worker or current_worker()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def prefix(self):
+        """Partie commune à toutes les valeurs de ce namespace"""
+        return f"{self.run_id}{self.worker.replace('gw', 'w')}".lower()
+
+    def token(self):
+        """Jeton unique dans le run, utilisable dans une url key"""
+        with self._lock:
+            n = next(self._counter)
+        return f"{self.prefix}n{n}"
+
+    def sku(self):
+        return f"sku{self.token()}"
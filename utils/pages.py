@@ -0,0 +1,325 @@
+"""Pages de l'admin EverShop (page objects)
+
+Chaque page déclare ses localisateurs dans LOCATORS. Ils sont tous résolus
+en un seul execute_script, au moment où la page est prête, puis gardés en
+cache jusqu'à la prochaine navigation : remplir le formulaire produit coûte
+une commande de résolution au lieu d'une recherche par champ.
+
+Les formulaires confirment l'enregistrement par la réponse de l'API
+(wait_for_saved : statut et entité renvoyée), observée dans la page dès son
+arrivée ; le toast n'est plus qu'une vérification facultative.
+
+Les grilles retrouvent une ligne par les paramètres de filtre et de tri de
+l'URL du listing plutôt qu'en parcourant la table : le coût ne dépend pas de
+la taille du catalogue.
+"""
+import re
+from urllib.parse import urlencode
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from utils import config, perf
+from utils.admin_api import CATEGORIES_PATH, PRODUCTS_PATH
+from utils.bench import step
+from utils.browser import navigate
+from utils.forms import fill_form, read_form, type_form
+from utils.waits import (RESOLVE_FUNCTION, locators_for_script, response_mark, wait_and_resolve, wait_for,
+                         wait_for_image, wait_for_response, wait_for_text, wait_until_gone)
+
+_RESOLVE_SCRIPT = RESOLVE_FUNCTION + "return resolveAll(arguments[0]);"
+
+# Ligne cherchée et nombre de lignes de la page, en une commande
+_ROW_SCRIPT = RESOLVE_FUNCTION + """
+return {row: find('xpath', arguments[0]), rows: document.querySelectorAll('table tbody tr').length};
+"""
+
+HEADING = (By.CSS_SELECTOR, "h1.page-heading-title")
+TOAST = (By.CSS_SELECTOR, "div.Toastify__toast-body")
+
+
+class SaveFailed(AssertionError):
+    """L'API a refusé l'enregistrement d'un formulaire"""
+
+    def __init__(self, response):
+        self.response = response
+        body = response.get("body")
+        error = body.get("error") if isinstance(body, dict) else None
+        message = error.get("message") if isinstance(error, dict) else body
+        super().__init__(f"{response['method']} {response['url']} : HTTP {response['status']} ({message})")
+
+
+class BasePage:
+    """Page de l'admin avec résolution groupée de ses éléments"""
+
+    PATH = None
+    LOCATORS = {}
+    READY = None  # Localisateur dont la présence signale que la page est prête
+    NEEDS_IMAGES = False  # Le profil rapide bloque images et polices sur les autres pages
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._elements = None
+
+    @classmethod
+    def url(cls, **query):
+        """URL absolue de la page, avec les paramètres d'URL donnés"""
+        return config.url(f"{cls.PATH}?{urlencode(query)}" if query else cls.PATH)
+
+    @step("navigate")
+    def open(self, **query):
+        """Charge la page (avec les paramètres d'URL donnés) et résout ses éléments"""
+        navigate(self.driver, self.url(**query), needs_images=self.NEEDS_IMAGES)
+        self.wait_ready()
+        perf.after_navigation(self.driver, self.PATH)
+        return self
+
+    def wait_ready(self, timeout=None):
+        """Attend la page (après une navigation déclenchée par un clic par exemple)"""
+        by, value = self.LOCATORS[self.READY]
+        self._elements = wait_and_resolve(self.driver, by, value, self.LOCATORS, timeout=timeout)
+        return self
+
+    def invalidate(self):
+        """Oublie les éléments en cache : à appeler après toute navigation"""
+        self._elements = None
+
+    def element(self, name):
+        if self._elements is None or self._elements.get(name) is None:
+            # Cache vide ou élément rendu après la résolution : on résout à nouveau
+            self._elements = self.driver.execute_script(_RESOLVE_SCRIPT, locators_for_script(self.LOCATORS))
+        element = self._elements.get(name)
+        if element is None:
+            by, value = self.LOCATORS[name]
+            raise NoSuchElementException(f"{type(self).__name__}.{name} introuvable ({by}={value})")
+        return element
+
+    def __getitem__(self, name):
+        return self.element(name)
+
+    def heading(self):
+        """Titre de la page, attendu après une navigation"""
+        return wait_for(self.driver, *HEADING)
+
+    @step("toast")
+    def wait_for_toast(self, text, timeout=None):
+        """Attend le toast Toastify contenant le texte donné"""
+        return wait_for_text(self.driver, *TOAST, text, timeout=timeout)
+
+    def click(self, name):
+        """Clique sur un élément qui déclenche une navigation ou un rendu"""
+        self.element(name).click()
+        self.invalidate()
+
+
+class LoginPage(BasePage):
+    PATH = "/admin/login"
+    READY = "email"
+    LOCATORS = {
+        "email": (By.NAME, "email"),
+        "password": (By.NAME, "password"),
+        "submit": (By.CSS_SELECTOR, "button[type='submit']"),
+    }
+    ERROR = (By.CSS_SELECTOR, "div.Toastify__toast-body, .error-message, .alert-danger, .text-critical")
+
+    @staticmethod
+    def credentials(email=config.ADMIN_EMAIL, password=config.ADMIN_PASSWORD):
+        """Valeur de chaque champ du formulaire, dans l'ordre de saisie"""
+        return {"email": email, "password": password}
+
+    def login(self, email=config.ADMIN_EMAIL, password=config.ADMIN_PASSWORD):
+        """Saisit les identifiants et soumet le formulaire"""
+        for name, value in self.credentials(email, password).items():
+            self[name].send_keys(value)
+        wait_for(self.driver, *self.LOCATORS["submit"], clickable=True)
+        self.click("submit")
+
+    def error(self, timeout=None):
+        """Message d'erreur affiché après un login refusé"""
+        return wait_for(self.driver, *self.ERROR, timeout=timeout)
+
+
+class FormPage(BasePage):
+    """Formulaire d'édition de l'admin, enregistré par le bouton Save"""
+
+    READY = "name"
+    FIELDS = ()  # Champs texte du formulaire, dans l'ordre de saisie
+    API = None  # Chemin de l'API appelée par Save (POST à la création, PATCH à l'édition)
+    SAVE_METHODS = ("POST", "PATCH", "PUT")
+    _save_mark = 0
+
+    @step("fill")
+    def fill(self, values, typing=False):
+        """Remplit le formulaire et renvoie les valeurs relues dans la page
+
+        Par défaut tous les champs sont affectés en un seul script ;
+        typing=True tape chaque valeur touche par touche.
+        """
+        if typing:
+            return type_form(self.driver, self, self.LOCATORS, values)
+        return fill_form(self.driver, self.LOCATORS, values)
+
+    def values(self, *names):
+        """Valeurs actuelles des champs, lues en une commande"""
+        return read_form(self.driver, self.LOCATORS, names or self.FIELDS)
+
+    @step("save")
+    def save(self):
+        """Clique sur Save ; wait_for_saved attend ensuite la réponse de l'API"""
+        wait_for(self.driver, *self.LOCATORS["save"], clickable=True)
+        self._save_mark = response_mark(self.driver)
+        self.click("save")
+        return self
+
+    @step("saved")
+    def wait_for_saved(self, timeout=None):
+        """Attend la réponse de l'API au dernier Save et renvoie l'entité enregistrée
+
+        Lève SaveFailed si l'API répond par une erreur. L'entité est le champ
+        data de la réponse : None seulement si la page est partie avant de lire
+        le corps, dictionnaire vide si le corps lu ne contient pas d'entité.
+        """
+        pattern = rf"^{re.escape(self.API)}(/[^/]+)?$"
+        response = wait_for_response(self.driver, self.SAVE_METHODS, pattern, since=self._save_mark,
+                                     timeout=timeout)
+        if not 200 <= response["status"] < 300:
+            raise SaveFailed(response)
+        body = response["body"]
+        if body is None:
+            return None
+        data = body.get("data") if isinstance(body, dict) else None
+        return data if isinstance(data, dict) else {}
+
+
+class ProductFormPage(FormPage):
+    PATH = "/admin/products/new"
+    API = PRODUCTS_PATH
+    NEEDS_IMAGES = True  # Aperçu de l'image envoyée
+    FIELDS = ("name", "sku", "price", "urlKey", "qty", "weight")
+    LOCATORS = {
+        "name": (By.CSS_SELECTOR, "input#name"),
+        "sku": (By.CSS_SELECTOR, "input#sku"),
+        "price": (By.CSS_SELECTOR, "input#price"),
+        "urlKey": (By.CSS_SELECTOR, "input#urlKey"),
+        "qty": (By.CSS_SELECTOR, "input#qty"),
+        "weight": (By.CSS_SELECTOR, "input#weight"),
+        "image": (By.CSS_SELECTOR, "input[type='file']"),
+        "save": (By.CSS_SELECTOR, "button.button.primary"),
+    }
+    THUMBNAILS = (By.XPATH, "//div[contains(@class, 'image-list')]//img")
+
+    @step("upload")
+    def upload_image(self, path, timeout=None):
+        """Envoie une image par le champ fichier et attend que sa vignette soit affichée"""
+        by, xpath = self.THUMBNAILS
+        count = len(self.driver.find_elements(by, xpath))
+        self["image"].send_keys(path)
+        return wait_for_image(self.driver, by, f"({xpath})[{count + 1}]", timeout=timeout)
+
+
+class CategoryFormPage(FormPage):
+    PATH = "/admin/categories/new"
+    API = CATEGORIES_PATH
+    FIELDS = ("name", "urlKey")
+    LOCATORS = {
+        "name": (By.CSS_SELECTOR, "input#name"),
+        "urlKey": (By.CSS_SELECTOR, "input#urlKey"),
+        "save": (By.CSS_SELECTOR, "button.button.primary"),
+    }
+
+
+def xpath_literal(value):
+    """Littéral de chaîne XPath 1.0 pour une valeur quelconque, apostrophes comprises"""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    # Ni apostrophes ni guillemets possibles : morceaux entre apostrophes, concaténés
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in value.split("'")) + ")"
+
+
+class GridPage(BasePage):
+    """Grille de listing de l'admin (produits, catégories)"""
+
+    READY = "table"
+    LOCATORS = {
+        "table": (By.CSS_SELECTOR, "table"),
+        "new": (By.CSS_SELECTOR, "a.button.primary"),
+    }
+    ROWS = (By.CSS_SELECTOR, "table tbody tr")
+    ROW_XPATH = None  # Ligne de la grille, formatée avec la clé de l'entité en littéral XPath
+    FILTER = None  # Paramètre d'URL qui filtre la grille sur la clé de l'entité
+    SORT = {"ob": "created_at", "od": "desc"}  # Les plus récentes (celles des tests) en tête
+    PAGE_SIZE = 50
+    DELETE_ACTION = (By.XPATH, "//a[span[text()='Delete']]")
+    CONFIRM_DELETE = (By.CSS_SELECTOR, "button.button.critical")
+
+    @classmethod
+    def search_query(cls, key=None, page=1):
+        """Paramètres d'URL de la grille triée (plus récentes d'abord), filtrée sur la clé si possible"""
+        query = dict(cls.SORT, limit=cls.PAGE_SIZE)
+        if key is not None and cls.FILTER:
+            query[cls.FILTER] = key
+        if page > 1:
+            query["page"] = page
+        return query
+
+    def search(self, key=None, page=1):
+        """Ouvre la grille triée, filtrée sur la clé si possible"""
+        return self.open(**self.search_query(key, page))
+
+    def row(self, key, max_pages=None):
+        """Ligne de l'entité, sur la page courante ou retrouvée par le listing
+
+        La grille est filtrée sur la clé par l'URL : la ligne est en principe
+        sur la première page, quelle que soit la taille du catalogue. Si le
+        filtre ne suffit pas (filtre "contient", paramètre ignoré), les pages
+        suivantes sont lues jusqu'à la dernière, ou jusqu'à max_pages : l'erreur
+        dit alors que la recherche n'a pas couvert toute la grille.
+        """
+        xpath = self.row_xpath(key)
+        if self._elements is not None:
+            row, _ = self._lookup(xpath)
+            if row is not None:
+                return row
+        page = 0
+        while max_pages is None or page < max_pages:
+            page += 1
+            self.search(key, page)
+            row, rows = self._lookup(xpath)
+            if row is not None:
+                return row
+            if rows < self.PAGE_SIZE:
+                raise NoSuchElementException(f"{type(self).__name__} : aucune ligne pour '{key}'")
+        raise NoSuchElementException(f"{type(self).__name__} : aucune ligne pour '{key}' dans les "
+                                     f"{max_pages} premières pages (recherche incomplète)")
+
+    def row_xpath(self, key):
+        return self.ROW_XPATH.format(key=xpath_literal(key))
+
+    def _lookup(self, xpath):
+        found = self.driver.execute_script(_ROW_SCRIPT, xpath)
+        return found["row"], found["rows"]
+
+    @step("delete")
+    def delete(self, key, timeout=5):
+        """Sélectionne la ligne, lance l'action Delete et confirme la modale"""
+        checkbox = self.row(key).find_element(By.CSS_SELECTOR, "input[type='checkbox']")
+        self.driver.execute_script("arguments[0].click();", checkbox)
+        wait_for(self.driver, *self.DELETE_ACTION, clickable=True, timeout=timeout).click()
+        confirm = wait_for(self.driver, *self.CONFIRM_DELETE, clickable=True, timeout=timeout)
+        self.driver.execute_script("arguments[0].click();", confirm)
+        wait_until_gone(self.driver, By.XPATH, self.row_xpath(key), timeout=timeout)
+        self.invalidate()
+
+
+class ProductGridPage(GridPage):
+    PATH = "/admin/products"
+    ROW_XPATH = "//table//tr[td[text()={key}]]"
+    FILTER = "sku"
+
+
+class CategoryGridPage(GridPage):
+    PATH = "/admin/categories"
+    ROW_XPATH = "//table//tr[td//a[text()={key}]]"
+    FILTER = "name"
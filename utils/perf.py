@@ -0,0 +1,189 @@
+"""Métriques de performance des pages de l'admin, vues depuis le navigateur
+
+Pour chaque navigation : Navigation Timing, Largest Contentful Paint, long
+tasks, taille du tas JS et Performance.getMetrics (DevTools). LCP et long
+tasks ne sont pas conservés par le navigateur : un observateur est donc
+installé dans chaque document dès sa création (install()).
+
+La collecte attend la fin du chargement (readyState complete et événement
+load terminé) puis un rendu, pour que load et LCP soient renseignés.
+
+Les budgets par route sont déclarés dans BUDGETS (surchargés par le fichier
+JSON désigné par EVERSHOP_PERF_BUDGETS) ; check() renvoie les dépassements,
+y compris les métriques budgétées qui n'ont pas pu être mesurées.
+"""
+import json
+import os
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+from utils.bench import current_test
+from utils.naming import current_run_id, current_worker
+
+DEFAULT_OUTPUT = "perf_output.txt"
+LOAD_TIMEOUT = 15  # Secondes d'attente de l'événement load avant de collecter quand même
+
+# Budgets par route : millisecondes sauf long_tasks (nombre) et heap_mb (Mo)
+BUDGETS = {
+    "/admin/login": {"load": 3000, "lcp": 2500, "long_tasks": 5, "heap_mb": 60},
+    "/admin/products/new": {"load": 4000, "lcp": 3000, "long_tasks": 10, "heap_mb": 100},
+    "/admin/products": {"load": 4000, "lcp": 3000, "long_tasks": 10, "heap_mb": 100},
+    "/admin/categories": {"load": 4000, "lcp": 3000, "long_tasks": 10, "heap_mb": 100},
+}
+
+_CDP_METRICS = ("TaskDuration", "ScriptDuration", "LayoutDuration", "RecalcStyleDuration",
+                "JSHeapUsedSize", "Nodes", "LayoutCount", "Documents")
+
+# Exécuté au début de chaque document, avant les scripts de la page
+_OBSERVER_SCRIPT = """
+window.__evershopPerf = {lcp: null, longTasks: []};
+try {
+  new PerformanceObserver((list) => {
+    const entries = list.getEntries();
+    window.__evershopPerf.lcp = entries[entries.length - 1].startTime;
+  }).observe({type: 'largest-contentful-paint', buffered: true});
+  new PerformanceObserver((list) => {
+    for (const e of list.getEntries()) window.__evershopPerf.longTasks.push(e.duration);
+  }).observe({type: 'longtask', buffered: true});
+} catch (e) {}
+"""
+
+# Asynchrone : attend la fin de l'événement load, puis un rendu (l'entrée LCP
+# est émise après le rendu) ; au-delà du délai, collecte ce qui est disponible
+_COLLECT_SCRIPT = """
+const [timeoutMs, done] = arguments;
+const started = performance.now();
+const read = () => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const observed = window.__evershopPerf || {lcp: null, longTasks: []};
+  return {
+    ttfb: nav ? nav.responseStart - nav.requestStart : null,
+    dom_content_loaded: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+    load: nav && nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : null,
+    transfer_kb: nav ? nav.transferSize / 1024 : null,
+    lcp: observed.lcp,
+    long_tasks: observed.longTasks.length,
+    long_tasks_ms: observed.longTasks.reduce((a, b) => a + b, 0),
+    heap_mb: performance.memory ? performance.memory.usedJSHeapSize / 1048576 : null,
+  };
+};
+let sent = false;
+const finish = () => { if (!sent) { sent = true; done(read()); } };
+const poll = () => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  if (document.readyState === 'complete' && nav && nav.loadEventEnd > 0) {
+    requestAnimationFrame(() => setTimeout(finish, 0));
+    setTimeout(finish, 100);  // Onglet en arrière-plan : pas de rendu
+  } else if (performance.now() - started > timeoutMs) {
+    finish();
+  } else {
+    setTimeout(poll, 25);
+  }
+};
+poll();
+"""
+
+_lock = threading.Lock()
+_records = []
+_violations = []
+_enabled = False
+_budgets = None
+
+
+def load_budgets(path=None):
+    """Budgets par défaut, complétés ou remplacés par un fichier JSON"""
+    budgets = {route: dict(limits) for route, limits in BUDGETS.items()}
+    path = path or os.environ.get("EVERSHOP_PERF_BUDGETS")
+    if path:
+        with open(path, encoding="utf-8") as source:
+            for route, limits in json.load(source).items():
+                budgets.setdefault(route, {}).update(limits)
+    return budgets
+
+
+def enable(enabled=True, budgets_path=None):
+    """Active la collecte à chaque navigation des page objects"""
+    global _enabled, _budgets
+    _enabled = enabled
+    _budgets = load_budgets(budgets_path)
+
+
+def enabled():
+    return _enabled
+
+
+def install(driver):
+    """Installe les observateurs LCP / long tasks dans tous les futurs documents"""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _OBSERVER_SCRIPT})
+        driver.execute_cdp_cmd("Performance.enable", {})
+    except WebDriverException:
+        pass  # Navigateur sans DevTools : seules les métriques de la page seront lues
+
+
+def collect(driver, route, timeout=LOAD_TIMEOUT):
+    """Métriques de la page courante, pour la route donnée, une fois son chargement terminé"""
+    metrics = driver.execute_async_script(_COLLECT_SCRIPT, timeout * 1000)
+    try:
+        cdp = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        metrics["devtools"] = {m["name"]: m["value"] for m in cdp if m["name"] in _CDP_METRICS}
+    except WebDriverException:
+        metrics["devtools"] = {}
+    metrics["route"] = route
+    return metrics
+
+
+def check(metrics, budgets=None):
+    """Dépassements de budget : liste de messages, vide si tout est dans les clous
+
+    Une métrique budgétée mais absente (page jamais chargée, LCP non émis)
+    est un dépassement : elle ne peut pas être déclarée dans le budget.
+    """
+    global _budgets
+    if budgets is None:
+        if _budgets is None:
+            _budgets = load_budgets()
+        budgets = _budgets
+    violations = []
+    for name, limit in budgets.get(metrics["route"], {}).items():
+        value = metrics.get(name)
+        if value is None:
+            violations.append(f"{metrics['route']} : {name} non mesuré (budget {limit})")
+        elif value > limit:
+            violations.append(f"{metrics['route']} : {name} = {value:.0f} > {limit}")
+    return violations
+
+
+def after_navigation(driver, route, budgets=None):
+    """Collecte et vérifie les métriques si la collecte est active"""
+    if not _enabled:
+        return None
+    metrics = collect(driver, route)
+    violations = check(metrics, budgets)
+    with _lock:
+        _records.append(dict(metrics, run_id=current_run_id(), worker=current_worker(), test=current_test()))
+        _violations.extend(violations)
+    return metrics
+
+
+def pop_violations():
+    """Dépassements constatés depuis le dernier appel (préparation et exécution du test)"""
+    with _lock:
+        violations = list(_violations)
+        _violations.clear()
+    return violations
+
+
+def reset(path):
+    open(path, "w").close()
+
+
+def flush(path):
+    """Ajoute les métriques du process au fichier, une ligne JSON par navigation"""
+    with _lock:
+        lines = "".join(json.dumps(item) + "\n" for item in _records)
+        _records.clear()
+    if lines:
+        with open(path, "a", encoding="utf-8") as output:
+            output.write(lines)
@@ -0,0 +1,465 @@
+"""Enregistrement du trafic HTTP des tests UI et rejeu sans navigateur
+
+Avec pytest --record <dossier>, chaque test réussi qui utilise un navigateur
+devient une cassette <dossier>/<test>.json : les requêtes du navigateur vers
+l'instance (documents, fetch, XHR, lues dans le journal de performance de
+Chrome) et celles de l'API admin (AdminApiClient), dans l'ordre.
+
+* Les valeurs dynamiques sont paramétrées : préfixe du namespace (SKU, url
+  keys, noms), identifiants admin, et uuid renvoyés par l'API, capturés dans
+  la réponse qui les crée puis réinjectés dans les requêtes suivantes.
+* Chaque réponse garde son statut, son type de contenu et la forme de son
+  JSON (clés et types, sans les valeurs).
+
+Le rejeu envoie les requêtes avec requests, cassettes en parallèle, chacune
+avec sa session (cookie obtenu par login) et un namespace neuf, et compare
+chaque réponse à l'enregistrement. Les entités créées sont supprimées à la
+fin du rejeu.
+
+    pytest test_admin_login.py test_create_product.py test_create_category.py --record recordings
+    python -m utils.replay recordings --concurrency 8
+
+Les fichiers envoyés par un formulaire multipart ne sont pas dans le journal
+de Chrome : le rejeu envoie l'image de test images/monstera.jpg.
+"""
+import argparse
+import base64
+import glob
+import json
+import mimetypes
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import quote, urlsplit
+
+import requests
+from selenium.common.exceptions import WebDriverException
+
+from utils import config
+from utils.admin_api import CATEGORIES_PATH, PRODUCTS_PATH, AdminApiClient, AdminApiError
+from utils.ledger import purge
+from utils.naming import Namespace
+
+DEFAULT_DIRECTORY = "recordings"
+# Types de requêtes du navigateur enregistrés (les ressources statiques ne le sont pas)
+BROWSER_TYPES = ("Document", "XHR", "Fetch")
+# Un POST sur ces chemins crée une entité : supprimée après le rejeu
+CREATED = {PRODUCTS_PATH: "product", CATEGORIES_PATH: "category"}
+
+_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"\{\{(\w+)(:url)?\}\}")
+_UPLOAD_FIELD = re.compile(rb'name="([^"]+)"; filename=')
+_MISSING = object()
+
+
+def recorded_literals():
+    """Valeurs dynamiques d'un test du run courant, par nom de variable"""
+    return {"ns": Namespace().prefix, "email": config.ADMIN_EMAIL, "password": config.ADMIN_PASSWORD}
+
+
+def cassette_name(nodeid):
+    return re.sub(r"[^\w.-]+", "_", nodeid).strip("_")[:150]
+
+
+def shape(value):
+    """Forme d'une valeur JSON : types des feuilles, clés des objets, premier élément des listes"""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [shape(value[0])] if value else []
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    return "string"
+
+
+def compare(expected, actual, path="$"):
+    """Écarts entre une forme enregistrée et une valeur reçue (les clés en plus sont admises)"""
+    if expected == "null" or actual is None:
+        return []  # Champ facultatif : rempli à l'enregistrement ou au rejeu seulement
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            return [f"{path} : objet attendu, {_kind(actual)} reçu"]
+        problems = []
+        for key, expected_item in expected.items():
+            if key not in actual:
+                problems.append(f"{path}.{key} : absent")
+            else:
+                problems.extend(compare(expected_item, actual[key], f"{path}.{key}"))
+        return problems
+    if isinstance(expected, list):
+        if not isinstance(actual, list):
+            return [f"{path} : liste attendue, {_kind(actual)} reçu"]
+        return compare(expected[0], actual[0], f"{path}[0]") if expected and actual else []
+    kind = _kind(actual)
+    return [] if kind == expected else [f"{path} : {expected} attendu, {kind} reçu"]
+
+
+def _kind(value):
+    kind = shape(value)
+    return "objet" if isinstance(kind, dict) else "liste" if isinstance(kind, list) else kind
+
+
+def _json(text):
+    if not text:
+        return _MISSING
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _MISSING
+
+
+def _is_json(mime):
+    return bool(mime) and "json" in mime
+
+
+def _header(headers, name):
+    return next((value for key, value in headers.items() if key.lower() == name.lower()), None)
+
+
+def _upload_field(body):
+    """Nom du champ fichier d'un corps multipart ("images" par défaut)"""
+    if isinstance(body, str):
+        body = body.encode("utf-8", "replace")
+    match = _UPLOAD_FIELD.search(body or b"")
+    return match.group(1).decode("utf-8") if match else "images"
+
+
+def browser_traffic(driver, origin):
+    """Requêtes du navigateur vers origin depuis la dernière lecture du journal de performance"""
+    sent, done = {}, []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method, params = message["method"], message.get("params", {})
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            redirect = params.get("redirectResponse")
+            if redirect and request_id in sent:
+                # Chaque étape d'une redirection garde le même requestId
+                done.append(dict(sent.pop(request_id), status=redirect["status"],
+                                 response_type=redirect.get("mimeType")))
+            request = params["request"]
+            if params.get("type") in BROWSER_TYPES and request["url"].startswith(origin):
+                sent[request_id] = {
+                    "id": request_id, "at": entry["timestamp"], "method": request["method"], "url": request["url"],
+                    "request_type": _header(request.get("headers", {}), "Content-Type"),
+                    "body": request.get("postData"),
+                }
+        elif method == "Network.responseReceived" and request_id in sent:
+            response = params["response"]
+            # Revalidation par le cache du navigateur : le rejeu, sans cache, reçoit 200
+            status = 200 if response["status"] == 304 else response["status"]
+            sent[request_id].update(status=status, response_type=response.get("mimeType"))
+        elif method == "Network.loadingFinished" and "status" in sent.get(request_id, {}):
+            done.append(sent.pop(request_id))
+        elif method == "Network.loadingFailed":
+            sent.pop(request_id, None)
+    for interaction in done:
+        request_id = interaction.pop("id")
+        interaction["response"] = _response_body(driver, request_id) if _is_json(interaction["response_type"]) \
+            else None
+    return done
+
+
+def _response_body(driver, request_id):
+    try:
+        result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+    except WebDriverException:
+        return None  # Corps déjà libéré par le navigateur : seul le statut sera vérifié
+    if result.get("base64Encoded"):
+        return base64.b64decode(result["body"]).decode("utf-8", "replace")
+    return result.get("body")
+
+
+def _parameterize(text, substitutions):
+    for value, placeholder in substitutions:
+        text = text.replace(value, placeholder)
+    return text
+
+
+def _uuids(value, path=()):
+    """(chemin, uuid) de chaque uuid d'une réponse JSON"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _uuids(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _uuids(item, path + (index,))
+    elif isinstance(value, str) and _UUID.match(value):
+        yield list(path), value
+
+
+def build_cassette(name, interactions, literals, authenticated=False):
+    """Cassette paramétrée à partir du trafic enregistré, rangé par ordre chronologique"""
+    substitutions = []
+    for variable, value in literals.items():
+        if value:
+            substitutions += [(value, f"{{{{{variable}}}}}"), (quote(value, safe=""), f"{{{{{variable}:url}}}}")]
+    captured = {}
+    steps = []
+    for interaction in sorted(interactions, key=lambda item: item["at"]):
+        # Les valeurs les plus longues d'abord : un uuid ne doit pas être masqué par un préfixe
+        ordered = sorted(substitutions, key=lambda item: -len(item[0]))
+        split = urlsplit(interaction["url"])
+        step = {
+            "method": interaction["method"],
+            "path": _parameterize(split.path + (f"?{split.query}" if split.query else ""), ordered),
+            "status": interaction["status"],
+            "response_type": (interaction.get("response_type") or "").split(";")[0].strip() or None,
+        }
+        request_type = interaction.get("request_type") or ""
+        if request_type.startswith("multipart/"):
+            step["upload"] = interaction.get("upload") or _upload_field(interaction.get("body"))
+        elif interaction.get("body"):
+            step["body"] = _parameterize(interaction["body"], ordered)
+            step["request_type"] = request_type or None
+        body = _json(interaction.get("response"))
+        if body is not _MISSING:
+            step["shape"] = shape(body)
+            captures = {}
+            for path, value in _uuids(body):
+                if value not in captured:
+                    variable = captured[value] = f"uuid{len(captured) + 1}"
+                    captures[variable] = path
+                    substitutions.append((value, f"{{{{{variable}}}}}"))
+            if captures:
+                step["captures"] = captures
+        steps.append(step)
+    return {"name": name, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "authenticated": authenticated,
+            "steps": steps}
+
+
+class TrafficRecorder:
+    """Enregistre le trafic d'un test à la fois et l'écrit en cassette"""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, origin=None):
+        self.directory = directory
+        self.origin = origin
+        self._lock = threading.Lock()
+        self._api = []
+        self._active = False
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self, driver=None):
+        if driver is not None:
+            # Vide le journal : login du pool, tests précédents sur le même navigateur
+            driver.get_log("performance")
+        with self._lock:
+            self._api = []
+            self._active = True
+
+    def on_response(self, response, *args, **kwargs):
+        """Crochet de réponse requests, à ajouter à la session du client de l'API"""
+        if not self._active:
+            return
+        request = response.request
+        request_type = request.headers.get("Content-Type") or ""
+        body = request.body
+        interaction = {"at": time.time() * 1000, "method": request.method, "url": request.url,
+                       "request_type": request_type, "status": response.status_code,
+                       "response_type": response.headers.get("Content-Type"), "body": None, "response": None}
+        if request_type.startswith("multipart/"):
+            interaction["upload"] = _upload_field(body)
+        elif body:
+            interaction["body"] = body.decode("utf-8", "replace") if isinstance(body, bytes) else body
+        if _is_json(interaction["response_type"]):
+            interaction["response"] = response.text
+        with self._lock:
+            self._api.append(interaction)
+
+    def stop(self, driver, nodeid, literals, authenticated=False, save=True):
+        """Arrête l'enregistrement ; écrit la cassette du test si save, renvoie son chemin"""
+        with self._lock:
+            self._active = False
+            traffic, self._api = self._api, []
+        if not save:
+            return None
+        if driver is not None:
+            traffic += browser_traffic(driver, self.origin or config.BASE_URL)
+        if not traffic:
+            return None
+        path = os.path.join(self.directory, f"{cassette_name(nodeid)}.json")
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(build_cassette(nodeid, traffic, literals, authenticated), output, indent=1,
+                      ensure_ascii=False)
+        return path
+
+
+@dataclass
+class ReplayResult:
+    name: str
+    requests: int = 0
+    seconds: float = 0.0
+    failures: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.failures
+
+
+def substitute(text, values):
+    """Remplace les {{variable}} (ou {{variable:url}}, encodée pour une URL) par leur valeur"""
+    def value(match):
+        if match.group(1) not in values:
+            raise KeyError(f"variable {match.group(1)} non capturée")
+        raw = str(values[match.group(1)])
+        return quote(raw, safe="") if match.group(2) else raw
+    return _PLACEHOLDER.sub(value, text)
+
+
+def _lookup(body, path):
+    for key in path:
+        try:
+            body = body[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return body
+
+
+def _send(client, step, values, image):
+    url = client.base_url + substitute(step["path"], values)
+    kwargs = {"allow_redirects": False, "timeout": client.timeout}
+    if "upload" in step:
+        mime = mimetypes.guess_type(image)[0] or "application/octet-stream"
+        with open(image, "rb") as handle:
+            return client.session.request(step["method"], url, **kwargs,
+                                          files={step["upload"]: (os.path.basename(image), handle, mime)})
+    if "body" in step:
+        kwargs["data"] = substitute(step["body"], values).encode("utf-8")
+        if step.get("request_type"):
+            kwargs["headers"] = {"Content-Type": step["request_type"]}
+    return client.session.request(step["method"], url, **kwargs)
+
+
+def check(step, response):
+    """Écarts entre une réponse rejouée et l'enregistrement : statut, type, forme du JSON"""
+    problems = []
+    if response.status_code != step["status"]:
+        problems.append(f"statut {response.status_code}, {step['status']} enregistré")
+    mime = response.headers.get("Content-Type", "").split(";")[0].strip()
+    if step.get("response_type") and mime != step["response_type"]:
+        problems.append(f"type {mime or '-'}, {step['response_type']} enregistré")
+    if "shape" in step:
+        body = _json(response.text)
+        if body is _MISSING:
+            problems.append("réponse non JSON")
+        else:
+            problems.extend(compare(step["shape"], body))
+    return problems
+
+
+def replay(cassette, variables, base_url=None, image=config.DEFAULT_IMAGE, timeout=10):
+    """Rejoue une cassette avec sa propre session ; supprime ensuite les entités créées"""
+    result = ReplayResult(cassette["name"])
+    client = AdminApiClient(base_url=base_url, pool_size=1, timeout=timeout)
+    values = dict(variables)
+    created = []
+    start = time.monotonic()
+    try:
+        if cassette.get("authenticated"):
+            client.login()
+        for index, step in enumerate(cassette["steps"], 1):
+            label = f"{index}. {step['method']} {step['path']}"
+            try:
+                response = _send(client, step, values, image)
+            except (KeyError, requests.RequestException) as error:
+                result.failures.append(f"{label} : {error}")
+                break  # Les étapes suivantes dépendent de celle-ci
+            result.requests += 1
+            result.failures += [f"{label} : {problem}" for problem in check(step, response)]
+            body = _json(response.text) if step.get("captures") else _MISSING
+            for variable, path in step.get("captures", {}).items():
+                value = _lookup(body, path) if body is not _MISSING else None
+                if value is None:
+                    continue  # Signalé par l'étape qui l'utilise
+                values[variable] = value
+                kind = CREATED.get(urlsplit(step["path"]).path)
+                if step["method"] == "POST" and kind and path == ["data", "uuid"]:
+                    created.append({"kind": kind, "uuid": value, "key": None})
+    except (AdminApiError, requests.RequestException) as error:
+        result.failures.append(f"login : {error}")
+    finally:
+        result.seconds = time.monotonic() - start
+        try:
+            for entry in purge(client, created):
+                result.failures.append(f"nettoyage impossible : {entry['kind']} {entry['uuid']}")
+        finally:
+            client.close()
+    return result
+
+
+def load_cassettes(directory=DEFAULT_DIRECTORY):
+    cassettes = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as source:
+            cassettes.append(json.load(source))
+    return cassettes
+
+
+def run_all(cassettes, base_url=None, concurrency=8, repeat=1, image=config.DEFAULT_IMAGE):
+    """Rejoue chaque cassette repeat fois, concurrency rejeux simultanés, chacun dans son namespace"""
+    replay_id = f"rp{secrets.token_hex(3)}"
+    jobs = [cassette for _ in range(repeat) for cassette in cassettes]
+
+    def job(indexed):
+        index, cassette = indexed
+        variables = dict(recorded_literals(), ns=Namespace(replay_id, f"r{index}").prefix)
+        return replay(cassette, variables, base_url, image)
+
+    with ThreadPoolExecutor(max(1, concurrency)) as executor:
+        return list(executor.map(job, enumerate(jobs)))
+
+
+def report(results, seconds):
+    lines = []
+    for result in results:
+        mark = "✓" if result.ok else "✗"
+        lines.append(f"{mark} {result.name} : {result.requests} requêtes en {result.seconds * 1000:.0f}ms")
+        lines += [f"    {failure}" for failure in result.failures]
+    failed = sum(not result.ok for result in results)
+    lines.append(f"{len(results)} rejeux, {sum(result.requests for result in results)} requêtes, "
+                 f"{failed} en échec, {seconds:.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.replay", description=__doc__.split("\n")[0])
+    parser.add_argument("directory", nargs="?", default=DEFAULT_DIRECTORY, help="Dossier des cassettes")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None, help=f"Instance EverShop (défaut : {config.BASE_URL})")
+    target.add_argument("--stub", action="store_true", help="Serveur de substitution local")
+    parser.add_argument("--concurrency", type=int, default=8, help="Rejeux simultanés")
+    parser.add_argument("--repeat", type=int, default=1, help="Rejeux par cassette")
+    args = parser.parse_args(argv)
+
+    cassettes = load_cassettes(args.directory)
+    if not cassettes:
+        print(f"Aucune cassette dans {args.directory} (enregistrer avec pytest --record {args.directory})")
+        return 1
+    stub = None
+    if args.stub:
+        from utils.stub_server import StubEverShop
+        stub = StubEverShop().start()
+        config.set_base_url(stub.url)
+    elif args.base_url:
+        config.set_base_url(args.base_url)
+    start = time.monotonic()
+    try:
+        results = run_all(cassettes, concurrency=args.concurrency, repeat=args.repeat)
+    finally:
+        if stub is not None:
+            stub.stop()
+    print(report(results, time.monotonic() - start))
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+"""Ressources (mémoire, CPU) des navigateurs pendant les tests
+
+Avec pytest --resources, l'arbre de processus de chaque navigateur
+(chromedriver, Chrome et ses processus de rendu) est échantillonné pendant
+chaque test : RSS de départ, de fin et maximal, temps CPU consommé. Une ligne
+JSON par test est ajoutée à resources_output.txt.
+
+Un navigateur réutilisé d'un test à l'autre (pool) dont la mémoire grimpe
+test après test est signalé : pente de la régression linéaire du RSS de fin
+de test, en Mo par test. Le rapport de fin de session propose aussi un nombre
+de workers xdist pour la machine, d'après la mémoire disponible et le CPU
+consommé par navigateur.
+
+Avec pytest --kill-orphans, les navigateurs orphelins d'un run précédent
+sont tués au démarrage : Chrome dont le process Python parent a disparu,
+reconnu à son profil evershop-*, et chromedriver enregistré par
+utils.browser (fichier de PID) ou parent d'un tel Chrome. Les autres
+chromedriver de la machine (nœud Grid, autre job) ne sont jamais touchés.
+
+    python -m utils.resources report resources_output.txt
+    python -m utils.resources sweep --dry-run
+
+psutil est facultatif : sans lui, la surveillance et le balayage sont inactifs.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from utils import config
+from utils.bench import percentile
+from utils.naming import current_run_id, current_worker
+
+try:
+    import psutil
+except ImportError:  # psutil absent : pas de surveillance des processus
+    psutil = None
+
+DEFAULT_OUTPUT = "resources_output.txt"
+# Préfixe des user-data-dir créés par utils.browser (profils jetables et persistants)
+PROFILE_MARKER = "evershop-"
+# Un fichier par chromedriver lancé par les tests : PID et heure de création
+DRIVER_PID_DIR = os.path.join(tempfile.gettempdir(), "evershop-drivers")
+BROWSER_NAMES = ("chrome", "chromium", "headless_shell")
+DRIVER_NAMES = ("chromedriver",)
+MB = 1024 * 1024
+
+
+def available():
+    return psutil is not None
+
+
+def driver_pid(driver):
+    """PID du chromedriver d'un navigateur Selenium, racine de son arbre de processus"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def register_driver(driver, directory=DRIVER_PID_DIR):
+    """Enregistre le chromedriver d'un navigateur des tests, seul reconnu par sweep()"""
+    pid = driver_pid(driver)
+    if psutil is None or pid is None:
+        return
+    try:
+        created = psutil.Process(pid).create_time()
+    except psutil.Error:
+        return
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{pid}.json"), "w", encoding="utf-8") as output:
+        json.dump({"pid": pid, "create_time": created}, output)
+
+
+def registered_drivers(directory=DRIVER_PID_DIR):
+    """PID des chromedriver enregistrés encore en vie ; les fichiers périmés sont supprimés
+
+    L'heure de création écarte un PID réutilisé depuis par un autre processus.
+    """
+    if psutil is None or not os.path.isdir(directory):
+        return set()
+    pids = set()
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        try:
+            with open(path, encoding="utf-8") as source:
+                registered = json.load(source)
+            alive = psutil.Process(registered["pid"]).create_time() == registered["create_time"]
+        except (OSError, ValueError, KeyError, psutil.Error):
+            alive = False
+        if alive:
+            pids.add(registered["pid"])
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return pids
+
+
+def _tree(pid):
+    try:
+        root = psutil.Process(pid)
+        return [root] + root.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+class _Sampler(threading.Thread):
+    """Échantillonne un arbre de processus jusqu'à stop()"""
+
+    def __init__(self, pid, interval):
+        super().__init__(daemon=True, name=f"resources-{pid}")
+        self.pid = pid
+        self.interval = interval
+        self.baseline = {}  # CPU de chaque processus au début du test
+        self.cpu = {}  # Dernier CPU lu de chaque processus, gardé s'il se termine
+        self.rss = []
+        self.processes = 0
+        self._done = threading.Event()
+        self.sample(baseline=True)
+
+    def sample(self, baseline=False):
+        rss = 0
+        processes = _tree(self.pid)
+        for process in processes:
+            try:
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    times = process.cpu_times()
+            except psutil.Error:
+                continue  # Processus de rendu terminé entre-temps
+            self.cpu[process.pid] = times.user + times.system
+            if baseline:
+                self.baseline[process.pid] = self.cpu[process.pid]
+        self.rss.append(rss)
+        self.processes = max(self.processes, len(processes))
+
+    @property
+    def cpu_seconds(self):
+        return sum(cpu - self.baseline.get(pid, 0.0) for pid, cpu in self.cpu.items())
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.sample()
+
+
+class ResourceMonitor:
+    """Mesure l'arbre de processus du navigateur de chaque test"""
+
+    def __init__(self, interval=0.25, growth_mb_per_test=5.0, min_tests=5):
+        if psutil is None:
+            raise RuntimeError("La surveillance des ressources demande psutil (pip install psutil)")
+        self.interval = interval
+        self.growth_mb_per_test = growth_mb_per_test
+        self.min_tests = min_tests
+        self.records = []
+        self._uses = {}  # Tests déjà passés sur chaque navigateur
+        self._current = None
+
+    def start(self, driver, nodeid):
+        """Commence à échantillonner le navigateur du test (sans effet sans navigateur)"""
+        pid = driver_pid(driver) if driver is not None else None
+        if pid is None:
+            self._current = None
+            return
+        sampler = _Sampler(pid, self.interval)
+        sampler.start()
+        self._current = (sampler, nodeid, time.monotonic())
+
+    def stop(self):
+        """Arrête l'échantillonnage ; renvoie la mesure du test"""
+        if self._current is None:
+            return None
+        sampler, nodeid, start = self._current
+        self._current = None
+        sampler.stop()
+        seconds = time.monotonic() - start
+        self._uses[sampler.pid] = self._uses.get(sampler.pid, 0) + 1
+        record = {
+            "run_id": current_run_id(), "worker": current_worker(), "test": nodeid,
+            "browser": sampler.pid, "browser_tests": self._uses[sampler.pid], "seconds": seconds,
+            "cpu_seconds": sampler.cpu_seconds,
+            "cpu_percent": 100 * sampler.cpu_seconds / seconds if seconds else 0.0,
+            "rss_start_mb": sampler.rss[0] / MB, "rss_end_mb": sampler.rss[-1] / MB,
+            "rss_peak_mb": max(sampler.rss) / MB, "processes": sampler.processes,
+        }
+        self.records.append(record)
+        return record
+
+    def trends(self):
+        return growth_trends(self.records, self.growth_mb_per_test, self.min_tests)
+
+    def report(self):
+        return report(self.records, self.growth_mb_per_test, self.min_tests)
+
+    def flush(self, path):
+        """Ajoute les mesures du process au fichier, une ligne JSON par test"""
+        lines = "".join(json.dumps(record) + "\n" for record in self.records)
+        if lines:
+            with open(path, "a", encoding="utf-8") as output:
+                output.write(lines)
+
+
+def growth_trends(records, growth_mb_per_test=5.0, min_tests=5):
+    """Navigateurs réutilisés dont le RSS de fin de test croît d'au moins growth_mb_per_test par test"""
+    series = {}
+    for record in records:
+        series.setdefault((record["run_id"], record["worker"], record["browser"]), []).append(record)
+    trends = []
+    for (_, worker, browser), tests in series.items():
+        if len(tests) < min_tests:
+            continue
+        slope, _ = statistics.linear_regression([test["browser_tests"] for test in tests],
+                                                [test["rss_end_mb"] for test in tests])
+        if slope >= growth_mb_per_test:
+            trends.append({"worker": worker, "browser": browser, "tests": len(tests), "mb_per_test": slope,
+                           "growth_mb": tests[-1]["rss_end_mb"] - tests[0]["rss_start_mb"],
+                           "last_test": tests[-1]["test"]})
+    return trends
+
+
+def suggest_workers(records, available_mb=None, cpus=None, browsers_per_worker=None, headroom=0.8):
+    """Workers xdist que la machine peut porter : le plus petit nombre entre mémoire et CPU
+
+    Un worker garde browsers_per_worker navigateurs (taille du pool) au pic de
+    RSS mesuré ; un navigateur consomme le p95 du CPU mesuré par test.
+    """
+    if not records:
+        return None
+    if available_mb is None:
+        available_mb = psutil.virtual_memory().available / MB
+    cpus = cpus or os.cpu_count() or 1
+    browsers = browsers_per_worker or config.POOL_SIZE
+    peak_mb = max(record["rss_peak_mb"] for record in records) * browsers
+    cpu = max(percentile(sorted(record["cpu_percent"] for record in records), 95) / 100, 0.05) * browsers
+    by_memory = math.floor(available_mb * headroom / peak_mb) if peak_mb else cpus
+    by_cpu = math.floor(cpus * headroom / cpu)
+    return {"workers": max(1, min(by_memory, by_cpu)), "by_memory": by_memory, "by_cpu": by_cpu,
+            "worker_mb": peak_mb, "worker_cpus": cpu}
+
+
+def report(records, growth_mb_per_test=5.0, min_tests=5, top=5):
+    """Résumé lisible : tests les plus gourmands, fuites présumées, workers conseillés"""
+    if not records:
+        return "Aucune mesure de navigateur"
+    lines = [f"{len(records)} tests mesurés sur {len({r['browser'] for r in records})} navigateur(s)"]
+    for record in sorted(records, key=lambda r: -r["rss_peak_mb"])[:top]:
+        lines.append(f"  {record['rss_peak_mb']:>7.0f} Mo max  {record['cpu_percent']:>5.0f}% CPU  "
+                     f"{record['processes']:>2} processus  {record['test']}")
+    for trend in growth_trends(records, growth_mb_per_test, min_tests):
+        lines.append(f"  ✗ navigateur {trend['browser']} ({trend['worker']}) : +{trend['mb_per_test']:.1f} Mo "
+                     f"par test sur {trend['tests']} tests (+{trend['growth_mb']:.0f} Mo, "
+                     f"dernier : {trend['last_test']})")
+    if psutil is not None:
+        sizing = suggest_workers(records)
+        lines.append(f"  Workers conseillés : {sizing['workers']} ({sizing['worker_mb']:.0f} Mo et "
+                     f"{sizing['worker_cpus']:.2f} CPU par worker ; mémoire : {sizing['by_memory']}, "
+                     f"CPU : {sizing['by_cpu']})")
+    return "\n".join(lines)
+
+
+def _is_browser(name):
+    return name.lower().startswith(BROWSER_NAMES) and not _is_driver(name)
+
+
+def _is_driver(name):
+    return name.lower().startswith(DRIVER_NAMES)
+
+
+def _marked(process, marker):
+    """Chrome lancé par les tests : son user-data-dir porte le préfixe des profils"""
+    try:
+        return any(arg.startswith("--user-data-dir=") and marker in arg for arg in process.cmdline())
+    except psutil.Error:
+        return False
+
+
+def _orphaned(process):
+    """Aucun process Python parmi les ancêtres : le run qui l'a lancé a disparu"""
+    try:
+        return not any(parent.name().lower().startswith(("python", "pytest")) for parent in process.parents())
+    except psutil.Error:
+        return False
+
+
+def find_orphans(processes=None, marker=PROFILE_MARKER, drivers=None):
+    """Processus chromedriver / Chrome des tests dont le run est terminé
+
+    drivers : PID des chromedriver enregistrés (par défaut registered_drivers()).
+    """
+    if processes is None:
+        processes = psutil.process_iter() if psutil is not None else []
+    if drivers is None:
+        drivers = registered_drivers()
+    orphans = []
+    for process in processes:
+        try:
+            name = process.name()
+            if _is_driver(name):
+                # Seulement un chromedriver des tests : enregistré, ou parent d'un Chrome des tests.
+                # Un chromedriver inconnu, même inactif et sans parent, appartient à quelqu'un d'autre
+                children = [child for child in process.children() if _is_browser(child.name())]
+                candidate = process.pid in drivers or any(_marked(child, marker) for child in children)
+            elif _is_browser(name):
+                candidate = _marked(process, marker)
+            else:
+                continue
+        except psutil.Error:
+            continue
+        if candidate and _orphaned(process):
+            orphans.append(process)
+    return orphans
+
+
+def sweep(dry_run=False, marker=PROFILE_MARKER, timeout=3):
+    """Tue les navigateurs orphelins et leurs processus ; renvoie [(pid, nom)]"""
+    if psutil is None:
+        return []
+    victims = {}
+    for process in find_orphans(marker=marker):
+        for member in [process] + _tree(process.pid)[1:]:
+            victims[member.pid] = member
+    killed = []
+    for process in victims.values():
+        try:
+            killed.append((process.pid, process.name()))
+            if not dry_run:
+                process.kill()
+        except psutil.Error:
+            continue
+    if not dry_run:
+        psutil.wait_procs(list(victims.values()), timeout=timeout)
+    return killed
+
+
+def reset(path):
+    open(path, "w").close()
+
+
+def load(path=DEFAULT_OUTPUT):
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.resources", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="Résumé des mesures d'un run")
+    report_parser.add_argument("path", nargs="?", default=DEFAULT_OUTPUT)
+    report_parser.add_argument("--growth", type=float, default=5.0, help="Croissance signalée, en Mo par test")
+    report_parser.add_argument("--min-tests", type=int, default=5, help="Tests par navigateur avant d'en juger")
+    sweep_parser = commands.add_parser("sweep", help="Tue les navigateurs orphelins des runs précédents")
+    sweep_parser.add_argument("--dry-run", action="store_true", help="Liste sans tuer")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        print(report(load(args.path), args.growth, args.min_tests))
+        return 0
+    if psutil is None:
+        print("✗ psutil absent (pip install psutil)")
+        return 1
+    killed = sweep(dry_run=args.dry_run)
+    for pid, name in killed:
+        print(f"{'Orphelin' if args.dry_run else 'Tué'} : {name} ({pid})")
+    print(f"{len(killed)} processus orphelin(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""Catalogue de masse pour mesurer les grilles de l'admin à l'échelle
+
+Crée N produits (tous avec l'image images/monstera.jpg, envoyée une seule
+fois) et M catégories via l'API admin, par lots traités en parallèle sur le
+pool de connexions keep-alive du client. Toutes les entités portent
+l'identifiant du run dans leur nom, SKU et url key, et leurs uuid sont
+consignés lot par lot dans seed-<run>.json : un seeding interrompu se
+supprime en bloc comme un seeding complet.
+
+    python -m utils.seed create --products 1000 --categories 100
+    python -m utils.seed teardown <run_id>
+    python -m utils.seed curve --sizes 1000,10000,100000
+    python -m utils.seed curve --sizes 100,1000 --stub
+
+curve remplit le catalogue palier par palier et mesure à chaque palier le
+listing, le filtrage et la pagination des grilles produits et catégories.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import config
+from utils.admin_api import (CATEGORIES_PATH, PRODUCTS_PATH, AdminApiClient, AdminApiError,
+                             category_payload, product_payload)
+from utils.bench import percentile
+from utils.naming import current_run_id
+
+DEFAULT_CURVE_OUTPUT = "seed_curve.txt"
+PAGE_SIZE = 50  # Comme utils.pages.GridPage
+
+
+def manifest_path(run_id, directory="."):
+    return os.path.join(directory, f"seed-{run_id}.json")
+
+
+class Seeder:
+    """Création et suppression en masse des entités d'un run"""
+
+    def __init__(self, client, run_id=None, workers=16, batch_size=500, image=config.DEFAULT_IMAGE, directory="."):
+        self.client = client
+        self.run_id = run_id or current_run_id()
+        self.tag = f"seed{self.run_id}".lower()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.image = image
+        self.manifest_path = manifest_path(self.run_id, directory)
+        self.manifest = {"run_id": self.run_id, "base_url": client.base_url, "products": [], "categories": []}
+        self.errors = []
+        self._image_url = None
+        self._lock = threading.Lock()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as source:
+                self.manifest.update(json.load(source))
+
+    @property
+    def products(self):
+        return len(self.manifest["products"])
+
+    @property
+    def categories(self):
+        return len(self.manifest["categories"])
+
+    def sku(self, n):
+        return f"{self.tag}-{n}"
+
+    def category_name(self, n):
+        return f"Catégorie {self.tag} {n}"
+
+    def create(self, products=0, categories=0):
+        """Ajoute products produits et categories catégories au catalogue du run"""
+        if products and self._image_url is None:
+            self._image_url = self.client.upload_image(self.image)
+        start = self.products
+        self._run("products", PRODUCTS_PATH, [
+            product_payload(f"monstera {self.tag} {n}", self.sku(n), f"{self.tag}-p{n}", images=[self._image_url])
+            for n in range(start, start + products)
+        ])
+        start = self.categories
+        self._run("categories", CATEGORIES_PATH, [
+            category_payload(self.category_name(n), f"{self.tag}-c{n}") for n in range(start, start + categories)
+        ])
+
+    def teardown(self):
+        """Supprime toutes les entités consignées pour le run, puis le manifeste"""
+        for kind, path in (("products", PRODUCTS_PATH), ("categories", CATEGORIES_PATH)):
+            uuids = self.manifest[kind]
+            remaining = []
+            for start in range(0, len(uuids), self.batch_size):
+                batch = uuids[start:start + self.batch_size]
+                with ThreadPoolExecutor(self.workers) as executor:
+                    results = executor.map(lambda uuid: self._delete(path, uuid), batch)
+                    remaining.extend(uuid for uuid, deleted in zip(batch, results) if not deleted)
+            self.manifest[kind] = remaining
+        if self.products or self.categories:
+            self._save()
+        elif os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+
+    def _run(self, kind, path, payloads):
+        for start in range(0, len(payloads), self.batch_size):
+            with ThreadPoolExecutor(self.workers) as executor:
+                created = list(executor.map(lambda payload: self._create(path, payload),
+                                            payloads[start:start + self.batch_size]))
+            self.manifest[kind].extend(uuid for uuid in created if uuid)
+            self._save()
+
+    def _create(self, path, payload):
+        try:
+            return self.client.request("POST", path, json=payload)["uuid"]
+        except (AdminApiError, OSError) as error:
+            with self._lock:
+                self.errors.append(str(error))
+            return None
+
+    def _delete(self, path, uuid):
+        try:
+            self.client.request("DELETE", f"{path}/{uuid}")
+        except AdminApiError as error:
+            # Déjà supprimée : rien à garder dans le manifeste
+            return error.status_code == 404
+        except OSError:
+            return False
+        return True
+
+    def _save(self):
+        with open(self.manifest_path, "w", encoding="utf-8") as output:
+            json.dump(self.manifest, output)
+
+
+def time_listing(client, path, samples=5, **params):
+    """Médiane et p95 (secondes) du chargement d'une page de listing"""
+    durations = []
+    for _ in range(samples):
+        start = time.monotonic()
+        client.page(path, **params)
+        durations.append(time.monotonic() - start)
+    durations.sort()
+    return {"median": statistics.median(durations), "p95": percentile(durations, 95)}
+
+
+def measure_listings(seeder, samples=5):
+    """Listing, filtre et dernière page des grilles produits et catégories"""
+    client = seeder.client
+    sort = {"ob": "created_at", "od": "desc", "limit": PAGE_SIZE}
+    results = {}
+    for grid, count, key, value in (
+            ("/admin/products", seeder.products, "sku", seeder.sku(0)),
+            ("/admin/categories", seeder.categories, "name", seeder.category_name(0))):
+        if not count:
+            continue
+        last_page = max(1, math.ceil(count / PAGE_SIZE))
+        results[f"{grid} list"] = time_listing(client, grid, samples, **sort)
+        results[f"{grid} filter"] = time_listing(client, grid, samples, **sort, **{key: value})
+        results[f"{grid} last page"] = time_listing(client, grid, samples, **sort, page=last_page)
+    return results
+
+
+def curve(seeder, sizes, category_ratio=0.1, samples=5, output=None):
+    """Remplit le catalogue palier par palier et mesure les grilles à chaque palier"""
+    rows = []
+    for size in sorted(sizes):
+        start = time.monotonic()
+        seeder.create(products=max(0, size - seeder.products),
+                      categories=max(0, int(size * category_ratio) - seeder.categories))
+        seeding = time.monotonic() - start
+        print(f"{size} produits, {seeder.categories} catégories (seeding {seeding:.1f}s)")
+        for operation, timing in measure_listings(seeder, samples).items():
+            row = {"run_id": seeder.run_id, "size": size, "operation": operation, **timing}
+            rows.append(row)
+            print(f"  {operation:<28} médiane {timing['median'] * 1000:>8.1f}ms  p95 {timing['p95'] * 1000:>8.1f}ms")
+            if output:
+                with open(output, "a", encoding="utf-8") as out:
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.seed", description=__doc__.split("\n")[0])
+    parser.add_argument("--base-url", default=None, help=f"Instance EverShop (défaut : {config.BASE_URL})")
+    parser.add_argument("--workers", type=int, default=16, help="Requêtes simultanées")
+    parser.add_argument("--batch-size", type=int, default=500, help="Entités par lot consigné")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create_parser = commands.add_parser("create", help="Crée produits et catégories pour un run")
+    create_parser.add_argument("--products", type=int, default=1000)
+    create_parser.add_argument("--categories", type=int, default=100)
+    create_parser.add_argument("--run-id", default=None, help="Complète un run existant")
+    teardown_parser = commands.add_parser("teardown", help="Supprime les entités d'un run")
+    teardown_parser.add_argument("run_id")
+    curve_parser = commands.add_parser("curve", help="Courbe de latence des grilles par taille de catalogue")
+    curve_parser.add_argument("--sizes", default="1000,10000,100000",
+                              help="Paliers de produits, séparés par des virgules")
+    curve_parser.add_argument("--category-ratio", type=float, default=0.1, help="Catégories par produit")
+    curve_parser.add_argument("--samples", type=int, default=5, help="Mesures par page et par palier")
+    curve_parser.add_argument("--output", default=DEFAULT_CURVE_OUTPUT)
+    curve_parser.add_argument("--keep", action="store_true", help="Garde le catalogue après la mesure")
+    # Le stub s'arrête avec la commande : un manifeste create/teardown n'y survivrait pas
+    curve_parser.add_argument("--stub", action="store_true", help="Serveur de substitution local")
+    args = parser.parse_args(argv)
+
+    stub = None
+    base_url = args.base_url
+    if getattr(args, "stub", False):
+        if base_url:
+            parser.error("--stub et --base-url sont incompatibles")
+        from utils.stub_server import StubEverShop
+        stub = StubEverShop().start()
+        base_url = stub.url
+    client = AdminApiClient(base_url=base_url, pool_size=args.workers)
+    run_id = getattr(args, "run_id", None)
+    seeder = Seeder(client, run_id, workers=args.workers, batch_size=args.batch_size)
+    try:
+        if args.command == "create":
+            seeder.create(args.products, args.categories)
+            print(f"Run {seeder.run_id} : {seeder.products} produits, {seeder.categories} catégories "
+                  f"(manifeste {seeder.manifest_path})")
+        elif args.command == "teardown":
+            seeder.teardown()
+            print(f"Run {seeder.run_id} : {seeder.products} produits et {seeder.categories} catégories restants")
+        else:
+            try:
+                curve(seeder, [int(size) for size in args.sizes.split(",")], args.category_ratio,
+                      args.samples, args.output)
+            finally:
+                if not args.keep:
+                    seeder.teardown()
+    finally:
+        client.close()
+        if stub is not None:
+            stub.stop()
+    for error in seeder.errors[:10]:
+        print(f"✗ {error}")
+    return 1 if seeder.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Délai de propagation des créations de l'admin vers la vitrine
+
+Après la création d'un produit ou d'une catégorie, la page de la vitrine
+(sous son url key, voir config.STOREFRONT_PRODUCT_URL et
+STOREFRONT_CATEGORY_URL) est sondée jusqu'à ce qu'elle affiche l'entité :
+
+* time_to_visible : secondes entre la réponse de l'API et la première page
+  qui affiche l'entité ;
+* cold_ms : latence de cette première page (cache de la vitrine froid) ;
+  warm_ms : latences des chargements suivants (cache chaud).
+
+Le sondage s'adapte : il commence à la moitié du délai habituel de ce type
+de page (historique des runs précédents), puis l'intervalle croît
+géométriquement sans descendre sous la latence de la page. Les mesures sont
+ajoutées run après run à storefront_output.txt ; le rapport en donne les
+distributions par type de page.
+
+    pytest test_create_product.py test_create_category.py --storefront
+    python -m utils.storefront probe --runs 10 --stub --stub-propagation 0.5
+    python -m utils.storefront report
+"""
+import argparse
+import html
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from utils import config
+from utils.admin_api import AdminApiClient, AdminApiError
+from utils.bench import current_test, percentile
+from utils.ledger import purge
+from utils.naming import Namespace, current_run_id, current_worker
+
+DEFAULT_OUTPUT = "storefront_output.txt"
+KINDS = ("product", "category", "product_in_category")
+
+
+def product_url(url_key, uuid=""):
+    return config.url(config.STOREFRONT_PRODUCT_URL.format(url_key=url_key, uuid=uuid))
+
+
+def category_url(url_key, uuid=""):
+    return config.url(config.STOREFRONT_CATEGORY_URL.format(url_key=url_key, uuid=uuid))
+
+
+def shows(page, text):
+    """La page affiche le texte, tel quel ou échappé en HTML"""
+    return text in page or html.escape(text, quote=False) in page or html.escape(text) in page
+
+
+class PropagationProbe:
+    """Sonde les pages de la vitrine et garde une mesure par page attendue"""
+
+    def __init__(self, timeout=60.0, initial=0.05, factor=1.6, maximum=2.0, warm_samples=5, history=()):
+        self.timeout = timeout
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.warm_samples = warm_samples
+        self.records = []
+        self._history = {}
+        self._lock = threading.Lock()
+        for record in history:
+            if record.get("time_to_visible") is not None:
+                self._history.setdefault(record["kind"], []).append(record["time_to_visible"])
+
+    def expected(self, kind):
+        """Délai de propagation habituel pour ce type de page (médiane), ou None"""
+        with self._lock:
+            samples = self._history.get(kind)
+            return statistics.median(samples) if samples else None
+
+    def product(self, url_key, name, started=None, uuid=""):
+        return self.wait_visible("product", product_url(url_key, uuid), name, started)
+
+    def category(self, url_key, name, started=None, uuid=""):
+        return self.wait_visible("category", category_url(url_key, uuid), name, started)
+
+    def product_in_category(self, category_key, product_name, started=None, uuid=""):
+        return self.wait_visible("product_in_category", category_url(category_key, uuid), product_name, started)
+
+    def wait_visible(self, kind, url, text, started=None):
+        """Sonde url jusqu'à une réponse 200 qui affiche text ; renvoie la mesure
+
+        started : instant (time.monotonic) de la création, par défaut maintenant.
+        """
+        started = time.monotonic() if started is None else started
+        deadline = started + self.timeout
+        expected = self.expected(kind)
+        if expected:
+            # Inutile de sonder avant que la propagation n'ait habituellement lieu
+            time.sleep(max(0.0, min(started + expected / 2, deadline) - time.monotonic()))
+        delay, attempts, statuses = self.initial, 0, {}
+        cold = visible_at = None
+        with requests.Session() as session:
+            while True:
+                attempts += 1
+                start = time.monotonic()
+                try:
+                    response = session.get(url, timeout=self.maximum * 5)
+                    status, page = response.status_code, response.text
+                except requests.RequestException as error:
+                    status, page = type(error).__name__, ""
+                latency = time.monotonic() - start
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if status == 200 and shows(page, text):
+                    cold, visible_at = latency, time.monotonic()
+                    break
+                if time.monotonic() >= deadline:
+                    break
+                # Pas plus vite que la page ne répond, jamais plus d'un intervalle maximum
+                delay = min(max(delay * self.factor, latency), self.maximum)
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            warm = [self._timed(session, url) for _ in range(self.warm_samples)] if cold is not None else []
+        record = {
+            "run_id": current_run_id(), "worker": current_worker(), "test": current_test(), "kind": kind,
+            "url": url, "visible": cold is not None,
+            "time_to_visible": visible_at - started if visible_at is not None else None,
+            "attempts": attempts, "statuses": statuses,
+            "cold_ms": cold * 1000 if cold is not None else None,
+            "warm_ms": [seconds * 1000 for seconds in warm if seconds is not None],
+        }
+        with self._lock:
+            self.records.append(record)
+            if record["time_to_visible"] is not None:
+                self._history.setdefault(kind, []).append(record["time_to_visible"])
+        return record
+
+    @staticmethod
+    def _timed(session, url):
+        start = time.monotonic()
+        try:
+            session.get(url, timeout=10).raise_for_status()
+        except requests.RequestException:
+            return None
+        return time.monotonic() - start
+
+    def flush(self, path):
+        """Ajoute les mesures à l'historique, une ligne JSON par page sondée"""
+        with self._lock:
+            lines = "".join(json.dumps(record) + "\n" for record in self.records)
+            self.records.clear()
+        if lines:
+            with open(path, "a", encoding="utf-8") as output:
+                output.write(lines)
+
+
+def load(path=DEFAULT_OUTPUT):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def _distribution(samples):
+    samples = sorted(samples)
+    if not samples:
+        return "-"
+    return (f"p50 {percentile(samples, 50):.0f} p95 {percentile(samples, 95):.0f} "
+            f"max {samples[-1]:.0f}")
+
+
+def report(records):
+    """Distributions par type de page : délai de propagation, latence froide et chaude (ms)"""
+    if not records:
+        return "Aucune mesure de la vitrine"
+    lines = []
+    for kind in KINDS:
+        selected = [record for record in records if record["kind"] == kind]
+        if not selected:
+            continue
+        visible = [record for record in selected if record["visible"]]
+        runs = len({record["run_id"] for record in selected})
+        lines.append(f"{kind} : {len(visible)}/{len(selected)} visibles sur {runs} run(s)")
+        lines.append(f"  propagation (ms) {_distribution([r['time_to_visible'] * 1000 for r in visible])}")
+        lines.append(f"  froid (ms)       {_distribution([r['cold_ms'] for r in visible])}")
+        lines.append(f"  chaud (ms)       {_distribution([ms for r in visible for ms in r['warm_ms']])}")
+        lines.append(f"  sondages         {_distribution([r['attempts'] for r in selected])}")
+    return "\n".join(lines)
+
+
+def probe_once(client, probe, namespace, workers=3):
+    """Crée une catégorie et un produit rangé dedans, puis sonde les trois pages en parallèle"""
+    token = namespace.token()
+    category_name, category_key = f"Catégorie vitrine {token}", f"vitrine-{token}"
+    product_name, product_key = f"monstera vitrine {token}", f"plante{token}"
+    created = []
+    try:
+        category = client.create_category(category_name, category_key)
+        created.append({"kind": "category", "uuid": category["uuid"], "key": None})
+        category_created = time.monotonic()
+        product = client.create_product(product_name, f"sku{token}", product_key,
+                                        category_id=category.get("category_id"))
+        created.append({"kind": "product", "uuid": product["uuid"], "key": None})
+        product_created = time.monotonic()
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(lambda call: call(), [
+                lambda: probe.product(product_key, product_name, product_created, product["uuid"]),
+                lambda: probe.category(category_key, category_name, category_created, category["uuid"]),
+                lambda: probe.product_in_category(category_key, product_name, product_created, category["uuid"]),
+            ]))
+    finally:
+        purge(client, created)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.storefront", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    probe_parser = commands.add_parser("probe", help="Crée des entités et mesure leur propagation")
+    target = probe_parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None, help=f"Instance EverShop (défaut : {config.BASE_URL})")
+    target.add_argument("--stub", action="store_true", help="Serveur de substitution local")
+    probe_parser.add_argument("--stub-propagation", type=float, default=0.0,
+                              help="Délai de propagation simulé par le stub, en secondes")
+    probe_parser.add_argument("--runs", type=int, default=5, help="Créations successives")
+    probe_parser.add_argument("--timeout", type=float, default=60.0, help="Attente maximale par page")
+    probe_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    report_parser = commands.add_parser("report", help="Distributions des mesures enregistrées")
+    report_parser.add_argument("path", nargs="?", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        print(report(load(args.path)))
+        return 0
+
+    stub = None
+    if args.stub:
+        from utils.stub_server import StubEverShop
+        stub = StubEverShop(propagation=args.stub_propagation).start()
+        config.set_base_url(stub.url)
+    elif args.base_url:
+        config.set_base_url(args.base_url)
+    probe = PropagationProbe(timeout=args.timeout, history=load(args.output))
+    client = AdminApiClient()
+    namespace = Namespace()
+    invisible = 0
+    try:
+        for run in range(1, args.runs + 1):
+            for record in probe_once(client, probe, namespace):
+                invisible += not record["visible"]
+                delay = "invisible" if not record["visible"] else f"{record['time_to_visible'] * 1000:.0f}ms"
+                print(f"{run:>3} {record['kind']:<20} {delay:>10}  {record['attempts']} sondage(s)")
+    except (AdminApiError, requests.RequestException) as error:
+        print(f"✗ {error}")
+        return 1
+    finally:
+        client.close()
+        if stub is not None:
+            stub.stop()
+        probe.flush(args.output)
+    print(report(load(args.output)))
+    return 1 if invisible else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
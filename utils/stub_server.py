@@ -0,0 +1,529 @@
+"""Serveur local qui imite l'admin EverShop (pages et API)
+
+Sert les pages dont les tests ont besoin — login, tableau de bord,
+formulaires produit et catégorie, grilles de listing — avec les mêmes
+sélecteurs et les mêmes toasts Toastify que l'admin, ainsi que l'API JSON
+utilisée par utils.admin_api. Les données sont gardées en mémoire : le
+harnais (attentes, pool, fixtures) tourne sans EverShop ni base de données.
+
+La vitrine sert chaque produit et chaque catégorie sous son url key (la
+catégorie liste ses produits), après un délai de propagation facultatif.
+
+    pytest --stub                      # toute la session contre le stub
+    pytest --stub --stub-latency 0.2   # avec 200 ms ajoutées à chaque requête
+"""
+import html
+import itertools
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid as uuidlib
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils import config
+from utils.admin_api import (CATEGORIES_PATH, FILES_PATH, GRAPHQL_PATH, IMAGES_PATH, LOGIN_PATH,
+                             MEDIA_PATH, PRODUCTS_PATH, SESSION_COOKIE)
+
+LOGIN_PAGE = "/admin/login"
+MEDIA_LIMIT = 1000  # Images gardées en mémoire ; les plus anciennes sont oubliées
+
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?')
+_FILENAME = re.compile(rb'filename="([^"]*)"')
+_EDIT_PAGE = re.compile(r"^/admin/(products|categories)/edit/([^/]+)$")
+
+_LAYOUT = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>.Toastify {{position: fixed; top: 1em; right: 1em;}} .modal {{position: fixed; inset: 30%;}}</style>
+</head><body>
+{nav}
+{content}
+<div class="Toastify"></div>
+<script>
+function toast(message) {{
+  const body = document.createElement('div');
+  body.className = 'Toastify__toast-body';
+  body.textContent = message;
+  const box = document.createElement('div');
+  box.className = 'Toastify__toast';
+  box.appendChild(body);
+  document.querySelector('.Toastify').appendChild(box);
+}}
+{script}
+</script>
+</body></html>"""
+
+_NAV = """<nav class="admin-navigation">
+<a href="/admin">Dashboard</a>
+<a href="/admin/products">Catalogue</a>
+<a href="/admin/products">Produits</a>
+<a href="/admin/categories">Catégories</a>
+</nav>"""
+
+_LOGIN_CONTENT = """<h1 class="login-title">Admin Login</h1>
+<form id="loginForm">
+<input type="email" name="email" id="email">
+<input type="password" name="password" id="password">
+<button type="submit" class="button primary">Sign in</button>
+</form>"""
+
+_LOGIN_SCRIPT = """
+document.getElementById('loginForm').addEventListener('submit', async (event) => {
+  event.preventDefault();
+  const form = event.target;
+  const response = await fetch('%s', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({email: form.email.value, password: form.password.value}),
+  });
+  if (response.ok) {
+    window.location.href = '/admin';
+  } else {
+    toast((await response.json()).error.message);
+  }
+});
+""" % LOGIN_PATH
+
+_FORM_SCRIPT = """
+// Comme l'admin : l'image est envoyée dès sa sélection et sa vignette affichée
+const file = document.querySelector("input[type='file']");
+if (file) file.addEventListener('change', async () => {
+  for (const image of file.files) {
+    const data = new FormData();
+    data.append('images', image);
+    const upload = await fetch('%s/catalog', {method: 'POST', body: data});
+    const thumbnail = document.createElement('img');
+    thumbnail.className = 'product-image';
+    thumbnail.src = (await upload.json()).data.files[0].url;
+    document.querySelector('.image-list').appendChild(thumbnail);
+  }
+});
+document.querySelector('button.button.primary').addEventListener('click', async (event) => {
+  event.preventDefault();
+  const form = document.querySelector('form');
+  const body = {};
+  for (const input of form.querySelectorAll('input[data-field]')) body[input.dataset.field] = input.value;
+  if (file) body.images = [...document.querySelectorAll('.image-list img')].map((img) => img.getAttribute('src'));
+  const uuid = form.dataset.uuid;
+  const response = await fetch(uuid ? form.dataset.api + '/' + uuid : form.dataset.api, {
+    method: uuid ? 'PATCH' : 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify(body),
+  });
+  const result = await response.json();
+  if (!response.ok) return toast(result.error.message);
+  // Comme l'admin : la page d'édition remplace la page de création
+  form.dataset.uuid = result.data.uuid;
+  history.replaceState(null, '', form.dataset.edit + result.data.uuid);
+  document.querySelector('h1.page-heading-title').textContent = form.dataset.editTitle;
+  toast(form.dataset.message);
+});
+""" % IMAGES_PATH
+
+_GRID_SCRIPT = """
+const grid = document.querySelector('table');
+const action = document.querySelector('a.delete-action');
+const modal = document.querySelector('.modal');
+grid.addEventListener('change', () => {
+  action.hidden = !grid.querySelector('tbody input:checked');
+});
+action.addEventListener('click', (event) => {
+  event.preventDefault();
+  modal.hidden = false;
+});
+modal.querySelector('button.critical').addEventListener('click', async () => {
+  for (const box of grid.querySelectorAll('tbody input:checked')) {
+    const response = await fetch(grid.dataset.api + '/' + box.value, {method: 'DELETE'});
+    if (response.ok) box.closest('tr').remove();
+  }
+  modal.hidden = true;
+  action.hidden = true;
+});
+"""
+
+# Champs des formulaires : (id de l'input, champ de l'API, type)
+_PRODUCT_FIELDS = (("name", "name", "text"), ("sku", "sku", "text"), ("price", "price", "text"),
+                   ("urlKey", "url_key", "text"), ("qty", "qty", "text"), ("weight", "weight", "text"))
+_CATEGORY_FIELDS = (("name", "name", "text"), ("urlKey", "url_key", "text"))
+
+# Par ressource : champs du formulaire, chemin de l'API, libellés et toast de l'admin
+_RESOURCES = {
+    "products": {
+        "fields": _PRODUCT_FIELDS, "api": PRODUCTS_PATH, "image": True,
+        "new_title": "Create a new product", "edit_title": "Editing product",
+        "message": "Product saved successfully!", "grid_title": "Products", "new_label": "New Product",
+    },
+    "categories": {
+        "fields": _CATEGORY_FIELDS, "api": CATEGORIES_PATH, "image": False,
+        "new_title": "Create a new category", "edit_title": "Editing category",
+        "message": "Category saved successfully!", "grid_title": "Categories", "new_label": "New Category",
+    },
+}
+
+
+class StubStore:
+    """Produits et catégories créés sur le serveur de substitution"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.products = {}
+        self.categories = {}
+        self.sessions = set()
+        self.sequence = itertools.count(1)  # Ordre de création, exposé comme created_at
+        self.media = {}  # URL -> contenu des images envoyées
+        self.visible_at = {}  # uuid -> instant (monotonic) où la vitrine sert l'entité
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, comme EverShop derrière Node
+    server_version = "EverShopStub/1.0"
+    disable_nagle_algorithm = True  # En-têtes et corps sont écrits séparément
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def store(self):
+        return self.server.store
+
+    def do_GET(self):
+        self._simulate_latency()
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        if path == "/favicon.ico":
+            return self._send(204, b"", "image/x-icon")
+        if path.startswith(MEDIA_PATH + "/"):
+            return self._media(path)
+        if path == LOGIN_PAGE:
+            return self._page("Admin Login", _LOGIN_CONTENT, _LOGIN_SCRIPT, nav=False)
+        if not path.startswith("/admin"):
+            return self._storefront(path[1:])
+        if not self._authenticated():
+            return self._redirect(LOGIN_PAGE)
+        if path == "/admin":
+            return self._page("Dashboard", '<h1 class="page-heading-title">Dashboard</h1>')
+        if path == "/admin/products":
+            return self._grid("products", ("name", "sku", "price", "qty"))
+        if path == "/admin/categories":
+            return self._grid("categories", ("name", "url_key"))
+        if path in ("/admin/products/new", "/admin/categories/new"):
+            return self._form(path.split("/")[2])
+        match = _EDIT_PAGE.match(path)
+        if match:
+            with self.store.lock:
+                item = getattr(self.store, match.group(1)).get(match.group(2))
+            if item is not None:
+                return self._form(match.group(1), item)
+        self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        self._simulate_latency()
+        path = urlsplit(self.path).path
+        if path == LOGIN_PATH:
+            return self._login()
+        if not self._authenticated():
+            return self._unauthorized()
+        if path == PRODUCTS_PATH:
+            return self._create(self.store.products, ("name", "sku", "url_key"))
+        if path == CATEGORIES_PATH:
+            return self._create(self.store.categories, ("name", "url_key"))
+        if path.startswith(IMAGES_PATH + "/"):
+            return self._upload(path[len(IMAGES_PATH) + 1:])
+        if path == GRAPHQL_PATH:
+            return self._graphql()
+        self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_PATCH(self):
+        self._simulate_latency()
+        if not self._authenticated():
+            return self._unauthorized()
+        items, uuid = self._item_path(urlsplit(self.path).path)
+        body = self._read_json()
+        with self.store.lock:
+            item = items.get(uuid) if items is not None else None
+            if item is not None:
+                item.update(body, uuid=uuid)
+        if item is None:
+            return self._send_json(404, {"error": {"message": "Not found"}})
+        self._send_json(200, {"data": item})
+
+    def do_DELETE(self):
+        self._simulate_latency()
+        if not self._authenticated():
+            return self._unauthorized()
+        path = urlsplit(self.path).path
+        if path.startswith(FILES_PATH + "/"):
+            return self._delete_media(f"{MEDIA_PATH}/{path[len(FILES_PATH) + 1:]}")
+        items, uuid = self._item_path(path)
+        item = None
+        if items is not None:
+            with self.store.lock:
+                item = items.pop(uuid, None)
+        if item is None:
+            return self._send_json(404, {"error": {"message": "Not found"}})
+        self._send_json(200, {"data": item})
+
+    def _simulate_latency(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def _item_path(self, path):
+        """(dictionnaire, uuid) pour /api/products/<uuid> ou /api/categories/<uuid>"""
+        for prefix, items in ((PRODUCTS_PATH, self.store.products), (CATEGORIES_PATH, self.store.categories)):
+            if path.startswith(prefix + "/"):
+                return items, path[len(prefix) + 1:]
+        return None, None
+
+    def _login(self):
+        body = self._read_json()
+        if (body.get("email"), body.get("password")) != (config.ADMIN_EMAIL, config.ADMIN_PASSWORD):
+            return self._send_json(400, {"error": {"message": "Invalid email or password"}})
+        session_id = uuidlib.uuid4().hex
+        with self.store.lock:
+            self.store.sessions.add(session_id)
+        self._send_json(200, {"data": {}}, cookies={SESSION_COOKIE: session_id})
+
+    def _create(self, items, required):
+        body = self._read_json()
+        missing = [field for field in required if not body.get(field)]
+        if missing:
+            return self._send_json(400, {"error": {"message": f"Missing fields: {', '.join(missing)}"}})
+        item = dict(body, uuid=str(uuidlib.uuid4()))
+        with self.store.lock:
+            item["created_at"] = next(self.store.sequence)
+            if items is self.store.categories:
+                item["category_id"] = item["created_at"]  # Référencé par le category_id des produits
+            items[item["uuid"]] = item
+            self.store.visible_at[item["uuid"]] = time.monotonic() + self.server.propagation
+        self._send_json(200, {"data": item})
+
+    def _upload(self, destination):
+        body = self._read_body()
+        boundary = _BOUNDARY.search(self.headers.get("Content-Type", ""))
+        parts = body.split(b"--" + boundary.group(1).encode())[1:-1] if boundary else []
+        files = []
+        for part in parts:
+            head, _, content = part.partition(b"\r\n\r\n")
+            filename = _FILENAME.search(head)
+            if filename is None:
+                continue
+            extension = os.path.splitext(filename.group(1).decode())[1].lower() or ".jpg"
+            url = f"{MEDIA_PATH}/{destination}/{uuidlib.uuid4().hex}{extension}"
+            content = content[:-2]  # \r\n avant le séparateur suivant
+            with self.store.lock:
+                self.store.media[url] = content
+                while len(self.store.media) > MEDIA_LIMIT:
+                    self.store.media.pop(next(iter(self.store.media)))
+            files.append({"url": url, "path": url, "size": len(content)})
+        if not files:
+            return self._send_json(400, {"error": {"message": "No image uploaded"}})
+        self._send_json(200, {"data": {"files": files}})
+
+    def _media(self, path):
+        with self.store.lock:
+            content = self.store.media.get(path)
+        if content is None:
+            return self._send_json(404, {"error": {"message": "Not found"}})
+        self._send(200, content, mimetypes.guess_type(path)[0] or "application/octet-stream")
+
+    def _delete_media(self, url):
+        with self.store.lock:
+            content = self.store.media.pop(url, None)
+        if content is None:
+            return self._send_json(404, {"error": {"message": "Not found"}})
+        self._send_json(200, {"data": {"path": url}})
+
+    def _graphql(self):
+        body = self._read_json()
+        root = "products" if "products(" in body.get("query", "") else "categories"
+        filters = (body.get("variables") or {}).get("filters") or []
+        with self.store.lock:
+            items = list(getattr(self.store, root).values())
+        for flt in filters:
+            items = [item for item in items if str(item.get(flt["key"])) == str(flt["value"])]
+        self._send_json(200, {"data": {root: {"items": items}}})
+
+    def _storefront(self, url_key):
+        """Page produit ou catégorie de la vitrine, une fois l'entité propagée"""
+        now = time.monotonic()
+        with self.store.lock:
+            products, categories = (
+                [item for item in items.values()
+                 if self.store.visible_at.get(item["uuid"], 0) <= now and item.get("status", 1)]
+                for items in (self.store.products, self.store.categories))
+        product = next((item for item in products if item.get("url_key") == url_key), None)
+        category = next((item for item in categories if item.get("url_key") == url_key), None)
+        if product is not None:
+            content = (f'<h1 class="product-single-name">{html.escape(str(product["name"]))}</h1>\n'
+                       f'<div class="product-single-price">{html.escape(str(product.get("price", "")))}</div>')
+            return self._page(product["name"], content, nav=False)
+        if category is not None:
+            listing = "".join(
+                f'<div class="listing-tem"><a href="/{html.escape(str(item["url_key"]))}">'
+                f'{html.escape(str(item["name"]))}</a></div>'
+                for item in products if str(item.get("category_id")) == str(category["category_id"]))
+            content = (f'<h1 class="category-name">{html.escape(str(category["name"]))}</h1>\n'
+                       f'<div class="product-list">{listing}</div>')
+            return self._page(category["name"], content, nav=False)
+        self._send(404, b"<h1>Page not found</h1>", "text/html; charset=utf-8")
+
+    def _form(self, resource, item=None):
+        """Formulaire de création, ou d'édition si item est donné"""
+        spec = _RESOURCES[resource]
+        title = spec["edit_title"] if item else spec["new_title"]
+        inputs = "".join(
+            f'<div class="field"><label for="{field_id}">{field_id}</label>'
+            f'<input type="{kind}" id="{field_id}" name="{field_id}" data-field="{api_field}" '
+            f'value="{html.escape(str((item or {}).get(api_field, "")))}"></div>\n'
+            for field_id, api_field, kind in spec["fields"]
+        )
+        if spec["image"]:
+            inputs += '<input type="file" name="images" accept="image/*" multiple>\n<div class="image-list">'
+            for image in (item or {}).get("images") or ():
+                inputs += f'<img class="product-image" src="{html.escape(image)}" alt="">'
+            inputs += "</div>\n"
+        content = (
+            f'<h1 class="page-heading-title">{title}</h1>\n'
+            f'<form data-api="{spec["api"]}" data-uuid="{(item or {}).get("uuid", "")}" '
+            f'data-edit="/admin/{resource}/edit/" data-edit-title="{spec["edit_title"]}" '
+            f'data-message="{spec["message"]}">\n{inputs}'
+            f'<button type="button" class="button primary">Save</button>\n</form>'
+        )
+        self._page(title, content, _FORM_SCRIPT)
+
+    def _grid(self, resource, columns):
+        spec = _RESOURCES[resource]
+        with self.store.lock:
+            items = list(getattr(self.store, resource).values())
+        items = self._listing(items)
+        rows = []
+        for item in items:
+            edit = f"/admin/{resource}/edit/{item['uuid']}"
+            cells = []
+            for column in columns:
+                value = html.escape(str(item.get(column, "")))
+                if column == "name" and resource == "categories":
+                    cells.append(f'<td><a href="{edit}">{value}</a></td>')
+                elif column == "name":
+                    cells.append(f'<td onclick="window.location.href=\'{edit}\'">{value}</td>')
+                else:
+                    cells.append(f"<td>{value}</td>")
+            rows.append(f'<tr><td><input type="checkbox" value="{item["uuid"]}"></td>{"".join(cells)}</tr>')
+        content = (
+            f'<h1 class="page-heading-title">{spec["grid_title"]}</h1>\n'
+            f'<a class="button primary" href="/admin/{resource}/new">{spec["new_label"]}</a>\n'
+            f'<a href="#" class="delete-action" hidden><span>Delete</span></a>\n'
+            f'<table data-api="{spec["api"]}"><thead><tr><th></th>'
+            + "".join(f"<th>{column}</th>" for column in columns)
+            + f'</tr></thead><tbody>{"".join(rows)}</tbody></table>\n'
+            '<div class="modal" hidden><p>Delete selected items?</p>'
+            '<button type="button" class="button critical">Delete</button></div>'
+        )
+        self._page(spec["grid_title"], content, _GRID_SCRIPT)
+
+    def _listing(self, items):
+        """Filtres, tri et pagination du listing, comme les paramètres d'URL de l'admin
+
+        ?<champ>=valeur (contient, sans casse), ?keyword= (nom ou SKU),
+        ?ob=<champ>&od=asc|desc, ?page=1&limit=20.
+        """
+        query = {name: values[-1] for name, values in parse_qs(urlsplit(self.path).query).items()}
+        page = max(1, int(query.pop("page", 1)))
+        limit = max(1, int(query.pop("limit", 20)))
+        order_by, direction = query.pop("ob", None), query.pop("od", "asc")
+        keyword = query.pop("keyword", "").lower()
+        if keyword:
+            items = [item for item in items
+                     if keyword in str(item.get("name", "")).lower() or keyword in str(item.get("sku", "")).lower()]
+        for field, value in query.items():
+            items = [item for item in items if value.lower() in str(item.get(field, "")).lower()]
+        if order_by:
+            items = sorted(items, key=lambda item: (item.get(order_by) is None, item.get(order_by, 0)),
+                           reverse=direction == "desc")
+        return items[(page - 1) * limit:page * limit]
+
+    def _page(self, title, content, script="", nav=True):
+        body = _LAYOUT.format(title=title, nav=_NAV if nav else "", content=content, script=script)
+        self._send(200, body.encode(), "text/html; charset=utf-8")
+
+    def _authenticated(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return SESSION_COOKIE in cookie and cookie[SESSION_COOKIE].value in self.store.sessions
+
+    def _unauthorized(self):
+        self._read_body()  # Corps non lu : il corromprait la requête suivante de la connexion keep-alive
+        self._send_json(401, {"error": {"message": "Unauthorized"}})
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self):
+        raw = self._read_body()
+        return json.loads(raw) if raw else {}
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_json(self, status, payload, cookies=None):
+        self._send(status, json.dumps(payload).encode(), "application/json", cookies)
+
+    def _send(self, status, body, content_type, cookies=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (cookies or {}).items():
+            self.send_header("Set-Cookie", f"{name}={value}; Path=/; HttpOnly")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubEverShop:
+    """Serveur de substitution lancé dans un thread, sur un port libre
+
+    latency : secondes ajoutées avant chaque réponse, pour simuler l'instance réelle.
+    propagation : secondes entre la création d'une entité et sa page de vitrine.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, propagation=0.0):
+        self.store = StubStore()
+        self._server = ThreadingHTTPServer((host, port), StubHandler)
+        self._server.daemon_threads = True
+        self._server.store = self.store
+        self._server.latency = latency
+        self._server.propagation = propagation
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def latency(self):
+        return self._server.latency
+
+    @latency.setter
+    def latency(self, seconds):
+        self._server.latency = seconds
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
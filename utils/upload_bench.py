@@ -0,0 +1,313 @@
+"""Benchmark des envois d'images de l'admin
+
+Génère une matrice d'images (dimensions x formats x contenu) puis les envoie
+par l'API (POST /api/images) et/ou par le champ fichier du formulaire
+produit. Pour chaque image : durée de l'envoi (jusqu'à la réponse de l'API,
+observée dans la page en mode UI), délai jusqu'à l'image servie (HTTP) ou
+jusqu'à la vignette affichée et décodée (UI), débit en octets par seconde.
+Un envoi en échec (erreur de l'API, vignette jamais affichée) est compté
+comme erreur sans arrêter le benchmark. Le rapport termine par la pente
+latence / taille de l'image. Les images envoyées sont inscrites au registre
+(utils.ledger) et supprimées du média en fin de benchmark.
+
+Le mode ui envoie une image à la fois (un seul navigateur) : --concurrency
+ne s'applique qu'au mode http.
+
+    python -m utils.upload_bench http --stub --concurrency 4
+    python -m utils.upload_bench ui --dimensions 640x480,1920x1080 --formats png
+
+Le PNG est produit avec zlib ; JPEG et WebP demandent Pillow (facultatif).
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import requests
+
+from utils import config
+from utils.admin_api import IMAGES_PATH, AdminApiClient, AdminApiError
+from utils.ledger import ResourceLedger
+from utils.pages import ProductFormPage
+from utils.waits import WaitBudget, WaitTimeout, response_mark, use_budget, wait_for_response
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow absent : PNG seulement
+    Image = None
+
+DEFAULT_OUTPUT = "upload_bench.txt"
+DIMENSIONS = ((640, 480), (1920, 1080), (4000, 3000))
+FORMATS = ("png", "jpeg", "webp")
+# flat : aplat très compressible ; noise : bruit incompressible (taille maximale)
+FILLS = ("flat", "noise")
+
+
+@dataclass(frozen=True)
+class ImageSpec:
+    path: str
+    format: str
+    width: int
+    height: int
+    fill: str
+    bytes: int
+
+
+def available_formats():
+    return FORMATS if Image is not None else ("png",)
+
+
+def _pixels(width, height, fill, seed):
+    """Pixels RGB bruts, ligne par ligne"""
+    if fill == "noise":
+        rng = random.Random(seed)
+        return [rng.randbytes(width * 3) for _ in range(height)]
+    row = bytes((76, 175, 80)) * width
+    return [row] * height
+
+
+def png_bytes(width, height, fill="flat", seed=0):
+    """PNG RGB 8 bits encodé avec zlib, sans dépendance"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    raw = b"".join(b"\x00" + row for row in _pixels(width, height, fill, seed))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+def image_bytes(image_format, width, height, fill="flat", seed=0):
+    if image_format == "png":
+        return png_bytes(width, height, fill, seed)
+    if Image is None:
+        raise RuntimeError(f"Le format {image_format} demande Pillow (pip install Pillow)")
+    image = Image.frombytes("RGB", (width, height), b"".join(_pixels(width, height, fill, seed)))
+    output = io.BytesIO()
+    image.save(output, format=image_format.upper(), quality=85)
+    return output.getvalue()
+
+
+def generate_matrix(directory, dimensions=DIMENSIONS, formats=None, fills=FILLS):
+    """Écrit une image par combinaison ; renvoie les ImageSpec, de la plus légère à la plus lourde"""
+    os.makedirs(directory, exist_ok=True)
+    specs = []
+    for image_format in formats or available_formats():
+        for width, height in dimensions:
+            for fill in fills:
+                extension = "jpg" if image_format == "jpeg" else image_format
+                path = os.path.join(directory, f"{fill}-{width}x{height}.{extension}")
+                content = image_bytes(image_format, width, height, fill)
+                with open(path, "wb") as output:
+                    output.write(content)
+                specs.append(ImageSpec(os.path.abspath(path), image_format, width, height, fill, len(content)))
+    return sorted(specs, key=lambda spec: spec.bytes)
+
+
+def upload_http(client, spec, poll_timeout=30, ledger=None):
+    """Envoi par l'API puis attente de l'image servie à son URL"""
+    start = time.monotonic()
+    try:
+        url = client.upload_image(spec.path)
+    except (AdminApiError, requests.RequestException) as error:
+        return _result("http", spec, None, None, error=str(error))
+    uploaded = time.monotonic() - start
+    if ledger is not None:
+        ledger.media(url)
+    # L'image n'est pas forcément servie dès la réponse (traitement, copie) : on la sonde
+    deadline, delay = start + poll_timeout, 0.01
+    visible = None
+    while time.monotonic() < deadline:
+        try:
+            response = client.session.get(client.base_url + url, timeout=client.timeout)
+        except requests.RequestException as error:
+            return _result("http", spec, uploaded, None, error=str(error))
+        if response.status_code == 200 and response.content:
+            visible = time.monotonic() - start
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+    return _result("http", spec, uploaded, visible)
+
+
+def upload_ui(driver, spec, ledger=None):
+    """Envoi par le champ fichier d'un formulaire produit neuf, jusqu'à la vignette décodée"""
+    try:
+        with use_budget(WaitBudget()):
+            page = ProductFormPage(driver).open()
+            mark = response_mark(driver)
+            # L'heure de la réponse est consignée par la page, sur son horloge
+            started_at = driver.execute_script("return Date.now();")
+            start = time.monotonic()
+            page.upload_image(spec.path)
+            visible = time.monotonic() - start
+            response = wait_for_response(driver, ("POST",), rf"^{re.escape(IMAGES_PATH)}(/.*)?$", since=mark)
+    except WaitTimeout as error:
+        return _result("ui", spec, None, None, error=str(error))
+    if not 200 <= response["status"] < 300:
+        return _result("ui", spec, None, None, error=f"{response['url']} : HTTP {response['status']}")
+    if ledger is not None:
+        for url in _uploaded_urls(response.get("body")):
+            ledger.media(url)
+    return _result("ui", spec, max(0.0, (response["at"] - started_at) / 1000), visible)
+
+
+def _uploaded_urls(body):
+    """URLs des images dans la réponse de l'API d'envoi (corps lu par la page)"""
+    data = body.get("data") if isinstance(body, dict) else None
+    files = data.get("files") if isinstance(data, dict) else None
+    return [item["url"] for item in files or () if isinstance(item, dict) and item.get("url")]
+
+
+def _result(mode, spec, uploaded, visible, error=None):
+    return dict(asdict(spec), mode=mode, upload_seconds=uploaded, visible_seconds=visible,
+                bytes_per_second=spec.bytes / uploaded if uploaded else None, error=error)
+
+
+def run_http(client, specs, repeat=3, concurrency=1, ledger=None):
+    """Chaque image envoyée repeat fois, concurrency envois simultanés"""
+    jobs = [spec for spec in specs for _ in range(repeat)]
+    with ThreadPoolExecutor(max(1, concurrency)) as executor:
+        return list(executor.map(lambda spec: upload_http(client, spec, ledger=ledger), jobs))
+
+
+def run_ui(driver, specs, repeat=3, ledger=None):
+    """Chaque image envoyée repeat fois par le formulaire produit, une à la fois"""
+    return [upload_ui(driver, spec, ledger) for spec in specs for _ in range(repeat)]
+
+
+def summarize(results):
+    """Médianes par image (envois réussis) et pente latence / taille (ms par Mo) par mode"""
+    grouped = {}
+    for result in results:
+        key = (result["mode"], result["format"], result["width"], result["height"], result["fill"])
+        grouped.setdefault(key, []).append(result)
+    rows = []
+    for (mode, image_format, width, height, fill), group in sorted(grouped.items(), key=lambda item: (
+            item[0][0], item[1][0]["bytes"])):
+        succeeded = [r for r in group if not r.get("error")]
+        visible = [r["visible_seconds"] for r in succeeded if r["visible_seconds"] is not None]
+        rows.append({
+            "mode": mode, "format": image_format, "dimensions": f"{width}x{height}", "fill": fill,
+            "bytes": group[0]["bytes"], "samples": len(succeeded), "errors": len(group) - len(succeeded),
+            "upload_seconds": statistics.median(r["upload_seconds"] for r in succeeded) if succeeded else None,
+            "visible_seconds": statistics.median(visible) if visible else None,
+            "bytes_per_second": statistics.median(r["bytes_per_second"] for r in succeeded) if succeeded else None,
+        })
+    scaling = {}
+    for mode in {row["mode"] for row in rows}:
+        points = [(row["bytes"] / 1e6, row["upload_seconds"] * 1000) for row in rows
+                  if row["mode"] == mode and row["upload_seconds"] is not None]
+        if len({x for x, _ in points}) >= 2:
+            slope, intercept = statistics.linear_regression(*zip(*points))
+            scaling[mode] = {"ms_per_mb": slope, "base_ms": intercept}
+    return rows, scaling
+
+
+def report(results):
+    rows, scaling = summarize(results)
+    lines = [f"  {'mode':<5} {'format':<5} {'dimensions':>10} {'contenu':<6} {'taille':>9} "
+             f"{'envoi':>9} {'visible':>9} {'débit':>10} {'err':>4}"]
+    for row in rows:
+        upload = "-" if row["upload_seconds"] is None else f"{row['upload_seconds'] * 1000:.0f}ms"
+        visible = "-" if row["visible_seconds"] is None else f"{row['visible_seconds'] * 1000:.0f}ms"
+        rate = "-" if row["bytes_per_second"] is None else f"{row['bytes_per_second'] / 1e6:.2f}Mo/s"
+        lines.append(f"  {row['mode']:<5} {row['format']:<5} {row['dimensions']:>10} {row['fill']:<6} "
+                     f"{row['bytes'] / 1024:>7.0f}Ko {upload:>9} {visible:>9} {rate:>10} {row['errors']:>4}")
+    for mode, fit in sorted(scaling.items()):
+        lines.append(f"  {mode} : {fit['base_ms']:.0f}ms + {fit['ms_per_mb']:.0f}ms par Mo")
+    return "\n".join(lines)
+
+
+@contextmanager
+def admin_browser(profile):
+    """Navigateur connecté à l'admin pour le mode ui"""
+    from utils.browser import BrowserFactory
+    from utils.browser_pool import login_to_admin
+
+    factory = BrowserFactory(profile)
+    driver = factory()
+    try:
+        with use_budget(WaitBudget()):
+            login_to_admin(driver)
+        yield driver
+    finally:
+        driver.quit()
+        factory.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.upload_bench", description=__doc__.split("\n")[0])
+    parser.add_argument("mode", choices=("http", "ui", "both"))
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None, help=f"Instance EverShop (défaut : {config.BASE_URL})")
+    target.add_argument("--stub", action="store_true", help="Serveur de substitution local")
+    parser.add_argument("--dimensions", default=",".join(f"{w}x{h}" for w, h in DIMENSIONS))
+    parser.add_argument("--formats", default=",".join(available_formats()))
+    parser.add_argument("--fills", default=",".join(FILLS))
+    parser.add_argument("--repeat", type=int, default=3, help="Envois par image")
+    parser.add_argument("--concurrency", type=int, default=1, help="Envois HTTP simultanés (mode http seulement)")
+    parser.add_argument("--profile", default=config.BROWSER_PROFILE, help="Profil Chrome du mode ui")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+    if args.mode == "ui" and args.concurrency > 1:
+        parser.error("--concurrency ne s'applique qu'au mode http : le mode ui envoie une image à la fois")
+
+    stub = None
+    if args.stub:
+        from utils.stub_server import StubEverShop
+        stub = StubEverShop().start()
+        config.set_base_url(stub.url)
+    elif args.base_url:
+        config.set_base_url(args.base_url)
+    dimensions = [tuple(int(n) for n in value.split("x")) for value in args.dimensions.split(",")]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="evershop-upload-bench-") as directory:
+        specs = generate_matrix(directory, dimensions, args.formats.split(","), args.fills.split(","))
+        print(f"{len(specs)} images générées, de {specs[0].bytes / 1024:.0f} Ko à {specs[-1].bytes / 1024:.0f} Ko")
+        client = AdminApiClient(pool_size=max(1, args.concurrency))
+        ledger = ResourceLedger(client)
+        try:
+            if args.mode in ("http", "both"):
+                results += run_http(client, specs, args.repeat, args.concurrency, ledger)
+            if args.mode in ("ui", "both"):
+                if args.concurrency > 1:
+                    print("Mode ui : une image à la fois, --concurrency ignoré")
+                with admin_browser(args.profile) as driver:
+                    results += run_ui(driver, specs, args.repeat, ledger)
+        except (requests.RequestException, RuntimeError) as error:
+            print(f"✗ {error}")
+            return 1
+        finally:
+            # Images supprimées du média même si le benchmark s'arrête en route
+            remaining = ledger.teardown()
+            ledger.close()
+            client.close()
+            if remaining:
+                print(f"✗ {len(remaining)} image(s) non supprimée(s), voir {ledger.path}")
+            if stub is not None:
+                stub.stop()
+
+    print(report(results))
+    with open(args.output, "a", encoding="utf-8") as output:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+    failed = [result for result in results if result["error"]]
+    for result in failed[:5]:
+        print(f"✗ {result['mode']} {os.path.basename(result['path'])} : {result['error']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
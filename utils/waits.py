@@ -0,0 +1,365 @@
+"""Attentes pilotées par le navigateur
+
+Au lieu de sonder le DOM toutes les 500 ms avec WebDriverWait (en plus de
+l'attente implicite), chaque attente injecte un MutationObserver dans la page
+qui répond dès que la condition est remplie : une seule commande WebDriver
+par attente, et aucun temps mort.
+
+Les réponses des requêtes d'écriture (POST, PATCH...) sont consignées dans
+la page par le même crochet fetch/XHR que le suivi des requêtes en cours :
+wait_for_response est notifiée dès qu'une réponse attendue arrive.
+
+Toutes les attentes d'un test puisent dans un même budget (WaitBudget) et
+sont enregistrées avec le temps réellement bloqué : seul ce temps est
+décompté du budget, pas le temps passé hors des attentes.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+from utils import config
+
+# Résolution d'un ou plusieurs localisateurs en un seul aller-retour
+RESOLVE_FUNCTION = """
+function find(by, selector) {
+  if (by === 'xpath') {
+    return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+  }
+  return document.querySelector(selector);
+}
+function resolveAll(locators) {
+  const found = {};
+  for (const [name, [by, selector]] of Object.entries(locators || {})) found[name] = find(by, selector);
+  return found;
+}
+"""
+
+_WAIT_SCRIPT = RESOLVE_FUNCTION + """
+const [kind, by, selector, text, locators, timeoutMs, done] = arguments;
+function visible(el) {
+  return !!el && el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';
+}
+function check() {
+  const el = find(by, selector);
+  switch (kind) {
+    case 'present': return el ? {ok: true, element: el} : null;
+    case 'visible': return visible(el) ? {ok: true, element: el} : null;
+    case 'clickable': return visible(el) && !el.disabled ? {ok: true, element: el} : null;
+    case 'text': return el && el.textContent.includes(text) ? {ok: true, element: el} : null;
+    case 'gone': return visible(el) ? null : {ok: true, element: null};
+    case 'loaded': return visible(el) && el.complete && el.naturalWidth > 0 ? {ok: true, element: el} : null;
+  }
+}
+// Une fois la condition remplie, les autres localisateurs de la page sont
+// résolus dans la même réponse
+const complete = (result) => done(Object.assign(result, {elements: resolveAll(locators)}));
+const first = check();
+if (first) { complete(first); return; }
+let timer = null;
+const recheck = () => {
+  const result = check();
+  if (result) { stop(); complete(result); }
+};
+const observer = new MutationObserver(recheck);
+// Le chargement d'une image ne modifie pas le DOM : on écoute aussi les événements load
+const stop = () => { observer.disconnect(); document.removeEventListener('load', recheck, true); clearTimeout(timer); };
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+document.addEventListener('load', recheck, true);
+timer = setTimeout(() => { stop(); done({ok: false}); }, timeoutMs);
+"""
+
+# Compte les requêtes fetch/XHR en cours et consigne les réponses des requêtes
+# d'écriture (tout sauf GET) ; installé une seule fois par document. Les
+# réponses sont recopiées dans sessionStorage : elles restent lisibles si
+# l'application navigue dès qu'elle a reçu la réponse.
+_NETWORK_HOOK = """
+if (!window.__evershopNet) {
+  const KEY = '__evershopResponses';
+  const saved = JSON.parse(sessionStorage.getItem(KEY) || '{"seq": 0, "responses": []}');
+  const net = window.__evershopNet = {pending: 0, target: new EventTarget(), seq: saved.seq, responses: saved.responses};
+  const change = (delta) => { net.pending += delta; net.target.dispatchEvent(new Event('change')); };
+  const persist = () => {
+    try { sessionStorage.setItem(KEY, JSON.stringify({seq: net.seq, responses: net.responses})); } catch (e) {}
+    net.target.dispatchEvent(new Event('change'));
+  };
+  // Le statut est consigné dès les en-têtes reçus, le corps quand il est lu
+  const respond = (method, url, status) => {
+    const entry = {seq: ++net.seq, method, url: new URL(url, location.href).pathname, status, body: null,
+                   at: Date.now()};
+    net.responses = net.responses.slice(-19).concat([entry]);
+    persist();
+    return (body) => { entry.body = body.slice(0, 65536); persist(); };
+  };
+  const fetch = window.fetch;
+  window.fetch = function (resource, init) {
+    change(1);
+    const method = ((init && init.method) || (resource instanceof Request ? resource.method : 'GET')).toUpperCase();
+    const url = resource instanceof Request ? resource.url : String(resource);
+    return fetch.apply(this, arguments).then((response) => {
+      if (method !== 'GET') {
+        const fill = respond(method, url, response.status);
+        response.clone().text().then(fill, () => {});
+      }
+      return response;
+    }).finally(() => change(-1));
+  };
+  const open = XMLHttpRequest.prototype.open;
+  XMLHttpRequest.prototype.open = function (method, url) {
+    this.__evershopRequest = [String(method).toUpperCase(), String(url)];
+    return open.apply(this, arguments);
+  };
+  const send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    change(1);
+    this.addEventListener('loadend', () => {
+      const [method, url] = this.__evershopRequest || ['GET', ''];
+      if (method !== 'GET' && this.status) {
+        const text = this.responseType === '' || this.responseType === 'text' ? this.responseText : '';
+        respond(method, url, this.status)(text);
+      }
+      change(-1);
+    }, {once: true});
+    return send.apply(this, arguments);
+  };
+}
+"""
+
+_NETWORK_IDLE_SCRIPT = _NETWORK_HOOK + """
+const [quietMs, timeoutMs, done] = arguments;
+const net = window.__evershopNet;
+let quiet = null;
+const finish = (ok) => { clearTimeout(quiet); clearTimeout(timer); net.target.removeEventListener('change', arm); done({ok}); };
+const arm = () => {
+  clearTimeout(quiet);
+  if (net.pending === 0) quiet = setTimeout(() => finish(true), quietMs);
+};
+const timer = setTimeout(() => finish(false), timeoutMs);
+net.target.addEventListener('change', arm);
+arm();
+"""
+
+# Numéro de la dernière réponse consignée, relevé avant l'action qui en déclenche une
+_RESPONSE_MARK_SCRIPT = _NETWORK_HOOK + "return window.__evershopNet.seq;"
+
+_RESPONSE_SCRIPT = _NETWORK_HOOK + """
+const [methods, pattern, since, timeoutMs, done] = arguments;
+const net = window.__evershopNet;
+const expected = new RegExp(pattern);
+const match = () => net.responses.find((r) => r.seq > since && methods.includes(r.method) && expected.test(r.url));
+let timer = null, late = null;
+const check = () => {
+  const response = match();
+  if (!response) return false;
+  // On attend le corps une seconde au plus (réponse sans corps lisible, page quittée)
+  const wait = 1000 - (Date.now() - response.at);
+  if (response.body === null && wait > 0) {
+    if (!late) late = setTimeout(check, wait);
+    return false;
+  }
+  net.target.removeEventListener('change', check);
+  clearTimeout(timer);
+  clearTimeout(late);
+  done({ok: true, response});
+  return true;
+};
+if (!check()) {
+  net.target.addEventListener('change', check);
+  timer = setTimeout(() => { net.target.removeEventListener('change', check); done({ok: false}); }, timeoutMs);
+}
+"""
+
+_CSS_FOR = {
+    By.CSS_SELECTOR: lambda value: value,
+    By.ID: lambda value: f'[id="{value}"]',
+    By.NAME: lambda value: f'[name="{value}"]',
+    By.CLASS_NAME: lambda value: f".{value}",
+    By.TAG_NAME: lambda value: value,
+}
+
+
+class WaitTimeout(TimeoutException):
+    """Condition non remplie dans le temps imparti"""
+
+
+class WaitBudget:
+    """Budget de temps d'attente partagé par toutes les attentes d'un test"""
+
+    def __init__(self, seconds=config.WAIT_BUDGET):
+        self.seconds = seconds
+        self.records = []
+
+    def remaining(self):
+        """Budget non consommé par les attentes déjà terminées"""
+        return max(0.0, self.seconds - self.blocked)
+
+    def record(self, description, elapsed, ok):
+        self.records.append((description, elapsed, ok))
+
+    @property
+    def blocked(self):
+        """Temps total passé à attendre"""
+        return sum(elapsed for _, elapsed, _ in self.records)
+
+    def report(self):
+        """Résumé lisible des attentes du test"""
+        if not self.records:
+            return "Aucune attente"
+        slowest = max(self.records, key=lambda record: record[1])
+        return (f"{len(self.records)} attentes, {self.blocked:.3f}s bloquées sur un budget de "
+                f"{self.seconds:.0f}s (plus longue : {slowest[0]} en {slowest[1]:.3f}s)")
+
+
+_current_budget = None
+
+
+@contextmanager
+def use_budget(budget):
+    """Rend le budget courant pour les attentes exécutées dans le bloc"""
+    global _current_budget
+    previous, _current_budget = _current_budget, budget
+    try:
+        yield budget
+    finally:
+        _current_budget = previous
+
+
+def current_budget():
+    global _current_budget
+    if _current_budget is None:
+        _current_budget = WaitBudget()
+    return _current_budget
+
+
+def _locator(by, value):
+    if by == By.XPATH:
+        return "xpath", value
+    if by not in _CSS_FOR:
+        raise ValueError(f"Stratégie de localisation non supportée : {by}")
+    return "css", _CSS_FOR[by](value)
+
+
+def _timeout(timeout):
+    budget = current_budget()
+    remaining = budget.remaining()
+    return budget, remaining if timeout is None else min(timeout, remaining)
+
+
+def _run(driver, description, script, *args, timeout=None):
+    budget, seconds = _timeout(timeout)
+    start = time.monotonic()
+    result = {"ok": False}
+    try:
+        while True:
+            left = seconds - (time.monotonic() - start)
+            if left <= 0:
+                break
+            try:
+                result = driver.execute_async_script(script, *args, int(left * 1000))
+                break
+            except JavascriptException as error:
+                # La page a changé pendant l'attente (redirection après un clic) :
+                # on relance l'observation sur le nouveau document
+                if "unloaded" not in str(error) and "navigat" not in str(error):
+                    raise
+            except TimeoutException:
+                break
+    finally:
+        elapsed = time.monotonic() - start
+        budget.record(description, elapsed, result.get("ok", False))
+    if not result.get("ok"):
+        raise WaitTimeout(f"{description} : condition non remplie après {elapsed:.1f}s "
+                          f"(budget restant {budget.remaining():.1f}s)")
+    return result
+
+
+def locators_for_script(locators):
+    """Convertit {nom: (By, valeur)} au format attendu par RESOLVE_FUNCTION"""
+    return {name: list(_locator(by, value)) for name, (by, value) in locators.items()}
+
+
+def wait_arguments(kind, by, value, text=None, locators=None):
+    """Description de la condition et arguments du script d'attente, sans le délai
+
+    Le script est le premier argument ; le délai en millisecondes s'ajoute
+    à la fin. Partagé avec le client asynchrone (utils.async_driver).
+    """
+    strategy, selector = _locator(by, value)
+    description = f"{kind} {by}={value}" + (f" ~ '{text}'" if text else "")
+    return description, (_WAIT_SCRIPT, kind, strategy, selector, text, locators_for_script(locators or {}))
+
+
+def _wait_element(driver, kind, by, value, text=None, timeout=None, locators=None):
+    description, arguments = wait_arguments(kind, by, value, text, locators)
+    return _run(driver, description, *arguments, timeout=timeout)
+
+
+def wait_for(driver, by, value, clickable=False, visible=False, timeout=None):
+    """Attend qu'un élément soit présent (ou visible, ou cliquable) et le renvoie"""
+    kind = "clickable" if clickable else "visible" if visible else "present"
+    return _wait_element(driver, kind, by, value, timeout=timeout).get("element")
+
+
+def wait_and_resolve(driver, by, value, locators, timeout=None):
+    """Attend qu'un élément soit présent puis résout tous les localisateurs donnés
+
+    Renvoie {nom: élément ou None} : une seule commande WebDriver pour toute la page.
+    """
+    return _wait_element(driver, "present", by, value, timeout=timeout, locators=locators)["elements"]
+
+
+def wait_for_text(driver, by, value, text, timeout=None):
+    """Attend qu'un élément contienne le texte donné et le renvoie"""
+    return _wait_element(driver, "text", by, value, text=text, timeout=timeout).get("element")
+
+
+def wait_for_image(driver, by, value, timeout=None):
+    """Attend qu'une image soit affichée et décodée et la renvoie"""
+    return _wait_element(driver, "loaded", by, value, timeout=timeout).get("element")
+
+
+def wait_until_gone(driver, by, value, timeout=None):
+    """Attend qu'un élément disparaisse ou devienne invisible"""
+    _wait_element(driver, "gone", by, value, timeout=timeout)
+
+
+def wait_for_network_idle(driver, quiet_ms=300, timeout=None):
+    """Attend qu'aucune requête fetch/XHR ne soit en cours pendant quiet_ms"""
+    _run(driver, f"network idle {quiet_ms}ms", _NETWORK_IDLE_SCRIPT, quiet_ms, timeout=timeout)
+
+
+def response_mark(driver):
+    """Installe le suivi réseau et renvoie le numéro de la dernière réponse consignée
+
+    À relever avant l'action dont on attend la réponse (voir wait_for_response).
+    """
+    return driver.execute_script(_RESPONSE_MARK_SCRIPT) or 0
+
+
+def wait_for_response(driver, methods, pattern, since=0, timeout=None):
+    """Attend la réponse d'une requête d'écriture dont le chemin correspond à pattern
+
+    Renvoie {method, url, status, body}, body étant le JSON décodé (ou le
+    texte brut, ou None si la page est partie avant de le lire). Seules les
+    réponses consignées après le numéro since sont prises en compte.
+    """
+    methods = [method.upper() for method in methods]
+    description = f"réponse {'/'.join(methods)} {pattern}"
+    response = _run(driver, description, _RESPONSE_SCRIPT, methods, pattern, since, timeout=timeout)["response"]
+    body = response.get("body")
+    if body:
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+    return dict(response, body=body)
+
+
+def install_network_hook(driver):
+    """Commence à compter les requêtes de la page avant une action qui en déclenche"""
+    try:
+        driver.execute_script(_NETWORK_HOOK)
+    except WebDriverException:
+        pass